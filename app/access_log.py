@@ -0,0 +1,140 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from config import settings
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# 访问日志记录的结构化字段，JSON 格式输出时原样写入
+ACCESS_FIELDS = ("method", "path", "status", "duration_ms", "client")
+
+access_logger = logging.getLogger("blog-app.access")
+
+_listener: Optional[QueueListener] = None
+
+
+class LocalQueueHandler(QueueHandler):
+    """进程内队列无需序列化记录，跳过 QueueHandler.prepare 中的预格式化，
+    消息的 % 格式化推迟到 QueueListener 线程中进行
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行 JSON，访问日志附带 ACCESS_FIELDS 中的字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for field in ACCESS_FIELDS:
+            if hasattr(record, field):
+                data[field] = getattr(record, field)
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def setup_logging():
+    """根日志器只挂一个 QueueHandler，格式化和写 stderr 由后台 QueueListener 线程完成
+
+    重复调用不会重复添加处理器。
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler()
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(LocalQueueHandler(log_queue))
+    root.setLevel(settings.LOG_LEVEL.upper())
+    access_logger.setLevel(logging.INFO if settings.ACCESS_LOG_ENABLED else logging.CRITICAL + 1)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """停止后台线程前写出队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class AccessLogMiddleware:
+    """记录每个请求的方法、路径、状态码和耗时
+
+    纯 ASGI 中间件，不经过 BaseHTTPMiddleware 的额外任务和流包装。
+    exclude_prefixes 下的路径（静态文件）不记录；其余请求按 sample_rate 抽样，
+    5xx 和异常总是记录。消息使用 % 参数延迟格式化。
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, exclude_prefixes=("/static/",)):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        if not access_logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            self._log(scope, 500, started, logging.ERROR)
+            raise
+        if status >= 500:
+            self._log(scope, status, started, logging.ERROR)
+        elif self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            self._log(scope, status, started, logging.INFO)
+
+    @staticmethod
+    def _log(scope, status: int, started: float, level: int):
+        duration_ms = (time.perf_counter() - started) * 1000
+        client = scope.get("client")
+        client = client[0] if client else None
+        access_logger.log(
+            level,
+            "%s %s %d %.1fms",
+            scope["method"], scope["path"], status, duration_ms,
+            extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round(duration_ms, 3),
+                "client": client,
+            },
+        )
@@ -1,57 +1,55 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from typing import Generator
+from typing import AsyncGenerator
 
-from app import crud, models, schemas
-from app.models import SessionLocal
-from config import settings
+import aiosqlite
+
+from app.auth import InvalidToken, decode_access_token, load_user
+from app.db import aio_pool
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": "1"},
+    )
+
+async def get_db() -> AsyncGenerator[aiosqlite.Connection, None]:
+    # 只读连接；同一请求内的依赖共用一个连接，写操作由 app.services 使用写连接
+    async with aio_pool.connection() as conn:
+        yield conn
 
 async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.User:
+    db: aiosqlite.Connection = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(username=username)
-    except JWTError:
+        username = decode_access_token(token)
+    except InvalidToken:
         raise credentials_exception
-    user = crud.get_user_by_username(db, username=token_data.username)
+    user = await load_user(username, db)
     if user is None:
         raise credentials_exception
     return user
 
 async def get_current_active_user(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
-    if not current_user.is_active:
+    current_user: dict = Depends(get_current_user),
+) -> dict:
+    if not current_user["is_active"]:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 async def get_current_admin_user(
-    current_user: models.User = Depends(get_current_active_user),
-) -> models.User:
-    if not current_user.is_admin:
+    current_user: dict = Depends(get_current_active_user),
+) -> dict:
+    if not current_user["is_admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
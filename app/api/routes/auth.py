@@ -1,21 +1,24 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
-from app import crud, schemas
+from app import schemas, services
 from app.api import deps
 from app.auth import authenticate_user, create_access_token
+from app.passwords import PasswordHasherBusy
+from app.serialization import DefaultJSONResponse
 from config import settings
 
-router = APIRouter(tags=["authentication"])
+router = APIRouter(tags=["authentication"], default_response_class=DefaultJSONResponse)
 
 @router.post("/login", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(deps.get_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password)
+    except PasswordHasherBusy:
+        raise deps.hasher_busy_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,25 +27,18 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user["username"]}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=schemas.User)
-async def register_user(
-    user_in: schemas.UserCreate,
-    db: Session = Depends(deps.get_db)
-):
-    user = crud.get_user_by_email(db, email=user_in.email)
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
-    user = crud.get_user_by_username(db, username=user_in.username)
-    if user:
+async def register_user(user_in: schemas.UserCreate):
+    try:
+        return await services.create_user(user_in.username, user_in.email, user_in.password)
+    except services.UserConflict as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered",
+            detail="Email already registered" if e.field == "email" else "Username already registered",
         )
-    return crud.create_user(db=db, user=user_in)
\ No newline at end of file
+    except PasswordHasherBusy:
+        raise deps.hasher_busy_exception()
@@ -1,67 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional, Union
 
-from app import crud, models, schemas
+import aiosqlite
+
+from app import async_crud, schemas, services
 from app.api import deps
+from app.async_crud import POST_VIEWS
+from app.pagination import NEXT_CURSOR_HEADER, InvalidCursor, decode_post_cursor, page_limit, post_cursor
+from app.serialization import DefaultJSONResponse
 
-router = APIRouter(tags=["posts"])
+router = APIRouter(tags=["posts"], default_response_class=DefaultJSONResponse)
 
-@router.get("/posts", response_model=List[schemas.Post])
+@router.get("/posts", response_model=List[Union[schemas.Post, schemas.PostSummary]])
 async def read_posts(
-    skip: int = 0,
+    response: Response,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    view: str = "full",
     published_only: bool = True,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    db: aiosqlite.Connection = Depends(deps.get_db),
+    current_user: dict = Depends(deps.get_current_user)
 ):
-    if current_user.is_admin:
+    limit = page_limit(limit)
+    try:
+        before = decode_post_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if view not in POST_VIEWS:
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+    summary = view == "summary"
+    if current_user["is_admin"]:
         # Admin can see all posts
-        return crud.get_posts(db, skip=skip, limit=limit, published_only=published_only)
+        posts = await async_crud.get_posts(db, limit=limit, published_only=published_only, before=before, summary=summary)
     else:
         # Regular users can only see published posts
-        return crud.get_posts(db, skip=skip, limit=limit, published_only=True)
+        posts = await async_crud.get_posts(db, limit=limit, published_only=True, before=before, summary=summary)
+    next_cursor = post_cursor(posts, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if summary:
+        return [schemas.PostSummary.model_validate(post) for post in posts]
+    return posts
 
 @router.get("/posts/{post_id}", response_model=schemas.Post)
 async def read_post(
     post_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    db: aiosqlite.Connection = Depends(deps.get_db),
+    current_user: dict = Depends(deps.get_current_user)
 ):
-    post = crud.get_post(db, post_id=post_id)
+    post = await async_crud.get_post(db, post_id, published_only=False)
     if post is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    if not post.published and not current_user.is_admin:
+    if not post["published"] and not current_user["is_admin"]:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return post
 
 @router.post("/posts", response_model=schemas.Post)
 async def create_post(
     post: schemas.PostCreate,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_admin_user)
+    current_user: dict = Depends(deps.get_current_admin_user)
 ):
-    return crud.create_post(db=db, post=post, user_id=current_user.id)
+    return await services.create_post(post.title, post.content, post.published, current_user["id"])
 
 @router.put("/posts/{post_id}", response_model=schemas.Post)
 async def update_post(
     post_id: int,
     post: schemas.PostUpdate,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_admin_user)
+    current_user: dict = Depends(deps.get_current_admin_user)
 ):
-    db_post = crud.get_post(db, post_id=post_id)
+    db_post = await services.update_post(post_id, post.model_dump(exclude_unset=True))
     if db_post is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    return crud.update_post(db=db, post_id=post_id, post=post)
+    return db_post
 
 @router.delete("/posts/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(
     post_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_admin_user)
+    current_user: dict = Depends(deps.get_current_admin_user)
 ):
-    success = crud.delete_post(db=db, post_id=post_id)
+    success = await services.delete_post(post_id)
     if not success:
         raise HTTPException(status_code=404, detail="Post not found")
-    return {"message": "Post deleted successfully"}
\ No newline at end of file
+    return {"message": "Post deleted successfully"}
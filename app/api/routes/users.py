@@ -1,50 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional
 
-from app import crud, models, schemas
+import aiosqlite
+
+from app import async_crud, schemas, services
 from app.api import deps
+from app.pagination import NEXT_CURSOR_HEADER, InvalidCursor, decode_user_cursor, page_limit, user_cursor
+from app.passwords import PasswordHasherBusy
+from app.serialization import DefaultJSONResponse
 
-router = APIRouter(tags=["users"])
+router = APIRouter(tags=["users"], default_response_class=DefaultJSONResponse)
 
 @router.get("/users/me", response_model=schemas.User)
 async def read_users_me(
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: dict = Depends(deps.get_current_active_user),
 ):
     return current_user
 
 @router.get("/users", response_model=List[schemas.User])
 async def read_users(
-    skip: int = 0,
+    response: Response,
     limit: int = 100,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_admin_user),
+    cursor: Optional[str] = None,
+    db: aiosqlite.Connection = Depends(deps.get_db),
+    current_user: dict = Depends(deps.get_current_admin_user),
 ):
-    users = crud.get_users(db, skip=skip, limit=limit)
+    limit = page_limit(limit)
+    try:
+        after_id = decode_user_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    users = await async_crud.get_users(db, limit=limit, after_id=after_id)
+    next_cursor = user_cursor(users, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return users
 
 @router.post("/users", response_model=schemas.User)
 async def create_user(
     user: schemas.UserCreate,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_admin_user),
+    current_user: dict = Depends(deps.get_current_admin_user),
 ):
-    db_user = crud.get_user_by_email(db, email=user.email)
-    if db_user:
+    try:
+        return await services.create_user(user.username, user.email, user.password)
+    except services.UserConflict as e:
         raise HTTPException(
             status_code=400,
-            detail="Email already registered",
+            detail="Email already registered" if e.field == "email" else "Username already registered",
         )
-    return crud.create_user(db=db, user=user)
+    except PasswordHasherBusy:
+        raise deps.hasher_busy_exception()
 
 @router.put("/users/{user_id}", response_model=schemas.User)
 async def update_user(
     user_id: int,
     user: schemas.UserUpdate,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_admin_user),
+    current_user: dict = Depends(deps.get_current_admin_user),
 ):
-    db_user = crud.update_user(db, user_id=user_id, user=user)
+    try:
+        db_user = await services.update_user(user_id, user.model_dump(exclude_unset=True))
+    except services.UserConflict as e:
+        raise HTTPException(
+            status_code=400,
+            detail="Email already registered" if e.field == "email" else "Username already registered",
+        )
+    except PasswordHasherBusy:
+        raise deps.hasher_busy_exception()
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
@@ -52,12 +73,11 @@ async def update_user(
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_admin_user),
+    current_user: dict = Depends(deps.get_current_admin_user),
 ):
-    if user_id == current_user.id:
+    if user_id == current_user["id"]:
         raise HTTPException(status_code=400, detail="Cannot delete your own user")
-    success = crud.delete_user(db=db, user_id=user_id)
+    success = await services.delete_user(user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"message": "User deleted successfully"}
\ No newline at end of file
+    return {"message": "User deleted successfully"}
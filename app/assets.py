@@ -0,0 +1,247 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import stat
+from mimetypes import guess_type
+from typing import Dict, List, NamedTuple, Optional
+
+import anyio
+import jinja2
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.http_cache import accepts_encoding
+from app.rendering import has_code_blocks
+from config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger("blog-app")
+
+# 静态资源构建：把 static/ 中的文件复制为带内容摘要的文件名（css/style.3f2a9c1b7d4e.css），
+# 同时生成 .br（需要安装 brotli）和 .gz 压缩版本，manifest.json 记录原路径到带摘要路径的映射。
+# 带摘要的 URL 内容永不变化，可以设置一年的 immutable 缓存；模板通过 asset_url() 引用
+MANIFEST = "manifest.json"
+HASH_LENGTH = 12
+# 只压缩文本类文件，过小的文件压缩后收益不抵额外的请求头
+COMPRESSIBLE_SUFFIXES = (".css", ".js", ".svg", ".json", ".map", ".txt", ".html")
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 按优先顺序尝试的预压缩版本
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest: Optional[Dict[str, str]] = None
+
+
+class PageAssets(NamedTuple):
+    styles: List[str]
+    scripts: List[str]
+
+
+class BuildResult(NamedTuple):
+    files: int
+    written: int
+    original_bytes: int
+    compressed_bytes: int
+
+
+def _hashed_name(path: str, data: bytes) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _variants(data: bytes) -> Dict[str, bytes]:
+    """各压缩版本，只保留比原文件小的"""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: compressed for suffix, compressed in variants.items() if len(compressed) < len(data)}
+
+
+def build_assets(source_dir: str = "static", output_dir: Optional[str] = None, prune: bool = False) -> BuildResult:
+    """构建带摘要的静态资源和压缩版本，写入 manifest.json
+
+    已存在的带摘要文件内容相同，直接跳过。旧版本文件默认保留，
+    仍在使用旧页面（或旧的预渲染页面）的客户端可以继续加载；prune 时删除不在本次 manifest 中的文件。
+    """
+    output_dir = output_dir or settings.ASSET_BUILD_DIR
+    if brotli is None:
+        logger.warning("未安装 brotli，只生成 gzip 压缩版本")
+
+    manifest: Dict[str, str] = {}
+    written = original_bytes = compressed_bytes = 0
+    for root, _, names in os.walk(source_dir):
+        for name in sorted(names):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, source_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+            hashed = _hashed_name(relative, data)
+            manifest[relative] = hashed
+            target = os.path.join(output_dir, hashed)
+            original_bytes += len(data)
+
+            compressible = name.endswith(COMPRESSIBLE_SUFFIXES) and len(data) >= MIN_COMPRESS_SIZE
+            variants = _variants(data) if compressible else {}
+            compressed_bytes += min([len(data)] + [len(variant) for variant in variants.values()])
+            if os.path.exists(target):
+                continue
+            # 先写压缩版本，带摘要的原文件出现时压缩版本一定已经存在
+            for suffix, compressed in variants.items():
+                _write(target + suffix, compressed)
+            _write(target, data)
+            written += 1
+
+    if prune:
+        keep = {os.path.join(output_dir, hashed) for hashed in manifest.values()}
+        keep |= {path + suffix for path in keep for _, suffix in ENCODINGS}
+        for root, _, names in os.walk(output_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                if name != MANIFEST and path not in keep:
+                    os.remove(path)
+
+    _write(os.path.join(output_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    load_manifest(output_dir)
+    return BuildResult(len(manifest), written, original_bytes, compressed_bytes)
+
+
+def load_manifest(output_dir: Optional[str] = None) -> Dict[str, str]:
+    """读取 manifest.json；尚未构建时为空，asset_url 返回未加摘要的路径"""
+    global _manifest
+    try:
+        with open(os.path.join(output_dir or settings.ASSET_BUILD_DIR, MANIFEST), encoding="utf-8") as f:
+            _manifest = json.load(f)
+    except (OSError, ValueError):
+        _manifest = {}
+    return _manifest
+
+
+def _get_manifest() -> Dict[str, str]:
+    return _manifest if _manifest is not None else load_manifest()
+
+
+def asset_url(path: str) -> str:
+    """模板中引用静态文件：asset_url('css/style.css') -> /static/css/style.3f2a9c1b7d4e.css"""
+    path = path.lstrip("/")
+    return "/static/" + _get_manifest().get(path, path)
+
+
+def build_id() -> str:
+    """当前 manifest 的摘要；页面引用的资源 URL 随之变化，用于页面的 ETag 和预渲染的 manifest"""
+    manifest = _get_manifest()
+    if not manifest:
+        return ""
+    return hashlib.sha1(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:HASH_LENGTH]
+
+
+def page_assets(paths: List[str]) -> PageAssets:
+    """把模板声明的资源（{% set assets = [...] %}）按样式表和脚本分开，去掉重复项并保持顺序"""
+    styles: List[str] = []
+    scripts: List[str] = []
+    for path in dict.fromkeys(paths):
+        (styles if path.endswith(".css") else scripts).append(path)
+    return PageAssets(styles, scripts)
+
+
+def install_template_globals(env: jinja2.Environment):
+    """注册模板中引用静态资源的函数；main.py 的 Jinja2Templates 与预渲染使用同一组"""
+    env.globals.update(asset_url=asset_url, page_assets=page_assets, has_code_blocks=has_code_blocks)
+
+
+class AssetFiles(StaticFiles):
+    """/static 的静态文件服务
+
+    带摘要的路径从构建目录返回，按 Accept-Encoding 选择 .br/.gz 版本，设置一年的 immutable 缓存；
+    未加摘要的原路径（manifest 中有记录时同样返回压缩版本）设置 no-cache，每次用 ETag 验证。
+    构建目录中没有的文件回退到 static/ 目录。
+    """
+
+    def __init__(self, *args, build_dir: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.build_dir = build_dir or settings.ASSET_BUILD_DIR
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        relative = path.replace(os.sep, "/")
+        manifest = _get_manifest()
+        if relative in manifest:
+            hashed, cache_control = manifest[relative], "no-cache"
+        else:
+            # 构建目录中的文件名都带摘要，包括旧版本页面仍在引用的文件
+            hashed, cache_control = relative, IMMUTABLE_CACHE_CONTROL
+
+        if relative != MANIFEST:
+            response = await anyio.to_thread.run_sync(self._built_response, hashed, scope)
+            if response is not None:
+                response.headers["cache-control"] = cache_control
+                return response
+
+        response = await super().get_response(path, scope)
+        response.headers.setdefault("cache-control", "no-cache")
+        return response
+
+    def _built_response(self, hashed: str, scope: Scope) -> Optional[Response]:
+        build_dir = os.path.realpath(self.build_dir)
+        full_path = os.path.realpath(os.path.join(build_dir, *hashed.split("/")))
+        if os.path.commonpath([full_path, build_dir]) != build_dir:
+            return None
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding")
+        candidates: List[tuple] = [
+            (coding, full_path + suffix) for coding, suffix in ENCODINGS if accepts_encoding(accept_encoding, coding)
+        ]
+        candidates.append((None, full_path))
+
+        compressible = any(os.path.exists(full_path + suffix) for _, suffix in ENCODINGS)
+        for coding, candidate in candidates:
+            try:
+                stat_result = os.stat(candidate)
+            except OSError:
+                continue
+            if not stat.S_ISREG(stat_result.st_mode):
+                continue
+            headers = {"Vary": "Accept-Encoding"} if compressible else {}
+            if coding is not None:
+                headers["Content-Encoding"] = coding
+            # 媒体类型按原文件名判断，而不是 .br/.gz
+            media_type = guess_type(hashed)[0] or "text/plain"
+            response = FileResponse(candidate, stat_result=stat_result, headers=headers, media_type=media_type)
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="构建带内容摘要的静态资源和 br/gz 压缩版本")
+    parser.add_argument("source_dir", nargs="?", default="static")
+    parser.add_argument("output_dir", nargs="?", default=settings.ASSET_BUILD_DIR)
+    parser.add_argument("--prune", action="store_true", help="删除不在本次 manifest 中的旧文件")
+    args = parser.parse_args()
+
+    result = build_assets(args.source_dir, args.output_dir, prune=args.prune)
+    print(
+        f"{result.files} 个文件，新写入 {result.written} 个，"
+        f"{result.original_bytes / 1024:.0f} KB -> 压缩后 {result.compressed_bytes / 1024:.0f} KB -> {args.output_dir}"
+    )
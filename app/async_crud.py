@@ -0,0 +1,386 @@
+import itertools
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import aiosqlite
+
+from app import metrics, profiler, search
+from app.rendering import RenderedContent
+
+# 与 main.py 中原有的原生 SQL 查询一致，改为通过 aiosqlite 执行，
+# 调用方从 app.db.aio_pool 取得连接后传入
+
+USER_COLUMNS = "id, username, email, is_active, is_admin"
+POST_COLUMNS = '''
+    p.id, p.title, p.content, p.published, p.created_at, p.updated_at,
+    p.author_id, u.username as author_name
+'''
+# 列表摘要视图：用写入时生成的摘要和字数代替全文
+SUMMARY_COLUMNS = '''
+    p.id, p.title, p.excerpt, p.word_count, p.published, p.created_at, p.updated_at,
+    p.author_id, u.username as author_name
+'''
+POST_VIEWS = ("full", "summary")
+# 导出包含渲染结果，静态站点生成时无需再渲染 Markdown
+EXPORT_COLUMNS = POST_COLUMNS + ', p.content_html, p.excerpt, p.word_count'
+
+
+def _user_dict(row) -> dict:
+    user = dict(row)
+    user['is_active'] = bool(user['is_active'])
+    user['is_admin'] = bool(user['is_admin'])
+    return user
+
+
+def _post_dict(row) -> dict:
+    post = dict(row)
+    post['published'] = bool(post['published'])
+    return post
+
+
+def _record(sql: str, started: float, rows: int = -1):
+    """查询次数和耗时计入当前请求的指标（app.metrics）和查询分析（app.profiler）"""
+    seconds = time.perf_counter() - started
+    metrics.record_query(seconds)
+    profiler.record_query(sql, seconds, rows)
+
+
+# execute_fetchall 在连接线程中一次完成执行、取行和释放游标，
+# 每条查询只需一次线程往返，而不是 execute、fetch、close 各一次
+async def _fetch_one(conn: aiosqlite.Connection, sql: str, params=()):
+    started = time.perf_counter()
+    rows = await conn.execute_fetchall(sql, params)
+    _record(sql, started, len(rows))
+    return rows[0] if rows else None
+
+
+async def _fetch_all(conn: aiosqlite.Connection, sql: str, params=()):
+    started = time.perf_counter()
+    rows = await conn.execute_fetchall(sql, params)
+    _record(sql, started, len(rows))
+    return rows
+
+
+async def _execute(conn: aiosqlite.Connection, sql: str, params=()) -> aiosqlite.Cursor:
+    started = time.perf_counter()
+    async with conn.execute(sql, params) as cursor:
+        pass
+    _record(sql, started, cursor.rowcount)
+    return cursor
+
+
+async def _execute_many(conn: aiosqlite.Connection, sql: str, rows: List[tuple]):
+    # 整组语句在查询分析中记为一次，不算作 N+1
+    started = time.perf_counter()
+    await conn.executemany(sql, rows)
+    _record(sql, started, len(rows))
+
+
+async def execute_statements(conn: aiosqlite.Connection, statements: List[Tuple[str, tuple]]):
+    """按顺序执行 (sql, params)，相邻的相同语句合并为一次 executemany；由调用方提交（批量操作）"""
+    for sql, group in itertools.groupby(statements, key=lambda statement: statement[0]):
+        rows = [params for _, params in group]
+        if len(rows) == 1:
+            await _execute(conn, sql, rows[0])
+        else:
+            await _execute_many(conn, sql, rows)
+
+
+# User operations
+async def get_user(conn: aiosqlite.Connection, user_id: int) -> Optional[dict]:
+    row = await _fetch_one(conn, f'SELECT {USER_COLUMNS} FROM users WHERE id = ?', (user_id,))
+    return _user_dict(row) if row else None
+
+
+async def get_user_by_username(
+    conn: aiosqlite.Connection, username: str, with_password: bool = False
+) -> Optional[dict]:
+    columns = USER_COLUMNS + (", hashed_password" if with_password else "")
+    row = await _fetch_one(conn, f'SELECT {columns} FROM users WHERE username = ?', (username,))
+    return _user_dict(row) if row else None
+
+
+async def user_conflict(
+    conn: aiosqlite.Connection,
+    username: Optional[str] = None,
+    email: Optional[str] = None,
+    exclude_id: Optional[int] = None,
+) -> Optional[str]:
+    """返回已被其他用户占用的字段（"username" 或 "email"），都未被占用时返回 None"""
+    row = await _fetch_one(
+        conn,
+        'SELECT username = ? FROM users WHERE (username = ? OR email = ?) AND id != ? LIMIT 1',
+        (username, username, email, exclude_id if exclude_id is not None else -1),
+    )
+    if row is None:
+        return None
+    return "username" if row[0] else "email"
+
+
+async def get_users(conn: aiosqlite.Connection, limit: int = 100, after_id: Optional[int] = None) -> List[dict]:
+    """按 id 正序分页，after_id 为上一页最后一个用户的 id"""
+    rows = await _fetch_all(
+        conn,
+        f'SELECT {USER_COLUMNS} FROM users WHERE id > ? ORDER BY id LIMIT ?',
+        (after_id if after_id is not None else 0, limit),
+    )
+    return [_user_dict(row) for row in rows]
+
+
+async def create_user(conn: aiosqlite.Connection, username: str, email: str, hashed_password: str) -> int:
+    cursor = await _execute(
+        conn,
+        'INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)',
+        (username, email, hashed_password),
+    )
+    await conn.commit()
+    return cursor.lastrowid
+
+
+async def get_users_by_id(conn: aiosqlite.Connection, user_ids: Iterable[int]) -> Dict[int, dict]:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    placeholders = ', '.join('?' * len(user_ids))
+    rows = await _fetch_all(conn, f'SELECT {USER_COLUMNS} FROM users WHERE id IN ({placeholders})', user_ids)
+    return {row['id']: _user_dict(row) for row in rows}
+
+
+def update_user_statement(user_id: int, fields: dict) -> Tuple[str, tuple]:
+    """按 fields 更新用户列的语句，调用方负责校验列名和取值"""
+    assignments = ', '.join(f"{column} = ?" for column in fields)
+    return f"UPDATE users SET {assignments} WHERE id = ?", (*fields.values(), user_id)
+
+
+async def update_user(conn: aiosqlite.Connection, user_id: int, fields: dict):
+    if not fields:
+        return
+    await _execute(conn, *update_user_statement(user_id, fields))
+    await conn.commit()
+
+
+def delete_user_statement(user_id: int) -> Tuple[str, tuple]:
+    return 'DELETE FROM users WHERE id = ?', (user_id,)
+
+
+async def delete_user(conn: aiosqlite.Connection, user_id: int) -> bool:
+    cursor = await _execute(conn, *delete_user_statement(user_id))
+    await conn.commit()
+    return cursor.rowcount > 0
+
+
+# Post operations
+async def get_post_ids_by_authors(conn: aiosqlite.Connection, author_ids: Iterable[int]) -> List[int]:
+    """这些用户写的所有文章（含未发布的）的 id"""
+    author_ids = list(author_ids)
+    if not author_ids:
+        return []
+    placeholders = ', '.join('?' * len(author_ids))
+    rows = await _fetch_all(conn, f'SELECT id FROM posts WHERE author_id IN ({placeholders})', author_ids)
+    return [row['id'] for row in rows]
+
+
+def posts_query(
+    limit: int = 100,
+    published_only: bool = True,
+    before: Optional[Tuple[str, int]] = None,
+    summary: bool = False,
+) -> Tuple[str, tuple]:
+    """文章列表的 SQL 和参数，get_posts 与 benchmarks/check_query_plans.py 共用"""
+    conditions, params = [], []
+    if published_only:
+        conditions.append('p.published = 1')
+    if before is not None:
+        conditions.append('(p.created_at, p.id) < (?, ?)')
+        params.extend(before)
+    query = f'''
+        SELECT {SUMMARY_COLUMNS if summary else POST_COLUMNS}
+        FROM posts p
+        LEFT JOIN users u ON p.author_id = u.id
+    '''
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY p.created_at DESC, p.id DESC LIMIT ?'
+    return query, (*params, limit)
+
+
+async def get_posts(
+    conn: aiosqlite.Connection,
+    limit: int = 100,
+    published_only: bool = True,
+    before: Optional[Tuple[str, int]] = None,
+    summary: bool = False,
+) -> List[dict]:
+    """按 (created_at, id) 倒序的游标分页，before 为上一页最后一篇文章的排序键
+
+    summary 为 True 时返回摘要和字数而不是 content。
+    """
+    rows = await _fetch_all(conn, *posts_query(limit, published_only, before, summary))
+    return [_post_dict(row) for row in rows]
+
+
+async def search_posts(
+    conn: aiosqlite.Connection,
+    match: str,
+    limit: int = 20,
+    published_only: bool = True,
+    after: Optional[Tuple[float, int]] = None,
+) -> List[dict]:
+    """按 bm25 相关度排序的全文搜索，after 为上一页最后一条结果的 (score, id)
+
+    match 由 search.build_match_query 生成。
+    """
+    query = f'''
+        SELECT p.id, p.title, p.excerpt, p.published, p.created_at, p.updated_at,
+            p.author_id, u.username as author_name, {search.search_columns()}
+        FROM {search.FTS_TABLE}
+        JOIN posts p ON p.id = {search.FTS_TABLE}.rowid
+        LEFT JOIN users u ON p.author_id = u.id
+        WHERE {search.FTS_TABLE} MATCH ?
+    '''
+    params = [match]
+    if published_only:
+        query += ' AND p.published = 1'
+    # bm25 不能直接出现在外层 WHERE 中，先在子查询中算出 score
+    query = f'SELECT * FROM ({query})'
+    if after is not None:
+        query += ' WHERE (score, id) > (?, ?)'
+        params.extend(after)
+    query += ' ORDER BY score, id LIMIT ?'
+    rows = await _fetch_all(conn, query, (*params, limit))
+    results = []
+    for row in rows:
+        post = _post_dict(row)
+        post['title_highlight'] = search.highlight_markup(post['title_highlight'])
+        post['snippet'] = search.highlight_markup(post['snippet'])
+        results.append(post)
+    return results
+
+
+def export_query(since: Optional[str] = None) -> Tuple[str, tuple]:
+    """导出全部文章（含未发布）的 SQL 和参数，按 (updated_at, id) 正序"""
+    query = f'''
+        SELECT {EXPORT_COLUMNS}
+        FROM posts p
+        LEFT JOIN users u ON p.author_id = u.id
+    '''
+    params = ()
+    if since is not None:
+        query += ' WHERE p.updated_at >= ?'
+        params = (since,)
+    query += ' ORDER BY p.updated_at, p.id'
+    return query, params
+
+
+async def iter_posts(
+    conn: aiosqlite.Connection, since: Optional[str] = None, batch_size: int = 500
+) -> AsyncIterator[List[dict]]:
+    """用同一个游标分批读取全部文章，每次只持有 batch_size 行
+
+    since 为 updated_at 的下限（包含边界）。WAL 模式下整个读取过程看到同一个快照。
+    查询耗时只计游标执行和取行的时间，不含调用方处理每批数据的时间。
+    """
+    query, params = export_query(since)
+    db_seconds = 0.0
+    total = 0
+    started = time.perf_counter()
+    async with conn.execute(query, params) as cursor:
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            db_seconds += time.perf_counter() - started
+            if not rows:
+                break
+            total += len(rows)
+            yield [_post_dict(row) for row in rows]
+            started = time.perf_counter()
+    _record(query, time.perf_counter() - db_seconds, total)
+
+
+async def get_post(conn: aiosqlite.Connection, post_id: int, published_only: bool = True) -> Optional[dict]:
+    query = f'''
+        SELECT {POST_COLUMNS}, p.content_html, p.excerpt, p.word_count
+        FROM posts p
+        LEFT JOIN users u ON p.author_id = u.id
+        WHERE p.id = ?
+    '''
+    if published_only:
+        query += ' AND p.published = 1'
+    row = await _fetch_one(conn, query, (post_id,))
+    return _post_dict(row) if row else None
+
+
+async def get_posts_by_id(conn: aiosqlite.Connection, post_ids: Iterable[int]) -> Dict[int, dict]:
+    """按 id 一次读取多篇文章（含未发布的），字段与 get_post 相同"""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    query = f'''
+        SELECT {POST_COLUMNS}, p.content_html, p.excerpt, p.word_count
+        FROM posts p
+        LEFT JOIN users u ON p.author_id = u.id
+        WHERE p.id IN ({', '.join('?' * len(post_ids))})
+    '''
+    rows = await _fetch_all(conn, query, post_ids)
+    return {row['id']: _post_dict(row) for row in rows}
+
+
+async def get_post_version(conn: aiosqlite.Connection, post_id: int, published_only: bool = True) -> Optional[dict]:
+    """只读取 (id, updated_at, published)，用于条件请求在加载全文前判断是否未修改"""
+    query = 'SELECT id, updated_at, published FROM posts WHERE id = ?'
+    if published_only:
+        query += ' AND published = 1'
+    row = await _fetch_one(conn, query, (post_id,))
+    return _post_dict(row) if row else None
+
+
+async def create_post(
+    conn: aiosqlite.Connection,
+    title: str,
+    content: str,
+    rendered: RenderedContent,
+    published: bool,
+    author_id: int,
+) -> int:
+    cursor = await _execute(
+        conn,
+        'INSERT INTO posts (title, content, content_html, excerpt, word_count, published, author_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
+        (title, content, *rendered, 1 if published else 0, author_id),
+    )
+    await conn.commit()
+    return cursor.lastrowid
+
+
+async def update_post(
+    conn: aiosqlite.Connection,
+    post_id: int,
+    title: str,
+    content: str,
+    rendered: RenderedContent,
+    published: bool,
+):
+    await _execute(conn, *update_post_statement(post_id, title, content, rendered, published))
+    await conn.commit()
+
+
+def update_post_statement(
+    post_id: int,
+    title: str,
+    content: str,
+    rendered: RenderedContent,
+    published: bool,
+) -> Tuple[str, tuple]:
+    # updated_at 精确到毫秒，同一秒内的多次修改也会得到不同的 ETag
+    return (
+        'UPDATE posts SET title = ?, content = ?, content_html = ?, excerpt = ?, word_count = ?, published = ?, updated_at = strftime("%Y-%m-%d %H:%M:%f", "now") WHERE id = ?',
+        (title, content, *rendered, 1 if published else 0, post_id),
+    )
+
+
+def delete_post_statement(post_id: int) -> Tuple[str, tuple]:
+    return 'DELETE FROM posts WHERE id = ?', (post_id,)
+
+
+async def delete_post(conn: aiosqlite.Connection, post_id: int) -> bool:
+    cursor = await _execute(conn, *delete_post_statement(post_id))
+    await conn.commit()
+    return cursor.rowcount > 0
@@ -1,35 +1,95 @@
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
+from app import async_crud
+from app.cache import user_cache
+from app.db import aio_pool
+from app.passwords import PasswordHasherBusy, password_hasher
 from config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# main.py 的页面/API 路由和 app/api 的路由共用这里的令牌、密码和用户加载逻辑
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+logger = logging.getLogger("blog-app")
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = crud.get_user_by_username(db, username)
-    if not user:
-        return False
-    if not verify_password(password, user.hashed_password):
+class InvalidToken(Exception):
+    """令牌缺失、格式错误、签名无效或已过期"""
+
+
+async def verify_password(plain_password, hashed_password) -> bool:
+    """验证密码，bcrypt 在独立的哈希线程池中执行；哈希队列已满时抛出 PasswordHasherBusy"""
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise
+    except Exception as e:
+        logger.error("密码验证错误: %s", e)
         return False
-    return user
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+
+async def get_password_hash(password) -> str:
+    return await password_hasher.hash(password)
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """从 Authorization 头中取出 Bearer 令牌"""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    return authorization[len("Bearer "):]
+
+
+def decode_access_token(token: str) -> str:
+    """校验令牌并返回其中的用户名"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError as e:
+        raise InvalidToken(str(e)) from e
+    username = payload.get("sub")
+    if username is None:
+        raise InvalidToken("令牌中缺少用户名")
+    return username
+
+
+async def load_user(username: str, conn=None) -> Optional[dict]:
+    """按用户名获取用户记录，优先读取已认证用户缓存
+
+    conn 为空时从只读连接池取连接；调用方已持有连接时传入以复用。
+    """
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    if conn is None:
+        async with aio_pool.connection() as conn:
+            user = await async_crud.get_user_by_username(conn, username)
+    else:
+        user = await async_crud.get_user_by_username(conn, username)
+    if user is not None:
+        user_cache.set(username, user)
+    return user
+
+
+async def authenticate_user(username: str, password: str) -> Optional[dict]:
+    """用户名和密码正确时返回用户记录（不含密码哈希），否则返回 None
+
+    校验密码期间不占用数据库连接。
+    """
+    async with aio_pool.connection() as conn:
+        user = await async_crud.get_user_by_username(conn, username, with_password=True)
+    if user is None:
+        return None
+    if not await verify_password(password, user.pop("hashed_password")):
+        return None
+    return user
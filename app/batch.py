@@ -0,0 +1,72 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+from config import settings
+
+# 管理后台的批量操作：/api/posts:batch 与 /api/users:batch 的请求体为
+#   {"operations": [{"op": "update", "id": 1, "published": false}, {"op": "delete", "id": 2}, ...]}
+# 整批只鉴权一次，在一个写事务中执行（app.services.batch_posts/batch_users），
+# 返回与 operations 顺序相同的逐项结果，每项的 status 与对应单条接口的状态码一致
+OPERATIONS = ("update", "delete")
+POST_FIELDS = ("title", "content", "published")
+USER_FIELDS = ("username", "email", "is_active", "is_admin", "password")
+# 字段值的类型；null 表示不修改该字段
+FIELD_TYPES = {
+    "title": str, "content": str, "published": bool,
+    "username": str, "email": str, "password": str, "is_active": bool, "is_admin": bool,
+}
+TYPE_NAMES = {str: "字符串", bool: "布尔值"}
+
+
+class InvalidBatch(ValueError):
+    """请求体不是 {"operations": [...]}，或操作数超过 BATCH_MAX_OPERATIONS"""
+
+
+class Operation(NamedTuple):
+    index: int
+    op: Optional[str]
+    id: Optional[int]
+    changes: dict
+    # 这一项格式错误的原因；不执行，结果为 400
+    error: Optional[str] = None
+
+
+def _operation(index: int, item, fields: Tuple[str, ...]) -> Operation:
+    if not isinstance(item, dict):
+        return Operation(index, None, None, {}, "每项操作必须是 JSON 对象")
+    op, target = item.get("op"), item.get("id")
+    if op not in OPERATIONS:
+        return Operation(index, None, None, {}, f"op 只能是 {' 或 '.join(OPERATIONS)}")
+    if not isinstance(target, int) or isinstance(target, bool):
+        return Operation(index, op, None, {}, "id 必须是整数")
+    unknown = set(item) - {"op", "id", *fields}
+    if unknown:
+        return Operation(index, op, target, {}, f"不支持的字段: {', '.join(sorted(unknown))}")
+    if op == "delete":
+        return Operation(index, op, target, {})
+    changes = {field: item.get(field) for field in fields}
+    for field, value in changes.items():
+        if value is not None and not isinstance(value, FIELD_TYPES[field]):
+            return Operation(index, op, target, {}, f"{field} 必须是{TYPE_NAMES[FIELD_TYPES[field]]}")
+    return Operation(index, op, target, changes)
+
+
+def parse_operations(data, fields: Tuple[str, ...]) -> List[Operation]:
+    """校验请求体，单项格式错误记录在 Operation.error 中，不影响其他操作"""
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list):
+        raise InvalidBatch('请求体必须是 {"operations": [...]}')
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        raise InvalidBatch(f"每批最多 {settings.BATCH_MAX_OPERATIONS} 项操作")
+    return [_operation(index, item, fields) for index, item in enumerate(operations)]
+
+
+def result(operation: Operation, status: int, detail: Optional[str] = None) -> dict:
+    item = {"index": operation.index, "op": operation.op, "id": operation.id, "status": status}
+    if detail is not None:
+        item["detail"] = detail
+    return item
+
+
+def summary(results: List[dict]) -> dict:
+    applied = sum(1 for item in results if item["status"] == 200)
+    return {"applied": applied, "failed": len(results) - applied, "results": results}
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存
+
+    超过 maxsize 时淘汰最久未使用的条目；条目写入 ttl 秒后过期。给出 maxbytes 时
+    另按 sizeof(value) 的总和限制容量，单个超过 maxbytes 的值不缓存。
+    命中、未命中、淘汰和过期次数可通过 stats() 查看。
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        maxbytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # maxbytes 不为空时记录每个条目的大小
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _remove(self, key: Hashable):
+        del self._data[key]
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def set(self, key: Hashable, value: Any):
+        size = self._sizeof(value) if self.maxbytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.maxbytes is not None:
+                if size > self.maxbytes:
+                    return
+                self._sizes[key] = size
+                self._bytes += size
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self._bytes > self.maxbytes):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                self._remove(key)
+        return default if entry is _MISSING else entry[0]
+
+    def evict_where(self, predicate: Callable[[Any], bool]) -> int:
+        """删除所有值满足 predicate 的条目，返回删除数量"""
+        with self._lock:
+            keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+        if self.maxbytes is not None:
+            stats.update(bytes=self._bytes, maxbytes=self.maxbytes)
+        return stats
+
+
+# 已认证用户缓存：JWT subject（用户名）-> 用户记录 dict（不含密码哈希）
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+def invalidate_user(user_id: int) -> int:
+    """用户被修改或删除后调用，清除该用户的缓存记录"""
+    return user_cache.evict_where(lambda user: user["id"] == user_id)
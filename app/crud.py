@@ -1,94 +0,0 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.future import select
-from . import models, schemas
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# User operations
-def get_user(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.id == user_id).first()
-
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
-
-def get_user_by_username(db: Session, username: str):
-    return db.query(models.User).filter(models.User.username == username).first()
-
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
-
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = pwd_context.hash(user.password)
-    db_user = models.User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-
-def update_user(db: Session, user_id: int, user: schemas.UserUpdate):
-    db_user = get_user(db, user_id)
-    if not db_user:
-        return None
-    
-    update_data = user.dict(exclude_unset=True)
-    if "password" in update_data:
-        update_data["hashed_password"] = pwd_context.hash(update_data["password"])
-        del update_data["password"]
-    
-    for key, value in update_data.items():
-        setattr(db_user, key, value)
-    
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-
-def delete_user(db: Session, user_id: int):
-    db_user = get_user(db, user_id)
-    if db_user:
-        db.delete(db_user)
-        db.commit()
-        return True
-    return False
-
-# Post operations
-def get_post(db: Session, post_id: int):
-    return db.query(models.Post).filter(models.Post.id == post_id).first()
-
-def get_posts(db: Session, skip: int = 0, limit: int = 100, published_only: bool = False):
-    query = db.query(models.Post)
-    if published_only:
-        query = query.filter(models.Post.published == True)
-    return query.order_by(models.Post.created_at.desc()).offset(skip).limit(limit).all()
-
-def create_post(db: Session, post: schemas.PostCreate, user_id: int):
-    db_post = models.Post(**post.dict(), author_id=user_id)
-    db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
-    return db_post
-
-def update_post(db: Session, post_id: int, post: schemas.PostUpdate):
-    db_post = get_post(db, post_id)
-    if not db_post:
-        return None
-    
-    update_data = post.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_post, key, value)
-    
-    db.commit()
-    db.refresh(db_post)
-    return db_post
-
-def delete_post(db: Session, post_id: int):
-    db_post = get_post(db, post_id)
-    if db_post:
-        db.delete(db_post)
-        db.commit()
-        return True
-    return False
\ No newline at end of file
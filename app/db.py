@@ -0,0 +1,360 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+import aiosqlite
+
+from app.profiler import ProfiledConnection
+from config import settings
+
+def connection_pragmas(query_only: bool = False) -> Dict[str, object]:
+    """每个新连接建立后执行的 PRAGMA，取值来自 Settings
+
+    journal_mode 写在数据库文件中，只需在启动时由 configure_journal_mode 设置一次。
+    读连接加上 query_only，误用读连接写入会直接报错而不是和写连接争锁。
+    """
+    pragmas = {
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+    if query_only:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+DEFAULT_PRAGMAS = connection_pragmas()
+
+
+def apply_pragmas(conn, pragmas: Dict[str, object]):
+    """对 sqlite3 连接执行 PRAGMA"""
+    cursor = conn.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+
+def configure_journal_mode(conn: sqlite3.Connection) -> str:
+    """切换到 Settings 中的 journal_mode（默认 WAL），返回实际生效的模式
+
+    WAL 模式下读不阻塞写、写不阻塞读，只有写与写之间互斥。
+    """
+    return conn.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}").fetchone()[0]
+
+
+class PoolTimeoutError(Exception):
+    """在超时时间内未能取得空闲连接"""
+
+
+def sqlite_path(database_url: str) -> str:
+    """从 sqlite:/// 形式的 URL 中取出数据库文件路径"""
+    prefix = "sqlite:///"
+    if database_url.startswith(prefix):
+        return database_url[len(prefix):]
+    return database_url
+
+
+class ConnectionPool:
+    """有界的 SQLite 连接池
+
+    连接按需创建，最多 size 个；归还后放回 LIFO 队列复用。
+    空闲超过 health_check_interval 秒的连接在取出时先执行 SELECT 1 检查。
+    """
+
+    def __init__(
+        self,
+        database: str,
+        size: int = 5,
+        timeout: float = 5.0,
+        pragmas: Optional[Dict[str, object]] = None,
+        health_check_interval: float = 30.0,
+    ):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.health_check_interval = health_check_interval
+
+        self._idle: "queue.LifoQueue[tuple]" = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {
+            "checkouts": 0,
+            "returns": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_check_failures": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.database, check_same_thread=False, factory=ProfiledConnection)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._stats["connections_discarded"] += 1
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            with self._lock:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    def acquire(self) -> sqlite3.Connection:
+        """取出一个连接，池满且无空闲连接时最多等待 timeout 秒"""
+        started = time.perf_counter()
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                    break
+                try:
+                    conn, idle_since = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(f"{self.timeout} 秒内未取得数据库连接")
+
+            if time.monotonic() - idle_since < self.health_check_interval or self._is_healthy(conn):
+                break
+            self._discard(conn)
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += waited
+            if waited > self._stats["wait_time_max"]:
+                self._stats["wait_time_max"] = waited
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """归还连接，未提交的事务会被回滚"""
+        with self._lock:
+            self._stats["returns"] += 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put_nowait((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._stats)
+            data["size"] = self.size
+            data["open"] = self._created
+        data["idle"] = self._idle.qsize()
+        data["in_use"] = data["open"] - data["idle"]
+        return data
+
+    def close(self):
+        """关闭所有空闲连接，之后取出时会重新建立连接"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+class AsyncConnectionPool:
+    """基于 aiosqlite 的有界异步连接池
+
+    每个 aiosqlite 连接在独立线程中执行 SQL，事件循环只等待结果；
+    池大小即同时在执行的查询数上限。取出、健康检查和统计与 ConnectionPool 一致。
+    """
+
+    def __init__(
+        self,
+        database: str,
+        size: int = 5,
+        timeout: float = 5.0,
+        pragmas: Optional[Dict[str, object]] = None,
+        health_check_interval: float = 30.0,
+    ):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.health_check_interval = health_check_interval
+
+        self._idle: "asyncio.LifoQueue[tuple]" = asyncio.LifoQueue(maxsize=size)
+        self._created = 0
+        self._stats = {
+            "checkouts": 0,
+            "returns": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_check_failures": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.database)
+        # 未关闭的连接线程不应阻止进程退出
+        conn.daemon = True
+        await conn
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        self._stats["connections_created"] += 1
+        return conn
+
+    async def _discard(self, conn: aiosqlite.Connection):
+        try:
+            await conn.close()
+        except Exception:
+            pass
+        self._created -= 1
+        self._stats["connections_discarded"] += 1
+
+    async def _is_healthy(self, conn: aiosqlite.Connection) -> bool:
+        try:
+            async with conn.execute("SELECT 1") as cursor:
+                await cursor.fetchone()
+            return True
+        except Exception:
+            self._stats["health_check_failures"] += 1
+            return False
+
+    async def acquire(self) -> aiosqlite.Connection:
+        """取出一个连接，池满且无空闲连接时最多等待 timeout 秒"""
+        started = time.perf_counter()
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                if self._created < self.size:
+                    self._created += 1
+                    try:
+                        conn = await self._connect()
+                    except Exception:
+                        self._created -= 1
+                        raise
+                    break
+                try:
+                    conn, idle_since = await asyncio.wait_for(self._idle.get(), self.timeout)
+                except asyncio.TimeoutError:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(f"{self.timeout} 秒内未取得数据库连接")
+
+            if time.monotonic() - idle_since < self.health_check_interval or await self._is_healthy(conn):
+                break
+            await self._discard(conn)
+
+        waited = time.perf_counter() - started
+        self._stats["checkouts"] += 1
+        self._stats["wait_time_total"] += waited
+        if waited > self._stats["wait_time_max"]:
+            self._stats["wait_time_max"] = waited
+        return conn
+
+    async def release(self, conn: aiosqlite.Connection):
+        """归还连接，未提交的事务会被回滚"""
+        self._stats["returns"] += 1
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except Exception:
+            await self._discard(conn)
+            return
+        self._idle.put_nowait((conn, time.monotonic()))
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    def stats(self) -> dict:
+        data = dict(self._stats)
+        data["size"] = self.size
+        data["open"] = self._created
+        data["idle"] = self._idle.qsize()
+        data["in_use"] = data["open"] - data["idle"]
+        return data
+
+    async def close(self):
+        """关闭所有空闲连接，之后取出时会重新建立连接"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            await self._discard(conn)
+
+
+db_pool = ConnectionPool(
+    sqlite_path(settings.DATABASE_URL),
+    size=settings.DB_POOL_SIZE,
+    timeout=settings.DB_POOL_TIMEOUT,
+)
+
+# 读写分离：多个只读连接并发读取；所有写操作排队使用唯一的写连接，
+# 进程内的写请求在池中等待，而不是在 SQLite 里因为锁冲突而等待或报 database is locked
+aio_pool = AsyncConnectionPool(
+    sqlite_path(settings.DATABASE_URL),
+    size=settings.DB_POOL_SIZE,
+    timeout=settings.DB_POOL_TIMEOUT,
+    pragmas=connection_pragmas(query_only=True),
+)
+
+aio_write_pool = AsyncConnectionPool(
+    sqlite_path(settings.DATABASE_URL),
+    size=1,
+    timeout=settings.DB_WRITE_TIMEOUT,
+)
+
+# 导出在整个下载期间占用一个连接，单独建池，慢速下载不会占满 aio_pool
+export_pool = AsyncConnectionPool(
+    sqlite_path(settings.DATABASE_URL),
+    size=settings.EXPORT_MAX_CONCURRENT,
+    timeout=settings.DB_POOL_TIMEOUT,
+    pragmas=connection_pragmas(query_only=True),
+)
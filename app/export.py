@@ -0,0 +1,61 @@
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from app import async_crud
+from app.db import AsyncConnectionPool
+from app.http_cache import accepts_encoding
+from app.serialization import dumps
+from config import settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+GZIP_LEVEL = 6
+
+
+class InvalidSince(ValueError):
+    """since 不是 ISO 8601 时间"""
+
+
+def parse_since(value: str) -> str:
+    """把 since 规范化为与 posts.updated_at 相同格式的 UTC 文本（YYYY-MM-DD HH:MM:SS[.fff]）
+
+    updated_at 按文本比较，带时区的时间先转换为 UTC，T 分隔符换成空格。
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidSince("since 必须是 ISO 8601 时间，如 2024-05-01 12:00:00")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    text = parsed.strftime("%Y-%m-%d %H:%M:%S")
+    if parsed.microsecond:
+        text += f".{parsed.microsecond // 1000:03d}"
+    return text
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Accept-Encoding 中包含 gzip 且 q 不为 0"""
+    return accepts_encoding(accept_encoding, "gzip")
+
+
+async def stream_posts(
+    pool: AsyncConnectionPool,
+    since: Optional[str] = None,
+    compress: bool = False,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """逐批生成 NDJSON（每行一篇文章），compress 为 True 时边生成边 gzip 压缩
+
+    导出期间占用 pool 中的一个只读连接（main.py 使用单独的 export_pool）；
+    生成器被关闭（客户端断开）时连接随之归还。
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    async with pool.connection() as conn:
+        async for batch in async_crud.iter_posts(conn, since, batch_size or settings.EXPORT_BATCH_SIZE):
+            chunk = b"".join(dumps(post) + b"\n" for post in batch)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,101 @@
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import jinja2
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.cache import TTLCache
+from app.response_cache import AUTHORS_TAG, POSTS_TAG, CacheBackend, post_tag, response_cache
+from config import settings
+
+# 模板片段缓存：已渲染的 HTML 片段放在进程内的 LRU 中（条目数上限 FRAGMENT_CACHE_SIZE），
+# key 带有所依赖标签的当前版本。写操作通过 invalidate_post/invalidate_authors 递增版本号，
+# 旧片段不再被命中，之后被 LRU 淘汰。版本号取自响应缓存的存储（RESPONSE_CACHE_BACKEND=sqlite 时
+# 各 worker 共享），其他 worker 的写操作同样使本进程的片段失效；响应缓存关闭时才使用进程内的版本号
+
+
+class FragmentCache:
+    def __init__(self, maxsize: int, ttl: float, shared: Optional[CacheBackend] = None):
+        self.maxsize = maxsize
+        self._entries = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        # shared 不为空时标签版本号从中读取，由 response_cache.invalidate() 递增
+        self._shared = shared
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def key(self, name: str, tags: Iterable[str]) -> str:
+        tags = tuple(tags)
+        if self._shared is not None and tags:
+            current = self._shared.versions(tags)
+        else:
+            current = {tag: self._versions.get(tag, 0) for tag in tags}
+        versions = ",".join(f"{tag}={current[tag]}" for tag in tags)
+        return f"{name}#{versions}"
+
+    def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key) if self.enabled else None
+
+    def set(self, key: str, html: str) -> str:
+        if self.enabled:
+            self._entries.set(key, html)
+        return html
+
+    def render(self, name: str, tags: Tuple[str, ...], render: Callable[[], str]) -> str:
+        """返回缓存的片段，未命中时调用 render() 渲染并写入"""
+        key = self.key(name, tags)
+        html = self.get(key)
+        if html is None:
+            html = self.set(key, render())
+        return html
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats() if self.enabled else {}
+
+
+fragment_cache = FragmentCache(settings.FRAGMENT_CACHE_SIZE, settings.FRAGMENT_CACHE_TTL, response_cache.backend)
+# 与响应缓存使用同一组失效事件（文章和用户的写操作），响应缓存关闭时同样生效
+response_cache.on_invalidate(fragment_cache.invalidate)
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache key, deps %}...{% endcache %}：按 key 缓存块内渲染结果
+
+    deps 为所依赖的标签列表，如 [post_tag(post.id)]、[POSTS_TAG]；省略时只按 key 缓存，
+    片段中的内容变化时必须体现在 key 中。块内不应包含因访问者而不同的内容。
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.List([]))
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_cache", args), [], [], body).set_lineno(lineno)
+
+    def _cache(self, name, tags, caller) -> Markup:
+        # caller() 在开启自动转义时已经是 Markup，缓存中取出的字符串需要同样标记为安全
+        return Markup(fragment_cache.render(f"template:{name}", tuple(tags), caller))
+
+
+def install_fragment_cache(env: jinja2.Environment):
+    """注册 {% cache %} 标签和模板中声明依赖用的标签名；main.py 的 Jinja2Templates 与预渲染共用"""
+    env.add_extension(FragmentCacheExtension)
+    env.globals.update(post_tag=post_tag, POSTS_TAG=POSTS_TAG, AUTHORS_TAG=AUTHORS_TAG)
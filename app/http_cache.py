@@ -0,0 +1,99 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from starlette.requests import Request
+
+from config import settings
+
+
+def file_digest(*paths: str) -> str:
+    """按文件内容生成短摘要，模板修改后页面的 ETag 随之变化"""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def post_etag(post_id: int, updated_at: str, variant: str = "") -> str:
+    """由 (id, updated_at) 生成强 ETag，variant 区分同一文章的不同表示（JSON、HTML 页面）"""
+    raw = f"{variant}:{post_id}:{updated_at}".encode()
+    return '"' + hashlib.sha1(raw).hexdigest()[:20] + '"'
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """解析 SQLite 中以 UTC 保存的时间戳，精确到秒"""
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.replace(microsecond=0)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较，忽略 W/ 前缀"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    """条件请求是否命中；同时带 If-None-Match 时忽略 If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified <= since
+    return False
+
+
+def cached_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """对缓存中保存的响应头判断条件请求是否命中"""
+    etag = headers.get("etag")
+    if etag is None:
+        return False
+    modified = headers.get("last-modified")
+    return not_modified(request, etag, parsedate_to_datetime(modified) if modified else None)
+
+
+def cache_headers(etag: str, modified: Optional[datetime], public: bool) -> Dict[str, str]:
+    """公开内容允许浏览器和代理缓存 HTTP_CACHE_MAX_AGE 秒，其余每次回源验证"""
+    headers = {"ETag": etag}
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    if public:
+        headers["Cache-Control"] = f"public, max-age={settings.HTTP_CACHE_MAX_AGE}"
+    else:
+        headers["Cache-Control"] = "private, no-cache"
+    return headers
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Accept-Encoding 是否接受 coding（q 不为 0）；未单独列出时按 * 的 q 值"""
+    wildcard = False
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if name not in (coding, "*"):
+            continue
+        params = params.replace(" ", "")
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 1.0
+        if name == coding:
+            return q > 0
+        wildcard = q > 0
+    return wildcard
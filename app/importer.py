@@ -0,0 +1,324 @@
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from concurrent.futures import Executor
+from typing import BinaryIO, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.export import InvalidSince, parse_since
+from app.rendering import render_post_content
+from app.search import FTS_TABLE
+from config import settings
+
+# 批量导入：NDJSON（与 /api/posts/export 的输出格式相同）、带 front matter 的 Markdown，
+# 以及包含这两种文件的 zip 压缩包。每批 executemany 后提交一次，
+# defer_indexes 时先删除 posts 的二级索引和 FTS 插入触发器，全部写入后再重建
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+MAX_REPORTED_ERRORS = 20
+
+INSERT_SQL = (
+    "INSERT INTO posts (title, content, content_html, excerpt, word_count, published, author_id, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, datetime('now')), COALESCE(?, ?, datetime('now')))"
+)
+
+_TRUE = {"true", "yes", "on", "1"}
+_FALSE = {"false", "no", "off", "0"}
+
+
+class InvalidArchive(ValueError):
+    """无法识别的导入文件格式"""
+
+
+class InvalidRecord(ValueError):
+    """单篇文章缺少标题或正文，或字段格式错误；导入时跳过并记录原因"""
+
+
+class ImportedPost(NamedTuple):
+    title: str
+    content: str
+    published: bool
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    author: Optional[str]
+
+
+class ImportResult(NamedTuple):
+    imported: int
+    skipped: int
+    errors: List[str]
+    seconds: float
+
+
+def _timestamp(value) -> Optional[str]:
+    """与导出的 since 参数相同，规范化为 posts.created_at 格式的 UTC 文本"""
+    if value is None or value == "":
+        return None
+    try:
+        return parse_since(str(value))
+    except InvalidSince:
+        raise InvalidRecord(f"时间格式错误: {value}")
+
+
+def _boolean(value, default: bool = True) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise InvalidRecord(f"无法识别的布尔值: {value}")
+
+
+def _text(fields: dict, name: str) -> Optional[str]:
+    value = fields.get(name)
+    if value is not None and not isinstance(value, str):
+        raise InvalidRecord(f"{name} 必须是字符串")
+    return value
+
+
+def _post(fields: dict) -> ImportedPost:
+    title = (_text(fields, "title") or "").strip()
+    content = _text(fields, "content") or ""
+    if not title:
+        raise InvalidRecord("缺少标题")
+    if not content.strip():
+        raise InvalidRecord("缺少正文")
+    if "draft" in fields:
+        published = not _boolean(fields["draft"], default=False)
+    else:
+        published = _boolean(fields.get("published"))
+    return ImportedPost(
+        title=title,
+        content=content,
+        published=published,
+        created_at=_timestamp(fields.get("created_at") or fields.get("date")),
+        updated_at=_timestamp(fields.get("updated_at") or fields.get("updated") or fields.get("lastmod")),
+        author=_text(fields, "author_name") or _text(fields, "author"),
+    )
+
+
+def _front_matter_value(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_markdown(text: str, name: str = "") -> ImportedPost:
+    """解析 Markdown 文件，开头 --- 之间为 front matter，每行一个 key: value
+
+    支持 title、date/created_at、updated/updated_at/lastmod、published 或 draft、author；
+    没有 title 时取正文第一个一级标题，再没有时取文件名。
+    """
+    text = text.lstrip("\ufeff")
+    fields = {}
+    body = text
+    lines = text.splitlines(keepends=True)
+    if lines and lines[0].strip() == "---":
+        for index, line in enumerate(lines[1:], start=1):
+            if line.strip() in ("---", "..."):
+                body = "".join(lines[index + 1:])
+                break
+            key, sep, value = line.partition(":")
+            if sep and key.strip() and not key.startswith((" ", "\t", "#")):
+                fields[key.strip().lower()] = _front_matter_value(value)
+        else:
+            raise InvalidRecord("front matter 缺少结束的 ---")
+
+    body = body.lstrip("\n")
+    if not fields.get("title"):
+        first_line = body.split("\n", 1)[0]
+        if first_line.startswith("# "):
+            fields["title"] = first_line[2:].strip()
+            body = body[len(first_line):].lstrip("\n")
+        elif name:
+            fields["title"] = os.path.splitext(os.path.basename(name))[0]
+    fields["content"] = body
+    return _post(fields)
+
+
+def parse_ndjson(lines: Iterable[bytes], name: str = "") -> Iterator[Tuple[str, object]]:
+    """逐行解析 NDJSON，产出 (位置, ImportedPost 或 InvalidRecord)"""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        location = f"{name}:{number}" if name else f"第 {number} 行"
+        try:
+            fields = json.loads(line)
+            if not isinstance(fields, dict):
+                raise InvalidRecord("每行必须是 JSON 对象")
+            yield location, _post(fields)
+        except (ValueError, TypeError) as e:
+            yield location, e if isinstance(e, InvalidRecord) else InvalidRecord(f"JSON 格式错误: {e}")
+
+
+def filename_kind(name: str) -> Optional[str]:
+    lowered = name.lower()
+    if lowered.endswith(NDJSON_SUFFIXES):
+        return "ndjson"
+    if lowered.endswith(MARKDOWN_SUFFIXES):
+        return "markdown"
+    if lowered.endswith(".zip"):
+        return "zip"
+    return None
+
+
+def iter_archive(file: BinaryIO, kind: str, name: str = "") -> Iterator[Tuple[str, object]]:
+    """按格式（ndjson、markdown 或 zip）读取导入文件，产出 (位置, ImportedPost 或 InvalidRecord)
+
+    NDJSON 逐行读取，不把整个文件读入内存；zip 中按文件名顺序处理 .md/.ndjson，忽略其他文件。
+    """
+    if kind == "ndjson":
+        yield from parse_ndjson(file, name)
+    elif kind == "markdown":
+        try:
+            yield name or "markdown", parse_markdown(file.read().decode("utf-8"), name)
+        except (InvalidRecord, UnicodeDecodeError) as e:
+            yield name or "markdown", e if isinstance(e, InvalidRecord) else InvalidRecord("不是 UTF-8 文本")
+    elif kind == "zip":
+        try:
+            archive = zipfile.ZipFile(file)
+        except zipfile.BadZipFile:
+            raise InvalidArchive("不是有效的 zip 文件")
+        with archive:
+            for info in sorted(archive.infolist(), key=lambda info: info.filename):
+                member_kind = None if info.is_dir() else filename_kind(info.filename)
+                if member_kind not in ("ndjson", "markdown"):
+                    continue
+                with archive.open(info) as member:
+                    yield from iter_archive(member, member_kind, info.filename)
+    else:
+        raise InvalidArchive(f"不支持的导入格式: {kind}")
+
+
+def archive_kind(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """根据文件名后缀或 Content-Type 判断导入格式"""
+    kind = filename_kind(filename) if filename else None
+    if kind:
+        return kind
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("application/x-ndjson", "application/jsonl", "application/json-seq"):
+        return "ndjson"
+    if media_type in ("text/markdown", "text/x-markdown"):
+        return "markdown"
+    if media_type in ("application/zip", "application/x-zip-compressed"):
+        return "zip"
+    raise InvalidArchive("无法识别导入格式，请使用 .ndjson、.md 或 .zip")
+
+
+def _suspend_indexes(conn: sqlite3.Connection) -> List[str]:
+    """删除 posts 的二级索引和 FTS 插入触发器，返回用于重建的 DDL"""
+    rows = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE tbl_name = 'posts' AND sql IS NOT NULL AND (type = 'index' OR name = 'posts_fts_ai')"
+    ).fetchall()
+    for kind, name, _ in rows:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    return [sql for _, _, sql in rows]
+
+
+def _restore_indexes(conn: sqlite3.Connection, ddl: List[str], first_id: int):
+    """重建被删除的索引，并把 first_id 之后写入的文章补进全文索引"""
+    for sql in ddl:
+        conn.execute(sql)
+    if any("posts_fts_ai" in sql for sql in ddl):
+        conn.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, content) SELECT id, title, content FROM posts WHERE id >= ?",
+            (first_id,),
+        )
+
+
+def import_posts(
+    conn: sqlite3.Connection,
+    records: Iterable[Tuple[str, object]],
+    author_id: int,
+    batch_size: Optional[int] = None,
+    defer_indexes: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+    executor: Optional[Executor] = None,
+    write_batch: Optional[Callable[[List[tuple]], None]] = None,
+) -> ImportResult:
+    """把 iter_archive 产出的文章分批写入 posts，返回导入和跳过的数量
+
+    每批渲染 Markdown 后用一次 executemany 写入并提交，其他写操作可以在批次之间执行。
+    author 为已存在的用户名时作为作者，否则使用 author_id。
+    defer_indexes 在导入期间删除二级索引和 FTS 插入触发器，结束时（包括出错时）重建；
+    导入期间其他连接的写入不会同步到全文索引，只应在没有其他写入时使用，例如停机后的命令行导入。
+    progress(imported, skipped) 在每批提交后调用。
+    Markdown 渲染占导入的大部分时间，传入 ProcessPoolExecutor 时每批在多个进程中并行渲染。
+    write_batch(rows) 不为空时由它在一个事务中写入 INSERT_SQL 的每批参数，conn 只用于读取，
+    服务运行期间经由唯一的写连接写入（见 app.services.import_posts）。
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    started = time.perf_counter()
+    imported = skipped = 0
+    errors: List[str] = []
+    authors = {username: user_id for user_id, username in conn.execute("SELECT id, username FROM users")}
+
+    isolation_level = conn.isolation_level
+    # 与迁移相同，由这里显式控制事务
+    conn.isolation_level = None
+    suspended: List[str] = []
+    first_id = None
+    try:
+        if defer_indexes:
+            conn.execute("BEGIN IMMEDIATE")
+            first_id = (conn.execute("SELECT COALESCE(MAX(id), 0) FROM posts").fetchone()[0]) + 1
+            suspended = _suspend_indexes(conn)
+            conn.execute("COMMIT")
+
+        batch: List[ImportedPost] = []
+
+        def flush():
+            nonlocal imported
+            contents = [record.content for record in batch]
+            if executor is not None:
+                rendered = executor.map(render_post_content, contents, chunksize=max(1, len(batch) // 32))
+            else:
+                rendered = map(render_post_content, contents)
+            rows = [
+                (
+                    record.title, record.content, *content, 1 if record.published else 0,
+                    authors.get(record.author, author_id), record.created_at, record.updated_at, record.created_at,
+                )
+                for record, content in zip(batch, rendered)
+            ]
+            if write_batch is not None:
+                write_batch(rows)
+            else:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(INSERT_SQL, rows)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            imported += len(rows)
+            batch.clear()
+            if progress is not None:
+                progress(imported, skipped)
+
+        for location, record in records:
+            if isinstance(record, Exception):
+                skipped += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"{location}: {record}")
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        if suspended:
+            conn.execute("BEGIN IMMEDIATE")
+            _restore_indexes(conn, suspended, first_id)
+            conn.execute("COMMIT")
+        conn.isolation_level = isolation_level
+
+    return ImportResult(imported, skipped, errors, time.perf_counter() - started)
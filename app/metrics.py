@@ -0,0 +1,205 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 请求耗时直方图的桶上界（秒），最后一个桶为 +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# 未匹配到路由的请求（静态文件、404）统一记在这个标签下，避免按原始 URL 产生无限多的序列
+OTHER_ROUTE = "<other>"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 当前请求的数据库统计 [查询次数, 累计耗时]，由 MetricsMiddleware 设置
+_request_db: ContextVar[Optional[list]] = ContextVar("request_db", default=None)
+
+
+class Histogram:
+    """固定桶的直方图，桶在创建时分配，observe 只做一次二分查找和整数加法"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶内线性插值估算分位数，落在 +Inf 桶时返回最大的有限上界"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            if index < len(self.bounds):
+                lower = self.bounds[index]
+        return self.bounds[-1]
+
+
+class RouteMetrics:
+    __slots__ = ("responses", "latency", "db_queries", "db_seconds")
+
+    def __init__(self):
+        self.responses: Dict[Tuple[str, int], int] = {}
+        self.latency = Histogram()
+        self.db_queries = Histogram(bounds=(0, 1, 2, 3, 5, 10, 20, 50))
+        self.db_seconds = Histogram()
+
+
+class Metrics:
+    """按路由模板（如 /api/posts/{post_id}）汇总请求数、状态码、耗时、并发数和数据库查询
+
+    所有更新都发生在事件循环线程中，计数器是普通的 int，不需要加锁。
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, RouteMetrics] = {}
+        # 路由在请求处理过程中才确定，并发数只按全局统计
+        self.in_flight = 0
+        self.collectors: List[Callable[[], Dict[str, float]]] = []
+        self.histograms: List[Tuple[str, str, Histogram]] = []
+
+    def route(self, template: str) -> RouteMetrics:
+        metrics = self.routes.get(template)
+        if metrics is None:
+            metrics = self.routes[template] = RouteMetrics()
+        return metrics
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]) -> Callable[[], Dict[str, float]]:
+        """collector 返回 {指标名: 数值}，在生成 /metrics 时调用，用于连接池、缓存等的当前状态"""
+        self.collectors.append(collector)
+        return collector
+
+    def register_histogram(self, name: str, help_text: str, histogram: Histogram) -> Histogram:
+        """导出由其他组件更新的直方图（如密码哈希耗时），生成 /metrics 时读取当前值"""
+        self.histograms.append((name, help_text, histogram))
+        return histogram
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式"""
+        lines = [
+            "# HELP blog_http_requests_total Requests by route template, method and status.",
+            "# TYPE blog_http_requests_total counter",
+        ]
+        routes = sorted(self.routes.items())
+        for template, metrics in routes:
+            for (method, status), count in sorted(metrics.responses.items()):
+                lines.append(
+                    f'blog_http_requests_total{{route="{_escape(template)}",method="{method}",status="{status}"}} {count}'
+                )
+
+        lines += [
+            "# HELP blog_http_requests_in_flight Requests currently being handled.",
+            "# TYPE blog_http_requests_in_flight gauge",
+            f"blog_http_requests_in_flight {self.in_flight}",
+        ]
+
+        for name, attribute, help_text in (
+            ("blog_http_request_duration_seconds", "latency", "Request latency."),
+            ("blog_db_queries_per_request", "db_queries", "Database queries issued per request."),
+            ("blog_db_seconds_per_request", "db_seconds", "Time spent in database queries per request."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for template, metrics in routes:
+                lines += _histogram_lines(name, f'route="{_escape(template)}"', getattr(metrics, attribute))
+
+        lines += [
+            "# HELP blog_http_request_duration_quantile_seconds Latency quantiles estimated from the histogram.",
+            "# TYPE blog_http_request_duration_quantile_seconds gauge",
+        ]
+        for template, metrics in routes:
+            for q in QUANTILES:
+                lines.append(
+                    f'blog_http_request_duration_quantile_seconds{{route="{_escape(template)}",quantile="{q}"}} '
+                    f"{metrics.latency.quantile(q):.6f}"
+                )
+
+        for name, help_text, histogram in self.histograms:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            lines += _histogram_lines(name, "", histogram)
+
+        for collector in self.collectors:
+            for name, value in collector().items():
+                lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    # labels 为空时（不分路由的直方图）只有 le 标签
+    prefix = f"{labels}," if labels else ""
+    suffix = f"{{{labels}}}" if labels else ""
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+metrics = Metrics()
+
+
+def record_query(seconds: float):
+    """async_crud 每执行一条查询调用一次，计入当前请求"""
+    stats = _request_db.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += seconds
+
+
+class MetricsMiddleware:
+    """纯 ASGI 中间件；路由匹配后 FastAPI 会把路由对象写入 scope["route"]，由此取得路由模板"""
+
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        db_stats = [0, 0.0]
+        token = _request_db.set(db_stats)
+        self.registry.in_flight += 1
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.registry.in_flight -= 1
+            _request_db.reset(token)
+            route = scope.get("route")
+            route_metrics = self.registry.route(getattr(route, "path", OTHER_ROUTE))
+            key = (scope["method"], status)
+            route_metrics.responses[key] = route_metrics.responses.get(key, 0) + 1
+            route_metrics.latency.observe(time.perf_counter() - started)
+            route_metrics.db_queries.observe(db_stats[0])
+            route_metrics.db_seconds.observe(db_stats[1])
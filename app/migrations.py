@@ -0,0 +1,143 @@
+import sqlite3
+import time
+from typing import Callable, List, NamedTuple
+
+from config import settings
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _initial_schema(conn: sqlite3.Connection):
+    # 引入迁移之前创建的数据库已有这两张表，user_version 仍为 0，因此保留 IF NOT EXISTS
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        hashed_password TEXT NOT NULL,
+        is_active INTEGER DEFAULT 1,
+        is_admin INTEGER DEFAULT 0
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS posts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        published INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        author_id INTEGER NOT NULL,
+        FOREIGN KEY (author_id) REFERENCES users (id)
+    )
+    ''')
+
+
+def _rendered_columns(conn: sqlite3.Connection):
+    # 渲染后的 HTML、摘要和字数；旧版本的启动代码可能已经加过其中一部分
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(posts)')}
+    for name, ddl in (
+        ('content_html', 'TEXT'),
+        ('excerpt', 'TEXT'),
+        ('word_count', 'INTEGER DEFAULT 0'),
+    ):
+        if name not in columns:
+            conn.execute(f'ALTER TABLE posts ADD COLUMN {name} {ddl}')
+
+
+def _post_indexes(conn: sqlite3.Connection):
+    # 列表页：published = 1 过滤后按 (created_at, id) 倒序，管理员视图不过滤 published
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_published_created_id ON posts (published, created_at DESC, id DESC)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_created_id ON posts (created_at DESC, id DESC)')
+    # 按作者查询文章，以及删除用户时的外键检查
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_author_created_id ON posts (author_id, created_at DESC, id DESC)')
+
+
+def _post_updated_index(conn: sqlite3.Connection):
+    # 导出按 (updated_at, id) 顺序读取，增量导出按 updated_at 下限过滤
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_updated_id ON posts (updated_at, id)')
+
+
+# 按版本号顺序执行，已发布的迁移不要修改，只能追加
+MIGRATIONS: List[Migration] = [
+    Migration(1, "users 与 posts 表", _initial_schema),
+    Migration(2, "posts 渲染结果列", _rendered_columns),
+    Migration(3, "posts 列表与作者索引", _post_indexes),
+    Migration(4, "posts 导出索引", _post_updated_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+class MigrationError(Exception):
+    """数据库版本高于代码中最新的迁移，或迁移执行失败"""
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Migration]:
+    current = schema_version(conn)
+    if current > LATEST_VERSION:
+        raise MigrationError(f"数据库版本 {current} 高于代码支持的版本 {LATEST_VERSION}")
+    return [migration for migration in MIGRATIONS if migration.version > current]
+
+
+def migrate(conn: sqlite3.Connection) -> List[Migration]:
+    """依次执行未应用的迁移，返回本次执行的迁移
+
+    每个迁移与 user_version 的更新在同一个事务中提交，失败时回滚，
+    数据库停留在上一个版本。有迁移执行时最后运行 PRAGMA optimize 更新统计信息。
+    """
+    pending = pending_migrations(conn)
+    if not pending:
+        return []
+
+    isolation_level = conn.isolation_level
+    # 由迁移自己控制事务，避免 sqlite3 模块隐式提交 DDL
+    conn.isolation_level = None
+    try:
+        for migration in pending:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                migration.apply(conn)
+                conn.execute(f'PRAGMA user_version = {migration.version}')
+                conn.execute('COMMIT')
+            except Exception as e:
+                conn.execute('ROLLBACK')
+                raise MigrationError(f"迁移 {migration.version}（{migration.description}）失败: {e}") from e
+        conn.execute('PRAGMA optimize')
+    finally:
+        conn.isolation_level = isolation_level
+    return pending
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.db import sqlite_path
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ("status", "upgrade"):
+        print("使用方法: python -m app.migrations status|upgrade [数据库文件]")
+        sys.exit(1)
+
+    path = sys.argv[2] if len(sys.argv) > 2 else sqlite_path(settings.DATABASE_URL)
+    conn = sqlite3.connect(path)
+    try:
+        if sys.argv[1] == "status":
+            print(f"当前版本 {schema_version(conn)}，最新版本 {LATEST_VERSION}")
+            for migration in pending_migrations(conn):
+                print(f"  待执行 {migration.version}: {migration.description}")
+        else:
+            started = time.perf_counter()
+            applied = migrate(conn)
+            for migration in applied:
+                print(f"已执行 {migration.version}: {migration.description}")
+            print(f"当前版本 {schema_version(conn)}，耗时 {time.perf_counter() - started:.2f}s")
+    finally:
+        conn.close()
@@ -0,0 +1,58 @@
+import sqlite3
+from typing import List, Optional
+
+import jinja2
+from markupsafe import Markup
+
+from app import async_crud
+from app.db import aio_pool
+from app.fragment_cache import fragment_cache
+from app.pagination import decode_post_cursor, post_cursor
+from app.response_cache import AUTHORS_TAG, POSTS_TAG
+
+# 首页和 /blog 的文章列表在服务端渲染：一次查询，页面返回时内容已经完整，
+# 不再由浏览器加载页面后再请求 /api/posts。渲染好的列表片段放在片段缓存（app.fragment_cache）中，
+# 任何文章变化都会递增 POSTS_TAG，片段随之失效
+POST_CARDS_TEMPLATE = "blog/_post_cards.html"
+HOME_POST_COUNT = 3
+
+
+def render_post_cards(
+    environment: jinja2.Environment,
+    posts: List[dict],
+    next_cursor: Optional[str] = None,
+    heading: str = "h2",
+) -> Markup:
+    """渲染文章卡片列表；next_cursor 不为空时附带“更早的文章”链接"""
+    template = environment.get_template(POST_CARDS_TEMPLATE)
+    return Markup(template.render(posts=posts, next_cursor=next_cursor, heading=heading))
+
+
+def fetch_post_cards(conn: sqlite3.Connection, limit: int) -> List[sqlite3.Row]:
+    """同步连接读取第一页已发布文章的摘要，供预渲染使用"""
+    return conn.execute(*async_crud.posts_query(limit, published_only=True, summary=True)).fetchall()
+
+
+async def post_list(
+    environment: jinja2.Environment,
+    limit: int,
+    cursor: Optional[str] = None,
+    heading: str = "h2",
+    paginate: bool = True,
+) -> Markup:
+    """匿名访问者看到的文章列表片段，命中缓存时不访问数据库
+
+    paginate 为 False 时（首页只显示最新几篇）不附带翻页链接。cursor 无效时抛出 InvalidCursor。
+    """
+    before = decode_post_cursor(cursor) if cursor else None
+    name = f"post-list:{limit}:{heading}:{int(paginate)}:{cursor or ''}"
+    # 查询在片段之外，不能用模板中的 {% cache %}；同一个缓存，命中时连同查询一起跳过
+    cache_key = fragment_cache.key(name, (POSTS_TAG, AUTHORS_TAG))
+    html = fragment_cache.get(cache_key)
+    if html is not None:
+        return Markup(html)
+
+    async with aio_pool.connection() as conn:
+        posts = await async_crud.get_posts(conn, limit=limit, before=before, summary=True)
+    next_cursor = post_cursor(posts, limit) if paginate else None
+    return Markup(fragment_cache.set(cache_key, render_post_cards(environment, posts, next_cursor, heading)))
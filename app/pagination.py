@@ -0,0 +1,91 @@
+import base64
+import json
+import sqlite3
+from typing import Any, List, Optional, Tuple
+
+from config import settings
+
+# 列表接口在响应头中返回下一页游标，响应体保持为数组
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """游标无法解码或格式不符"""
+
+
+def page_limit(limit: int) -> int:
+    """把列表接口的 limit 限制在 1..MAX_PAGE_SIZE 之间；SQLite 的负数 LIMIT 表示不限制"""
+    return max(1, min(limit, settings.MAX_PAGE_SIZE))
+
+
+def encode_cursor(*values: Any) -> str:
+    """把排序键编码为不透明的游标字符串"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("无效的分页游标") from e
+    if not isinstance(values, list):
+        raise InvalidCursor("无效的分页游标")
+    return values
+
+
+def decode_post_cursor(cursor: str) -> Tuple[str, int]:
+    """返回 (created_at, id)"""
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not isinstance(values[0], str) or not isinstance(values[1], int):
+        raise InvalidCursor("无效的分页游标")
+    return values[0], values[1]
+
+
+def decode_user_cursor(cursor: str) -> int:
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], int):
+        raise InvalidCursor("无效的分页游标")
+    return values[0]
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """返回 (score, id)"""
+    values = decode_cursor(cursor)
+    if (
+        len(values) != 2
+        or not isinstance(values[0], (int, float))
+        or isinstance(values[0], bool)
+        or not isinstance(values[1], int)
+    ):
+        raise InvalidCursor("无效的分页游标")
+    return float(values[0]), values[1]
+
+
+def post_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """文章按 (created_at, id) 倒序，取满一页时返回下一页游标"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(_get(last, "created_at"), _get(last, "id"))
+
+
+def user_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """用户按 id 正序，取满一页时返回下一页游标"""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(_get(rows[-1], "id"))
+
+
+def search_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """搜索结果按 (score, id) 正序，score 越小越相关"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(_get(last, "score"), _get(last, "id"))
+
+
+def _get(row: Any, key: str) -> Any:
+    # dict（async_crud）、sqlite3.Row（预渲染的同步查询）按键取值，其他对象按属性
+    return row[key] if isinstance(row, (dict, sqlite3.Row)) else getattr(row, key)
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from app.metrics import Histogram
+from config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasherBusy(Exception):
+    """哈希任务排队已满，调用方应返回 429"""
+
+
+def _timed_hash(password: str):
+    started = time.monotonic()
+    hashed = pwd_context.hash(password)
+    return hashed, started, time.monotonic()
+
+
+def _timed_verify(password: str, hashed_password: str):
+    started = time.monotonic()
+    try:
+        ok = pwd_context.verify(password, hashed_password)
+    except (ValueError, TypeError):
+        # 哈希格式无法识别时视为验证失败
+        ok = False
+    return ok, started, time.monotonic()
+
+
+class PasswordHasher:
+    """在独立的线程池或进程池中执行 bcrypt，避免占用事件循环线程
+
+    同时在执行和排队的任务数超过 workers + max_queue 时直接拒绝（PasswordHasherBusy），
+    而不是让请求无限排队。time.monotonic() 在 Linux 上跨进程可比，
+    因此进程池模式下也能统计排队等待时间。hash_time 与 queue_wait 直方图由 /metrics 导出。
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 32, executor: str = "thread"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor_type = executor
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "hash_time_total": 0.0,
+            "hash_time_max": 0.0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+        }
+        self.hash_time = Histogram()
+        self.queue_wait = Histogram()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_type == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="password-hasher"
+                        )
+        return self._executor
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise PasswordHasherBusy("密码哈希任务过多，请稍后重试")
+            self._pending += 1
+
+    def _record(self, submitted: float, started: float, finished: float):
+        hash_time = finished - started
+        queue_wait = max(started - submitted, 0.0)
+        with self._lock:
+            self._pending -= 1
+            self._stats["completed"] += 1
+            self._stats["hash_time_total"] += hash_time
+            self._stats["hash_time_max"] = max(self._stats["hash_time_max"], hash_time)
+            self._stats["queue_wait_total"] += queue_wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], queue_wait)
+            self.hash_time.observe(hash_time)
+            self.queue_wait.observe(queue_wait)
+
+    async def _run(self, fn, *args):
+        self._reserve()
+        submitted = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        self._record(submitted, started, finished)
+        return result
+
+    def _run_sync(self, fn, *args):
+        self._reserve()
+        submitted = time.monotonic()
+        try:
+            result, started, finished = self._get_executor().submit(fn, *args).result()
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        self._record(submitted, started, finished)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_timed_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(_timed_verify, password, hashed_password)
+
+    def hash_sync(self, password: str) -> str:
+        """供命令行脚本等同步代码使用，同样受并发上限约束"""
+        return self._run_sync(_timed_hash, password)
+
+    def verify_sync(self, password: str, hashed_password: str) -> bool:
+        return self._run_sync(_timed_verify, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._stats)
+            data["pending"] = self._pending
+        completed = data["completed"] or 1
+        data["hash_time_avg"] = data["hash_time_total"] / completed
+        data["queue_wait_avg"] = data["queue_wait_total"] / completed
+        return data
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+)
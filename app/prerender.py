@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import jinja2
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+from app.assets import build_id, install_template_globals
+from app.fragment_cache import install_fragment_cache
+from app.http_cache import file_digest, not_modified
+from app.pages import HOME_POST_COUNT, POST_CARDS_TEMPLATE, fetch_post_cards, render_post_cards
+from app.pagination import post_cursor
+from config import settings
+
+# 把匿名访问者看到的公开页面（首页、文章列表、已发布文章）写成静态 HTML：
+#   index.html、blog/index.html、blog/<id>/index.html
+# 目录结构与 URL 对应，可以由 nginx 的 try_files $uri/index.html 直接发送；
+# 设置 PRERENDER_DIR 后应用自身也优先返回这些文件，文件不存在时回退到动态渲染
+TEMPLATE_DIR = "templates"
+MANIFEST = "manifest.json"
+# 静态页面与渲染它们的模板，其中的文章列表依赖所有文章；文章页另外依赖 blog/post.html
+STATIC_PAGES = {"/": "index.html", "/blog": "blog/post_list.html"}
+POST_TEMPLATE = "blog/post.html"
+PAGE_TEMPLATES = ("base.html", *STATIC_PAGES.values(), POST_CARDS_TEMPLATE, POST_TEMPLATE)
+# 每个进程任务渲染的文章数
+CHUNK_SIZE = 200
+
+_environment: Optional[jinja2.Environment] = None
+
+
+class PrerenderResult(NamedTuple):
+    rendered: int
+    removed: int
+    unchanged: int
+    seconds: float
+
+
+def page_environment() -> jinja2.Environment:
+    """每个进程创建一次模板环境，与 Jinja2Templates 相同开启自动转义"""
+    global _environment
+    if _environment is None:
+        _environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(TEMPLATE_DIR), autoescape=True, auto_reload=settings.TEMPLATE_AUTO_RELOAD,
+        )
+        install_template_globals(_environment)
+        install_fragment_cache(_environment)
+    return _environment
+
+
+def page_path(output_dir: str, url_path: str) -> str:
+    """URL 对应的文件：/ -> index.html，/blog/1 -> blog/1/index.html"""
+    parts = [part for part in url_path.split("/") if part]
+    return os.path.join(output_dir, *parts, "index.html")
+
+
+def _write(path: str, html: str):
+    # 先写临时文件再替换，正在发送的旧文件不会被截断
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp, path)
+
+
+def _render_posts(output_dir: str, posts: List[dict]) -> int:
+    """在工作进程中渲染一组文章页并写入文件"""
+    template = page_environment().get_template(POST_TEMPLATE)
+    for post in posts:
+        html = template.render(request=None, post_id=post["id"], post=post)
+        _write(page_path(output_dir, f"/blog/{post['id']}"), html)
+    return len(posts)
+
+
+def _render_static_pages(conn: sqlite3.Connection, output_dir: str):
+    """首页和文章列表第一页，与 main.py 的 home、blog_posts 渲染相同的内容"""
+    environment = page_environment()
+    posts = fetch_post_cards(conn, settings.BLOG_PAGE_SIZE)
+    context = {
+        "/": {"latest_posts": render_post_cards(environment, posts[:HOME_POST_COUNT], heading="h3")},
+        "/blog": {"posts": render_post_cards(environment, posts, post_cursor(posts, settings.BLOG_PAGE_SIZE))},
+    }
+    for url_path, name in STATIC_PAGES.items():
+        html = environment.get_template(name).render(request=None, **context[url_path])
+        _write(page_path(output_dir, url_path), html)
+
+
+def _load_manifest(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(output_dir: str, manifest: dict):
+    _write(os.path.join(output_dir, MANIFEST), json.dumps(manifest, ensure_ascii=False))
+
+
+def _chunks(items: List[int], size: int) -> Iterable[List[int]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fetch_posts(conn: sqlite3.Connection, ids: List[int]) -> List[dict]:
+    # 与 async_crud.get_post 相同的字段
+    placeholders = ", ".join("?" * len(ids))
+    rows = conn.execute(
+        f'''
+        SELECT p.id, p.title, p.content, p.published, p.created_at, p.updated_at, p.author_id,
+               u.username as author_name, p.content_html, p.excerpt, p.word_count
+        FROM posts p
+        LEFT JOIN users u ON p.author_id = u.id
+        WHERE p.id IN ({placeholders})
+        ''',
+        ids,
+    ).fetchall()
+    posts = []
+    for row in rows:
+        post = dict(zip(row.keys(), row))
+        post["published"] = bool(post["published"])
+        posts.append(post)
+    return posts
+
+
+def prerender(
+    conn: sqlite3.Connection,
+    output_dir: str,
+    workers: int = 1,
+    full: bool = False,
+) -> PrerenderResult:
+    """生成或增量更新预渲染目录
+
+    manifest.json 记录每篇文章渲染时的 updated_at、作者用户名和模板摘要：只重新渲染两者之一变化、
+    文件缺失的文章，模板变化或 full 时全部重新渲染；删除已删除或取消发布的文章页。
+    文章页按 CHUNK_SIZE 分组，workers 大于 1 时在进程池中并行渲染。
+    """
+    started = time.perf_counter()
+    conn.row_factory = sqlite3.Row
+    manifest = {} if full else _load_manifest(output_dir)
+    # 静态资源重新构建后页面中的资源 URL 变化，同样需要全部重新渲染
+    digest = file_digest(*(os.path.join(TEMPLATE_DIR, name) for name in PAGE_TEMPLATES)) + build_id()
+    if manifest.get("templates") != digest:
+        manifest = {}
+    rendered_versions: Dict[str, list] = manifest.get("posts", {})
+
+    # 文章页显示作者用户名，作者改名或被删除后同样需要重新渲染
+    published = {
+        str(post_id): [updated_at, author_name]
+        for post_id, updated_at, author_name in conn.execute(
+            "SELECT p.id, p.updated_at, u.username FROM posts p "
+            "LEFT JOIN users u ON p.author_id = u.id WHERE p.published = 1"
+        )
+    }
+    stale = [
+        int(post_id) for post_id, version in published.items()
+        if rendered_versions.get(post_id) != version
+        or not os.path.exists(page_path(output_dir, f"/blog/{post_id}"))
+    ]
+
+    removed = 0
+    for post_id in set(rendered_versions) - set(published):
+        # 服务端修改文章时可能已经删除了文件
+        path = page_path(output_dir, f"/blog/{post_id}")
+        if os.path.exists(path):
+            os.remove(path)
+        removed += 1
+
+    _render_static_pages(conn, output_dir)
+    rendered = 0
+    batches = (_fetch_posts(conn, ids) for ids in _chunks(stale, CHUNK_SIZE))
+    if workers > 1 and len(stale) > CHUNK_SIZE:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 主进程读取下一组文章的同时，工作进程渲染上一组
+            futures = [executor.submit(_render_posts, output_dir, posts) for posts in batches]
+            rendered = sum(future.result() for future in futures)
+    else:
+        rendered = sum(_render_posts(output_dir, posts) for posts in batches)
+
+    # 记录开始时读取的版本；渲染期间被修改的文章版本不同，下次运行时会再渲染
+    _save_manifest(output_dir, {"templates": digest, "posts": published})
+    return PrerenderResult(rendered, removed, len(published) - len(stale), time.perf_counter() - started)
+
+
+def discard_post(post_id: Optional[int] = None):
+    """文章被创建、修改、取消发布或删除后删除受影响的预渲染页面，之后的请求回退到动态渲染
+
+    首页和文章列表包含最新的文章，总是删除；post_id 不为空时同时删除该文章页。
+    """
+    discard_posts([] if post_id is None else [post_id])
+
+
+def discard_posts(post_ids: Iterable[int]):
+    """删除首页、文章列表和 post_ids 的预渲染页面，用于批量修改和作者改名、被删除"""
+    if not settings.PRERENDER_DIR:
+        return
+    url_paths = [*STATIC_PAGES, *(f"/blog/{post_id}" for post_id in post_ids)]
+    for url_path in url_paths:
+        try:
+            os.remove(page_path(settings.PRERENDER_DIR, url_path))
+        except FileNotFoundError:
+            pass
+
+
+def prerendered_response(request: Request) -> Optional[Response]:
+    """PRERENDER_DIR 中存在该页面时直接返回文件，否则返回 None 由调用方动态渲染
+
+    FileResponse 在服务器支持 ASGI pathsend 扩展时由服务器直接发送文件（零拷贝），
+    否则分块读取。ETag 和 Last-Modified 来自文件的修改时间和大小。
+    """
+    if not settings.PRERENDER_DIR:
+        return None
+    path = page_path(settings.PRERENDER_DIR, request.url.path)
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+
+    response = FileResponse(
+        path,
+        media_type="text/html",
+        stat_result=stat_result,
+        headers={"Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE}"},
+    )
+    modified = datetime.fromtimestamp(int(stat_result.st_mtime), timezone.utc)
+    if not_modified(request, response.headers["etag"], modified):
+        return Response(status_code=304, headers={
+            key: response.headers[key] for key in ("etag", "last-modified", "cache-control")
+        })
+    return response
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db import sqlite_path
+
+    parser = argparse.ArgumentParser(description="把公开页面预渲染为静态 HTML")
+    parser.add_argument("output_dir", nargs="?", default=settings.PRERENDER_DIR or "./prerendered")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="渲染文章页的进程数")
+    parser.add_argument("--full", action="store_true", help="忽略 manifest，全部重新渲染")
+    parser.add_argument("--database", default=sqlite_path(settings.DATABASE_URL))
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    try:
+        result = prerender(conn, args.output_dir, workers=args.workers, full=args.full)
+    finally:
+        conn.close()
+    print(
+        f"渲染 {result.rendered} 篇，未变化 {result.unchanged} 篇，删除 {result.removed} 篇，"
+        f"耗时 {result.seconds:.2f}s -> {args.output_dir}"
+    )
@@ -0,0 +1,172 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Optional
+
+from config import settings
+
+slow_query_logger = logging.getLogger("blog-app.slow_query")
+logger = logging.getLogger("blog-app")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+# 当前请求的 (scope, {规范化 SQL: 次数})，由 ProfilerMiddleware 设置
+_request: ContextVar[Optional[tuple]] = ContextVar("profiler_request", default=None)
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """把字面量替换为 ?，IN 列表折叠为 (...)，合并空白；SQL 字符串基本固定，结果可缓存"""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _current_route() -> Optional[str]:
+    request = _request.get()
+    if request is None:
+        return None
+    scope = request[0]
+    route = scope.get("route")
+    return getattr(route, "path", scope.get("path"))
+
+
+class QueryProfiler:
+    """记录每条 SQL 的耗时、返回行数和发起查询的路由
+
+    按规范化后的 SQL 汇总；超过 slow_ms 的查询写入慢查询日志；
+    同一请求中同一语句执行次数达到 n_plus_one_threshold 时记为疑似 N+1。
+    """
+
+    def __init__(self, slow_ms: float = 100.0, n_plus_one_threshold: int = 5, history: int = 200):
+        self.slow_ms = slow_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._statements: Dict[str, dict] = {}
+        self._slow = deque(maxlen=history)
+        self._n_plus_one = deque(maxlen=history)
+
+    def record(self, sql: str, seconds: float, rows: int = -1):
+        normalized = normalize_sql(sql)
+        route = _current_route()
+        with self._lock:
+            stats = self._statements.get(normalized)
+            if stats is None:
+                stats = self._statements[normalized] = {
+                    "sql": normalized, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "routes": {},
+                }
+            ms = seconds * 1000
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            if rows > 0:
+                stats["rows"] += rows
+            if route is not None:
+                stats["routes"][route] = stats["routes"].get(route, 0) + 1
+            if ms >= self.slow_ms:
+                self._slow.append({
+                    "sql": normalized, "duration_ms": round(ms, 3), "rows": rows, "route": route, "at": time.time(),
+                })
+        if ms >= self.slow_ms:
+            slow_query_logger.warning("慢查询 %.1fms rows=%d route=%s: %s", ms, rows, route, normalized)
+
+        request = _request.get()
+        if request is not None:
+            counts = request[1]
+            counts[normalized] = counts.get(normalized, 0) + 1
+
+    def begin_request(self, scope):
+        return _request.set((scope, {}))
+
+    def end_request(self, token):
+        """请求结束时检查重复执行的语句"""
+        scope, counts = _request.get()
+        _request.reset(token)
+        repeated = {sql: count for sql, count in counts.items() if count >= self.n_plus_one_threshold}
+        if not repeated:
+            return
+        route = getattr(scope.get("route"), "path", scope.get("path"))
+        with self._lock:
+            for sql, count in repeated.items():
+                self._n_plus_one.append({"route": route, "sql": sql, "count": count, "at": time.time()})
+        for sql, count in repeated.items():
+            logger.warning("疑似 N+1 查询: %s 在一次请求中执行了 %d 次: %s", route, count, sql)
+
+    def snapshot(self, limit: int = 20) -> dict:
+        with self._lock:
+            statements = sorted(self._statements.values(), key=lambda s: s["total_ms"], reverse=True)
+            top = [
+                {**s, "avg_ms": s["total_ms"] / s["count"], "routes": dict(s["routes"])}
+                for s in statements[:limit]
+            ]
+            return {
+                "slow_query_ms": self.slow_ms,
+                "n_plus_one_threshold": self.n_plus_one_threshold,
+                "statements": top,
+                "slow_queries": list(self._slow),
+                "n_plus_one": list(self._n_plus_one),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+            self._n_plus_one.clear()
+
+
+profiler = QueryProfiler(
+    slow_ms=settings.SLOW_QUERY_MS,
+    n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD,
+    history=settings.QUERY_PROFILER_HISTORY,
+)
+
+
+def record_query(sql: str, seconds: float, rows: int = -1):
+    if settings.QUERY_PROFILER_ENABLED:
+        profiler.record(sql, seconds, rows)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3.connect(factory=ProfiledConnection)：记录通过连接执行的语句
+
+    execute 返回的游标是惰性的，这里只计执行耗时，行数取 rowcount（SELECT 为 -1）。
+    """
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        record_query(sql, time.perf_counter() - started, cursor.rowcount)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        cursor = super().executemany(sql, seq_of_parameters)
+        record_query(sql, time.perf_counter() - started, cursor.rowcount)
+        return cursor
+
+
+class ProfilerMiddleware:
+    """为每个请求建立查询统计上下文，请求结束时做 N+1 检查"""
+
+    def __init__(self, app, query_profiler: QueryProfiler = profiler):
+        self.app = app
+        self.profiler = query_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = self.profiler.begin_request(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.end_request(token)
@@ -0,0 +1,75 @@
+import re
+from html import unescape
+from typing import NamedTuple
+
+import markdown
+from pygments.formatters import HtmlFormatter
+
+# 与原先前端 marked.js 的配置保持一致：GFM 表格、围栏代码块、换行即 <br>
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "sane_lists", "nl2br", "codehilite", "toc"]
+MARKDOWN_EXTENSION_CONFIGS = {
+    "codehilite": {"css_class": "highlight", "guess_lang": False},
+}
+PYGMENTS_STYLE = "default"
+EXCERPT_LENGTH = 200
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+# 中日文按字计数，其余按连续的单词字符计数
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_WORD_RE = re.compile(rf"[{_CJK}]|[^\W{_CJK}]+")
+
+
+class RenderedContent(NamedTuple):
+    """写入文章时随 content 一起保存的派生列"""
+    content_html: str
+    excerpt: str
+    word_count: int
+
+
+def render_markdown(text: str) -> str:
+    """把 Markdown 渲染为 HTML，代码块由 Pygments 在服务端高亮
+
+    在创建/更新文章时调用一次，结果保存在 posts.content_html 中。
+    """
+    md = markdown.Markdown(
+        extensions=MARKDOWN_EXTENSIONS,
+        extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+        output_format="html",
+    )
+    return md.convert(text or "")
+
+
+def html_to_text(html: str) -> str:
+    return _SPACE_RE.sub(" ", unescape(_TAG_RE.sub("", html))).strip()
+
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    if len(text) <= length:
+        return text
+    return text[:length].rstrip() + "..."
+
+
+def count_words(text: str) -> int:
+    return len(_WORD_RE.findall(text))
+
+
+def render_post_content(content: str) -> RenderedContent:
+    """渲染 HTML 并生成摘要和字数，列表接口直接读取这些列而不必返回全文"""
+    html = render_markdown(content)
+    text = html_to_text(html)
+    return RenderedContent(html, make_excerpt(text), count_words(text))
+
+
+def has_code_blocks(html: str) -> bool:
+    """渲染结果中是否有高亮的代码块，没有时文章页不加载 pygments.css"""
+    return f'<div class="{MARKDOWN_EXTENSION_CONFIGS["codehilite"]["css_class"]}">' in (html or "")
+
+
+def highlight_css() -> str:
+    """生成代码高亮样式表，写入 static/css/pygments.css"""
+    return HtmlFormatter(style=PYGMENTS_STYLE).get_style_defs(".highlight")
+
+
+if __name__ == "__main__":
+    print(highlight_css())
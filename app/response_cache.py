@@ -0,0 +1,263 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.cache import TTLCache
+from config import settings
+
+# 标签：文章列表依赖所有文章；单篇文章只依赖自身。作者用户名出现在两者中
+POSTS_TAG = "posts"
+AUTHORS_TAG = "authors"
+
+
+def post_tag(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    media_type: str
+    headers: Dict[str, str]
+
+    def to_response(self, status_code: int = 200) -> Response:
+        return Response(content=self.body, status_code=status_code, media_type=self.media_type, headers=self.headers)
+
+
+class CacheBackend:
+    """响应缓存的存储接口
+
+    条目按 key 存取；标签版本号用于失效：key 中带有所依赖标签的当前版本，
+    写操作递增版本号后旧条目不再被命中，之后由容量限制或过期自然淘汰。
+    """
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: CachedResponse):
+        raise NotImplementedError
+
+    def versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def bump(self, tags: Iterable[str]):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """进程内缓存，多进程部署时各 worker 互不可见，应改用 SQLiteBackend"""
+
+    def __init__(self, maxsize: int, ttl: float, maxbytes: int):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, maxbytes=maxbytes, sizeof=lambda value: len(value.body))
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: CachedResponse):
+        self._entries.set(key, value)
+
+    def versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def bump(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+class SQLiteBackend(CacheBackend):
+    """用本地 SQLite 文件共享缓存和标签版本，同一台机器上的多个 worker 可以共用"""
+
+    def __init__(self, path: str, maxsize: int, ttl: float, maxbytes: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=1000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, body BLOB, media_type TEXT, headers TEXT, stored_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_stored ON response_cache (stored_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS tag_versions (tag TEXT PRIMARY KEY, version INTEGER)")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, media_type, headers FROM response_cache WHERE key = ? AND stored_at > ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedResponse(row[0], row[1], json.loads(row[2]))
+
+    def set(self, key: str, value: CachedResponse):
+        if len(value.body) > self.maxbytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)",
+                (key, value.body, value.media_type, json.dumps(value.headers), time.time()),
+            )
+            # 条目数或响应体总字节数超出容量时删除最早写入的条目
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM (SELECT key, "
+                "ROW_NUMBER() OVER newest AS position, SUM(length(body)) OVER newest AS total "
+                "FROM response_cache WINDOW newest AS (ORDER BY stored_at DESC, key)) "
+                "WHERE position > ? OR total > ?)",
+                (self.maxsize, self.maxbytes),
+            )
+
+    def versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        tags = list(tags)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT tag, version FROM tag_versions WHERE tag IN ({', '.join('?' for _ in tags)})", tags
+            ).fetchall()
+        found = dict(rows)
+        return {tag: found.get(tag, 0) for tag in tags}
+
+    def bump(self, tags: Iterable[str]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO tag_versions VALUES (?, 1) ON CONFLICT(tag) DO UPDATE SET version = version + 1",
+                [(tag,) for tag in tags],
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            size, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length(body)), 0) FROM response_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "bytes": total,
+            "maxbytes": self.maxbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """匿名请求的响应缓存，按路径和路由声明的查询参数区分条目
+
+    lookup() 在查询数据库之前取得带标签版本的 key，store() 使用同一个 key 写入；
+    如果期间有写操作递增了版本号，写入的旧结果不会再被命中。
+    """
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        self.backend = backend
+        self._listeners: List[Callable[..., None]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def lookup(
+        self, request: Request, tags: Tuple[str, ...], params: Optional[Dict[str, object]] = None,
+    ) -> Tuple[Optional[str], Optional[CachedResponse]]:
+        """params 为路由实际使用、已校验的查询参数，值为 None 的不计入 key
+
+        请求中的其他查询参数不影响响应，也不计入 key，避免随意的查询串占满缓存。
+        """
+        if self.backend is None or "authorization" in request.headers:
+            return None, None
+        versions = self.backend.versions(tags)
+        query = urlencode(sorted((name, str(value)) for name, value in (params or {}).items() if value is not None))
+        key = request.url.path + "?" + query + "#" + ",".join(f"{tag}={versions[tag]}" for tag in tags)
+        return key, self.backend.get(key)
+
+    def store(self, key: Optional[str], response: Response) -> Response:
+        if key is not None and response.status_code == 200:
+            headers = {
+                name: value for name, value in response.headers.items()
+                if name not in ("content-length", "content-type")
+            }
+            self.backend.set(key, CachedResponse(bytes(response.body), response.media_type, headers))
+        return response
+
+    def on_invalidate(self, listener: Callable[..., None]):
+        """注册标签失效时的回调 listener(*tags)，如模板片段缓存；响应缓存关闭时同样调用"""
+        self._listeners.append(listener)
+        return listener
+
+    def invalidate(self, *tags: str):
+        if not tags:
+            return
+        if self.backend is not None:
+            self.backend.bump(tags)
+        for listener in self._listeners:
+            listener(*tags)
+
+    def stats(self) -> dict:
+        return self.backend.stats() if self.backend is not None else {}
+
+
+def _create_backend() -> Optional[CacheBackend]:
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL, settings.RESPONSE_CACHE_MAX_BYTES)
+    if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(
+            settings.RESPONSE_CACHE_PATH,
+            settings.RESPONSE_CACHE_SIZE,
+            settings.RESPONSE_CACHE_TTL,
+            settings.RESPONSE_CACHE_MAX_BYTES,
+        )
+    if settings.RESPONSE_CACHE_BACKEND == "none":
+        return None
+    raise ValueError(f"未知的 RESPONSE_CACHE_BACKEND: {settings.RESPONSE_CACHE_BACKEND}")
+
+
+response_cache = ResponseCache(_create_backend())
+
+
+def invalidate_post(post_id: Optional[int] = None):
+    """文章被创建、修改或删除后调用，使文章列表和该文章的缓存失效"""
+    if post_id is None:
+        response_cache.invalidate(POSTS_TAG)
+    else:
+        response_cache.invalidate(POSTS_TAG, post_tag(post_id))
+
+
+def invalidate_posts(post_ids: Iterable[int]):
+    """批量修改或删除文章后调用，一次递增文章列表和这些文章的版本号"""
+    response_cache.invalidate(POSTS_TAG, *(post_tag(post_id) for post_id in post_ids))
+
+
+def invalidate_authors():
+    """用户名变化或用户被删除后调用，所有显示作者名的缓存失效"""
+    response_cache.invalidate(AUTHORS_TAG)
@@ -41,6 +41,9 @@ class PostUpdate(BaseModel):
 
 class Post(PostBase):
     id: int
+    content_html: Optional[str] = None
+    excerpt: Optional[str] = None
+    word_count: int = 0
     created_at: datetime
     updated_at: datetime
     author_id: int
@@ -48,6 +51,19 @@ class Post(PostBase):
     class Config:
         from_attributes = True
 
+class PostSummary(BaseModel):
+    id: int
+    title: str
+    excerpt: Optional[str] = None
+    word_count: int = 0
+    published: bool
+    created_at: datetime
+    updated_at: datetime
+    author_id: int
+
+    class Config:
+        from_attributes = True
+
 class PostWithAuthor(Post):
     author: User
 
@@ -0,0 +1,133 @@
+import html
+import sqlite3
+import time
+
+from config import settings
+
+# posts_fts 是 posts 的外部内容 FTS5 索引，只保存倒排索引，
+# 标题和正文仍从 posts 表读取；触发器在 posts 增删改时同步索引
+FTS_TABLE = "posts_fts"
+# bm25 列权重：标题命中比正文命中更靠前
+BM25_WEIGHTS = (10.0, 1.0)
+SNIPPET_TOKENS = 32
+# trigram 分词按 3 个字符切分，更短的搜索词无法使用索引
+TRIGRAM_MIN_LENGTH = 3
+
+# snippet()/highlight() 先用私有区字符标记命中位置，转义 HTML 后再替换为 <mark>
+_MARK_OPEN = "\ue000"
+_MARK_CLOSE = "\ue001"
+
+_TRIGGERS = {
+    "posts_fts_ai": f'''
+        CREATE TRIGGER posts_fts_ai AFTER INSERT ON posts BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    ''',
+    "posts_fts_ad": f'''
+        CREATE TRIGGER posts_fts_ad AFTER DELETE ON posts BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END
+    ''',
+    "posts_fts_au": f'''
+        CREATE TRIGGER posts_fts_au AFTER UPDATE OF title, content ON posts BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    ''',
+}
+
+
+class InvalidSearchQuery(ValueError):
+    """搜索词为空或过短"""
+
+
+def _create_table_sql(tokenizer: str) -> str:
+    return (
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"title, content, content='posts', content_rowid='id', tokenize='{tokenizer}')"
+    )
+
+
+def ensure_search_index(conn: sqlite3.Connection, tokenizer: str = None) -> bool:
+    """创建 FTS5 表和同步触发器，返回是否需要重建索引
+
+    分词器与配置不一致时删除旧表重新创建。
+    """
+    tokenizer = tokenizer or settings.SEARCH_TOKENIZER
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone()
+    if row is not None and row[0] == _create_table_sql(tokenizer):
+        created = False
+    else:
+        if row is not None:
+            conn.execute(f"DROP TABLE {FTS_TABLE}")
+        conn.execute(_create_table_sql(tokenizer))
+        created = True
+
+    existing = {
+        name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'posts_fts_%'"
+        )
+    }
+    for name, ddl in _TRIGGERS.items():
+        if name not in existing:
+            conn.execute(ddl)
+    conn.commit()
+    return created
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> int:
+    """从 posts 表整体重建索引并合并段，返回索引的文章数"""
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    conn.commit()
+    return conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+
+def build_match_query(q: str, tokenizer: str = None) -> str:
+    """把用户输入转换为 FTS5 查询：每个词作为短语加引号，词之间为 AND
+
+    避免用户输入中的 AND/OR/NEAR、引号和 * 被解释为 FTS5 语法。
+    """
+    tokenizer = tokenizer or settings.SEARCH_TOKENIZER
+    terms = q.split()
+    if not terms:
+        raise InvalidSearchQuery("搜索词不能为空")
+    if tokenizer.startswith("trigram") and any(len(term) < TRIGRAM_MIN_LENGTH for term in terms):
+        raise InvalidSearchQuery(f"每个搜索词至少需要 {TRIGRAM_MIN_LENGTH} 个字符")
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def highlight_markup(text: str) -> str:
+    """转义 snippet 中的 HTML，只保留命中位置的 <mark>"""
+    return html.escape(text or "").replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def search_columns() -> str:
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    return (
+        f"bm25({FTS_TABLE}, {weights}) AS score, "
+        f"highlight({FTS_TABLE}, 0, '{_MARK_OPEN}', '{_MARK_CLOSE}') AS title_highlight, "
+        f"snippet({FTS_TABLE}, 1, '{_MARK_OPEN}', '{_MARK_CLOSE}', '...', {SNIPPET_TOKENS}) AS snippet"
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.db import sqlite_path
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("使用方法: python -m app.search rebuild [数据库文件]")
+        sys.exit(1)
+
+    path = sys.argv[2] if len(sys.argv) > 2 else sqlite_path(settings.DATABASE_URL)
+    conn = sqlite3.connect(path)
+    try:
+        started = time.perf_counter()
+        ensure_search_index(conn)
+        count = rebuild_search_index(conn)
+        print(f"已为 {count} 篇文章重建搜索索引，耗时 {time.perf_counter() - started:.2f}s")
+    finally:
+        conn.close()
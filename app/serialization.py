@@ -0,0 +1,42 @@
+import json
+import logging
+from typing import Any, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("blog-app")
+
+
+def _response_class() -> Type[JSONResponse]:
+    """按 Settings.JSON_RESPONSE_CLASS 选择 API 的 JSON 响应类
+
+    orjson 在 C 扩展中直接把 dict/list 写成 UTF-8 字节，比标准库 json.dumps 加 encode 快得多；
+    配置为 orjson 但未安装时退回标准库并记录警告。
+    """
+    if settings.JSON_RESPONSE_CLASS == "json":
+        return JSONResponse
+    if settings.JSON_RESPONSE_CLASS == "orjson":
+        if orjson is None:
+            logger.warning("JSON_RESPONSE_CLASS=orjson 但未安装 orjson，使用标准库 json")
+            return JSONResponse
+        return ORJSONResponse
+    raise ValueError(f"未知的 JSON_RESPONSE_CLASS: {settings.JSON_RESPONSE_CLASS}")
+
+
+# 路由直接返回 DefaultJSONResponse(content=rows) 时不经过 FastAPI 的 jsonable_encoder；
+# 同时作为 FastAPI/APIRouter 的 default_response_class
+DefaultJSONResponse = _response_class()
+
+
+def dumps(content: Any) -> bytes:
+    """与 DefaultJSONResponse.render 相同的序列化，用于流式响应中逐行输出"""
+    if DefaultJSONResponse is ORJSONResponse:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,332 @@
+import asyncio
+import sqlite3
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from anyio import from_thread
+from starlette.concurrency import run_in_threadpool
+
+from app import async_crud, batch, importer
+from app.cache import invalidate_user
+from app.db import aio_pool, aio_write_pool, db_pool
+from app.importer import ImportResult
+from app.passwords import password_hasher
+from app.prerender import discard_post, discard_posts
+from app.rendering import RenderedContent, render_post_content
+from app.response_cache import invalidate_authors, invalidate_post, invalidate_posts
+from config import settings
+
+# 写操作的业务流程：读写连接的选择、密码哈希、Markdown 渲染和缓存失效。
+# main.py 与 app/api 的路由只负责解析请求、鉴权和组织响应，数据访问都经过这里和 async_crud
+
+
+class UserConflict(ValueError):
+    """用户名或邮箱已被其他用户使用，field 为 "username" 或 "email" """
+
+    def __init__(self, field: str):
+        super().__init__(field)
+        self.field = field
+
+
+async def create_user(username: str, email: str, password: str) -> dict:
+    async with aio_pool.connection() as conn:
+        conflict = await async_crud.user_conflict(conn, username=username, email=email)
+    if conflict:
+        raise UserConflict(conflict)
+
+    # 哈希期间不占用数据库连接
+    hashed_password = await password_hasher.hash(password)
+
+    async with aio_write_pool.connection() as conn:
+        try:
+            user_id = await async_crud.create_user(conn, username, email, hashed_password)
+        except sqlite3.IntegrityError:
+            # 检查之后被并发注册抢先
+            raise UserConflict(await async_crud.user_conflict(conn, username=username, email=email) or "username")
+        return await async_crud.get_user(conn, user_id)
+
+
+async def _user_updates(conn, user_id: int, changes: dict, hashed_password: Optional[str]) -> dict:
+    """检查用户名和邮箱冲突（冲突时抛出 UserConflict），返回要写入的列"""
+    for field in ("username", "email"):
+        if field in changes and await async_crud.user_conflict(conn, exclude_id=user_id, **{field: changes[field]}):
+            raise UserConflict(field)
+
+    updates = {key: changes[key] for key in ("username", "email") if key in changes}
+    for key in ("is_active", "is_admin"):
+        if key in changes:
+            updates[key] = 1 if changes[key] else 0
+    if hashed_password is not None:
+        updates["hashed_password"] = hashed_password
+    return updates
+
+
+async def update_user(user_id: int, changes: dict) -> Optional[dict]:
+    """changes 可包含 username、email、password、is_active、is_admin，值为 None 的字段忽略
+
+    用户不存在时返回 None，用户名或邮箱冲突时抛出 UserConflict。
+    """
+    changes = {key: value for key, value in changes.items() if value is not None}
+    # 先哈希新密码，哈希期间不占用数据库连接
+    password = changes.pop("password", None)
+    hashed_password = await password_hasher.hash(password) if password is not None else None
+
+    async with aio_write_pool.connection() as conn:
+        if await async_crud.get_user(conn, user_id) is None:
+            return None
+        updates = await _user_updates(conn, user_id, changes, hashed_password)
+        await async_crud.update_user(conn, user_id, updates)
+        invalidate_user(user_id)
+        if "username" in updates:
+            invalidate_authors()
+            # 预渲染的页面中带有作者用户名
+            discard_posts(await async_crud.get_post_ids_by_authors(conn, [user_id]))
+        return await async_crud.get_user(conn, user_id)
+
+
+async def delete_user(user_id: int) -> bool:
+    async with aio_write_pool.connection() as conn:
+        post_ids = await async_crud.get_post_ids_by_authors(conn, [user_id])
+        deleted = await async_crud.delete_user(conn, user_id)
+    if deleted:
+        invalidate_user(user_id)
+        invalidate_authors()
+        discard_posts(post_ids)
+    return deleted
+
+
+async def create_post(title: str, content: str, published: bool, author_id: int) -> dict:
+    # Markdown、摘要和字数只在写入时生成一次
+    rendered = await run_in_threadpool(render_post_content, content)
+    async with aio_write_pool.connection() as conn:
+        post_id = await async_crud.create_post(conn, title, content, rendered, published, author_id)
+        post = await async_crud.get_post(conn, post_id, published_only=False)
+    invalidate_post(post_id)
+    discard_post()
+    return post
+
+
+def _merged_post(post: dict, changes: dict) -> Tuple[str, str, bool]:
+    """changes 中值为 None 的字段保持原值，返回 (title, content, published)"""
+    return tuple(
+        changes.get(field) if changes.get(field) is not None else post[field]
+        for field in ("title", "content", "published")
+    )
+
+
+def _needs_render(post: dict, content: str) -> bool:
+    return content != post["content"] or post["content_html"] is None or post["excerpt"] is None
+
+
+async def update_post(post_id: int, changes: dict) -> Optional[dict]:
+    """changes 可包含 title、content、published，值为 None 的字段保持不变；文章不存在时返回 None"""
+    async with aio_write_pool.connection() as conn:
+        post = await async_crud.get_post(conn, post_id, published_only=False)
+        if post is None:
+            return None
+
+        title, content, published = _merged_post(post, changes)
+        if _needs_render(post, content):
+            rendered = await run_in_threadpool(render_post_content, content)
+        else:
+            rendered = RenderedContent(post["content_html"], post["excerpt"], post["word_count"])
+
+        await async_crud.update_post(conn, post_id, title, content, rendered, published)
+        post = await async_crud.get_post(conn, post_id, published_only=False)
+    invalidate_post(post_id)
+    discard_post(post_id)
+    return post
+
+
+async def delete_post(post_id: int) -> bool:
+    async with aio_write_pool.connection() as conn:
+        deleted = await async_crud.delete_post(conn, post_id)
+    if deleted:
+        invalidate_post(post_id)
+        discard_post(post_id)
+    return deleted
+
+
+async def batch_posts(operations: List[batch.Operation]) -> List[dict]:
+    """在一个写事务中依次执行批量的文章修改和删除，返回逐项结果（见 app.batch）
+
+    涉及的文章一次读出，逐项在内存中校验，写入语句按顺序合并为 executemany。
+    不存在的文章和格式错误的项记为失败，不影响其他项；数据库出错时整批回滚并抛出异常。
+    """
+    valid = [operation for operation in operations if operation.error is None]
+    # 新正文在取得写连接之前渲染
+    contents = {
+        operation.changes["content"] for operation in valid
+        if operation.op == "update" and operation.changes.get("content") is not None
+    }
+    rendered = {}
+    if contents:
+        rendered = await run_in_threadpool(lambda: {content: render_post_content(content) for content in contents})
+
+    results: List[dict] = []
+    changed: List[int] = []
+    async with aio_write_pool.connection() as conn:
+        try:
+            posts = await async_crud.get_posts_by_id(conn, {operation.id for operation in valid})
+            statements = []
+            for operation in operations:
+                if operation.error is not None:
+                    results.append(batch.result(operation, 400, operation.error))
+                    continue
+                post = posts.get(operation.id)
+                if post is None:
+                    results.append(batch.result(operation, 404, "文章不存在"))
+                    continue
+                if operation.op == "delete":
+                    statements.append(async_crud.delete_post_statement(operation.id))
+                    del posts[operation.id]
+                else:
+                    title, content, published = _merged_post(post, operation.changes)
+                    if content in rendered:
+                        content_rendered = rendered[content]
+                    elif _needs_render(post, content):
+                        content_rendered = await run_in_threadpool(render_post_content, content)
+                    else:
+                        content_rendered = RenderedContent(post["content_html"], post["excerpt"], post["word_count"])
+                    statements.append(
+                        async_crud.update_post_statement(operation.id, title, content, content_rendered, published)
+                    )
+                    # 同一篇文章后续的操作基于本次修改后的内容
+                    posts[operation.id] = {
+                        **post, "title": title, "content": content, "published": published, **content_rendered._asdict(),
+                    }
+                changed.append(operation.id)
+                results.append(batch.result(operation, 200))
+            await async_crud.execute_statements(conn, statements)
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
+    if changed:
+        invalidate_posts(changed)
+        discard_posts(set(changed))
+    return results
+
+
+async def _hash_passwords(operations: List[batch.Operation]) -> Dict[int, str]:
+    """并发哈希批量操作中的新密码，返回 {operation.index: 哈希}
+
+    只处理目标用户存在的操作；同时提交给 password_hasher 的任务不超过 PASSWORD_HASH_MAX_QUEUE 个，
+    为其他请求的登录和注册留出线程。
+    """
+    pending = [operation for operation in operations if operation.changes.get("password") is not None]
+    if not pending:
+        return {}
+    async with aio_pool.connection() as conn:
+        existing = await async_crud.get_users_by_id(conn, {operation.id for operation in pending})
+    limit = asyncio.Semaphore(max(settings.PASSWORD_HASH_MAX_QUEUE, 1))
+
+    async def hash_password(operation: batch.Operation) -> Tuple[int, str]:
+        async with limit:
+            return operation.index, await password_hasher.hash(operation.changes["password"])
+
+    hashed = await asyncio.gather(*(
+        hash_password(operation) for operation in pending if operation.id in existing
+    ))
+    return dict(hashed)
+
+
+async def batch_users(operations: List[batch.Operation], current_user_id: int) -> List[dict]:
+    """在一个写事务中依次执行批量的用户修改和删除，返回逐项结果（见 app.batch）
+
+    不能删除自己；新密码在取得写连接之前哈希。修改用户名或邮箱时先执行之前的语句，
+    冲突检查能看到同一批中更早的修改。数据库出错时整批回滚并抛出异常。
+    """
+    valid = [operation for operation in operations if operation.error is None]
+    hashed_passwords = await _hash_passwords(valid)
+
+    results: List[dict] = []
+    changed: List[int] = []
+    # 用户名变化或被删除的用户，他们的文章页需要重新渲染
+    authors: List[int] = []
+    async with aio_write_pool.connection() as conn:
+        try:
+            users = await async_crud.get_users_by_id(conn, {operation.id for operation in valid})
+            statements = []
+            for operation in operations:
+                if operation.error is not None:
+                    results.append(batch.result(operation, 400, operation.error))
+                    continue
+                # 要改密码但哈希时用户还不存在的，同样按不存在处理
+                missing_hash = (
+                    operation.changes.get("password") is not None and operation.index not in hashed_passwords
+                )
+                if operation.id not in users or missing_hash:
+                    results.append(batch.result(operation, 404, "用户不存在"))
+                    continue
+                if operation.op == "delete":
+                    if operation.id == current_user_id:
+                        results.append(batch.result(operation, 400, "不能删除自己的账户"))
+                        continue
+                    statements.append(async_crud.delete_user_statement(operation.id))
+                    del users[operation.id]
+                    authors.append(operation.id)
+                else:
+                    changes = {
+                        key: value for key, value in operation.changes.items()
+                        if value is not None and key != "password"
+                    }
+                    if "username" in changes or "email" in changes:
+                        await async_crud.execute_statements(conn, statements)
+                        statements = []
+                    try:
+                        updates = await _user_updates(
+                            conn, operation.id, changes, hashed_passwords.get(operation.index)
+                        )
+                    except UserConflict as e:
+                        detail = "用户名已被使用" if e.field == "username" else "邮箱已被使用"
+                        results.append(batch.result(operation, 400, detail))
+                        continue
+                    if updates:
+                        statements.append(async_crud.update_user_statement(operation.id, updates))
+                    if "username" in updates:
+                        authors.append(operation.id)
+                changed.append(operation.id)
+                results.append(batch.result(operation, 200))
+            await async_crud.execute_statements(conn, statements)
+            author_posts = await async_crud.get_post_ids_by_authors(conn, set(authors))
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
+    for user_id in set(changed):
+        invalidate_user(user_id)
+    if authors:
+        invalidate_authors()
+        discard_posts(author_posts)
+    return results
+
+
+async def import_posts(file: BinaryIO, kind: str, author_id: int) -> ImportResult:
+    """在线程池中批量导入上传的文章文件（格式见 app.importer）
+
+    解析和 Markdown 渲染在线程池中进行；每批经由唯一的写连接写入并提交，与其他写操作一起排队，
+    批次之间其他写操作可以正常执行。服务运行期间不删除索引。文件格式错误时抛出 InvalidArchive。
+    """
+    async def write_batch(rows: List[tuple]):
+        async with aio_write_pool.connection() as conn:
+            try:
+                await async_crud.execute_statements(conn, [(importer.INSERT_SQL, row) for row in rows])
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    def run() -> ImportResult:
+        with db_pool.connection() as conn:
+            return importer.import_posts(
+                conn, importer.iter_archive(file, kind), author_id,
+                write_batch=lambda rows: from_thread.run(write_batch, rows),
+            )
+
+    result = await run_in_threadpool(run)
+    if result.imported:
+        invalidate_post()
+        discard_post()
+    return result
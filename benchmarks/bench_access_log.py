@@ -0,0 +1,130 @@
+"""请求日志的单请求开销：原 DEBUG 级 log_requests 中间件与 AccessLogMiddleware 对比
+
+直接调用 ASGI 应用，不经过网络；日志写入 os.devnull，只统计格式化和处理器本身的开销。
+运行: python benchmarks/bench_access_log.py [请求数]
+"""
+import asyncio
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueListener
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.access_log import LOG_FORMAT, AccessLogMiddleware, LocalQueueHandler, access_logger  # noqa: E402
+
+PATHS = ["/api/posts", "/static/css/style.css", "/api/posts", "/blog/1"]
+
+
+async def endpoint(request):
+    return JSONResponse({"ok": True})
+
+
+def make_app():
+    return Starlette(routes=[Route(path, endpoint) for path in set(PATHS)])
+
+
+def devnull_handler() -> logging.Handler:
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def old_app():
+    """与原 main.py 相同：BaseHTTPMiddleware + 每个请求两条 f-string DEBUG 日志，同步写出"""
+    logger = logging.getLogger("bench.old")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(devnull_handler())
+    app = make_app()
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        logger.debug(f"收到请求: {request.method} {request.url}")
+        response = await call_next(request)
+        logger.debug(f"请求处理完成: {request.method} {request.url} - {response.status_code}")
+        return response
+
+    return app
+
+
+def new_app(sample_rate: float):
+    app = make_app()
+    app.add_middleware(AccessLogMiddleware, sample_rate=sample_rate)
+    return app
+
+
+def plain_app():
+    return make_app()
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 1234), "server": ("localhost", 80),
+    }
+
+    received = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        # 第一次返回请求体，之后像真实连接一样等待断开
+        nonlocal received
+        if received:
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests: int) -> float:
+    for path in PATHS * 50:
+        await call(app, path)
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(app, PATHS[i % len(PATHS)])
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    log_queue = queue.SimpleQueue()
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+    access_logger.addHandler(LocalQueueHandler(log_queue))
+    listener = QueueListener(log_queue, devnull_handler())
+    listener.start()
+
+    try:
+        cases = [
+            ("无日志", plain_app()),
+            ("原 log_requests (DEBUG)", old_app()),
+            ("AccessLogMiddleware", new_app(1.0)),
+            ("AccessLogMiddleware 10% 抽样", new_app(0.1)),
+        ]
+        baseline = None
+        print(f"{requests} 个请求, 其中 1/{len(PATHS)} 为静态文件路径")
+        for name, app in cases:
+            per_request = asyncio.run(measure(app, requests))
+            baseline = per_request if baseline is None else baseline
+            print(f"{name:<30} {per_request:8.1f} us/请求  (日志开销 {per_request - baseline:+.1f} us)")
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
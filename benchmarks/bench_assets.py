@@ -0,0 +1,100 @@
+"""静态资源构建（app.assets）的传输量与服务开销
+
+1. 每个页面冷加载的静态资源字节数：原始文件与预压缩（gzip，安装 brotli 时另有 br）版本
+2. 直接调用 ASGI 应用请求 highlight.min.js（gzip）：StaticFiles + GZipMiddleware 每次压缩，
+   与 AssetFiles 返回预压缩文件对比
+运行: python benchmarks/bench_assets.py [请求数]
+"""
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from starlette.middleware.gzip import GZipMiddleware  # noqa: E402
+from starlette.staticfiles import StaticFiles  # noqa: E402
+
+from app import assets  # noqa: E402
+
+PAGES = {
+    "首页/列表页": ["templates/base.html"],
+    "文章页": ["templates/base.html", "templates/blog/post.html"],
+    "编辑页": ["templates/base.html", "templates/admin/post_editor.html"],
+}
+ASSET_RE = re.compile(r"asset_url\('([^']+)'\)")
+
+
+def page_assets(templates):
+    paths = []
+    for template in templates:
+        with open(template, encoding="utf-8") as f:
+            paths.extend(ASSET_RE.findall(f.read()))
+    return paths
+
+
+def transfer_sizes(build_dir: str, manifest: dict):
+    for page, templates in PAGES.items():
+        original = compressed = 0
+        for path in page_assets(templates):
+            hashed = os.path.join(build_dir, manifest[path])
+            size = os.path.getsize(hashed)
+            original += size
+            variants = [hashed + suffix for _, suffix in assets.ENCODINGS if os.path.exists(hashed + suffix)]
+            compressed += min([size] + [os.path.getsize(variant) for variant in variants])
+        print(f"  {page:<10} {original / 1024:7.1f} KB -> {compressed / 1024:6.1f} KB")
+
+
+async def request(app, path: str) -> int:
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+async def serving(build_dir: str, manifest: dict, requests: int):
+    hashed = manifest["js/highlight.min.js"]
+    for name, app, path in (
+        ("GZipMiddleware", GZipMiddleware(StaticFiles(directory="static"), minimum_size=500), "/js/highlight.min.js"),
+        ("AssetFiles 预压缩", assets.AssetFiles(directory="static", build_dir=build_dir), "/" + hashed),
+    ):
+        size = await request(app, path)
+        started = time.perf_counter()
+        for _ in range(requests):
+            await request(app, path)
+        elapsed = time.perf_counter() - started
+        print(f"  {name:<16} {requests / elapsed:7.0f} req/s  {elapsed / requests * 1000:6.2f} ms/请求  响应 {size / 1024:.1f} KB")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with tempfile.TemporaryDirectory() as build_dir:
+        result = assets.build_assets("static", build_dir)
+        manifest = assets.load_manifest(build_dir)
+        print(f"构建 {result.files} 个文件: {result.original_bytes / 1024:.0f} KB -> {result.compressed_bytes / 1024:.0f} KB")
+        print("冷加载的静态资源传输量:")
+        transfer_sizes(build_dir, manifest)
+        print(f"请求 highlight.min.js {requests} 次（Accept-Encoding: gzip）:")
+        asyncio.run(serving(build_dir, manifest, requests))
+
+
+if __name__ == "__main__":
+    main()
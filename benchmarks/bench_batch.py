@@ -0,0 +1,122 @@
+"""1000 次文章修改：逐条 PUT /api/posts/{id} 与一次 POST /api/posts:batch 的耗时
+
+在当前进程中直接调用 ASGI 应用（含全部中间件），不经过网络；逐条请求时每次都要鉴权、
+取得写连接并提交一次事务，批量请求只鉴权一次、一个事务。真实部署中逐条请求还要加上
+每次的网络往返，差距更大。另外比较逐条 DELETE 与批量删除。
+
+运行: python benchmarks/bench_batch.py [操作数]
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+
+def setup_database(path: str, posts: int):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-c", "import main; main.init_db()"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (username, email, hashed_password, is_admin) VALUES ('admin', 'a@example.com', 'x', 1)")
+    conn.executemany(
+        "INSERT INTO posts (title, content, content_html, excerpt, word_count, author_id, created_at, updated_at) "
+        "VALUES (?, 'body', '<p>body</p>', 'body', 1, 1, datetime('now'), datetime('now'))",
+        [(f"Post {i}",) for i in range(posts)],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def run(operations: int):
+    import main as app_main
+    from app.auth import create_access_token
+
+    token = create_access_token({"sub": "admin"})
+
+    async def request(method: str, path: str, body=None) -> dict:
+        payload = json.dumps(body).encode() if body is not None else b""
+        scope = {
+            "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [
+                (b"host", b"localhost"), (b"authorization", f"Bearer {token}".encode()),
+                (b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode()),
+            ],
+            "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+        }
+        response = {"body": b""}
+
+        async def receive():
+            return {"type": "http.request", "body": payload, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        await app_main.app(scope, receive, send)
+        assert response["status"] == 200, response
+        return json.loads(response["body"])
+
+    ids = list(range(1, operations + 1))
+
+    async def individual_updates(published: bool):
+        for post_id in ids:
+            await request("PUT", f"/api/posts/{post_id}", {"published": published})
+
+    async def batch_updates(published: bool):
+        result = await request("POST", "/api/posts:batch", {
+            "operations": [{"op": "update", "id": post_id, "published": published} for post_id in ids],
+        })
+        assert result["applied"] == operations, result
+
+    async def individual_deletes():
+        for post_id in ids[: operations // 2]:
+            await request("DELETE", f"/api/posts/{post_id}")
+
+    async def batch_deletes():
+        result = await request("POST", "/api/posts:batch", {
+            "operations": [{"op": "delete", "id": post_id} for post_id in ids[operations // 2:]],
+        })
+        assert result["applied"] == operations - operations // 2, result
+
+    # 预热：建立连接池、填充用户缓存
+    await request("PUT", "/api/posts/1", {"published": True})
+    for name, job in (
+        (f"逐条 PUT × {operations}", individual_updates(False)),
+        (f"批量更新 {operations} 项", batch_updates(True)),
+        (f"逐条 DELETE × {operations // 2}", individual_deletes()),
+        (f"批量删除 {operations - operations // 2} 项", batch_deletes()),
+    ):
+        started = time.perf_counter()
+        await job
+        print(f"  {name:<20} {time.perf_counter() - started:7.3f}s")
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        setup_database(db_path, operations)
+        os.environ.update(
+            DATABASE_URL=f"sqlite:///{db_path}",
+            ACCESS_LOG_ENABLED="false",
+            RESPONSE_CACHE_PATH=os.path.join(tmp, "response_cache.db"),
+        )
+        print(f"{operations} 篇文章:")
+        asyncio.run(run(operations))
+
+
+if __name__ == "__main__":
+    main()
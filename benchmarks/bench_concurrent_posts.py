@@ -0,0 +1,117 @@
+"""N 个客户端同时请求 /api/posts 时的吞吐量与延迟
+
+在子进程中启动 uvicorn（单 worker，临时数据库），同时发起并发的 /api/posts 请求，
+并在压测期间周期性探测 /login 页面，观察事件循环是否被数据库查询阻塞。
+需要 httpx: pip install httpx
+
+运行: python benchmarks/bench_concurrent_posts.py [并发数] [每个客户端请求数]
+"""
+import asyncio
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_database(path: str, posts: int = 500):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-c", "import main; main.init_db()"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (username, email, hashed_password, is_admin) VALUES ('admin', 'a@example.com', 'x', 1)")
+    conn.executemany(
+        'INSERT INTO posts (title, content, author_id, created_at, updated_at) VALUES (?, ?, 1, datetime("now"), datetime("now"))',
+        [(f"Post {i}", "lorem ipsum dolor sit amet " * 300) for i in range(posts)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(base_url: str):
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(base_url + "/login")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("服务器未能启动")
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[max(int(len(samples) * pct) - 1, 0)]
+
+
+async def run(base_url: str, clients: int, requests_per_client: int):
+    latencies, probes = [], []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=httpx.Limits(max_connections=clients + 1)) as http:
+        async def client():
+            for _ in range(requests_per_client):
+                started = time.perf_counter()
+                response = await http.get("/api/posts", params={"limit": 50})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await http.get("/login")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    total = clients * requests_per_client
+    print(f"{clients} 个并发客户端, 共 {total} 个请求, 用时 {elapsed:.2f}s, {total / elapsed:.0f} req/s")
+    print(f"/api/posts  p50={statistics.median(latencies) * 1000:.1f}ms  p99={percentile(latencies, 0.99) * 1000:.1f}ms")
+    if probes:
+        print(f"/login 探测 p50={statistics.median(probes) * 1000:.1f}ms  p99={percentile(probes, 0.99) * 1000:.1f}ms")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    requests_per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        setup_database(db_path)
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            asyncio.run(wait_until_ready(base_url))
+            asyncio.run(run(base_url, clients, requests_per_client))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
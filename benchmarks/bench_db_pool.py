@@ -0,0 +1,94 @@
+"""对比每次请求新建连接与使用连接池时 /api/posts/{id} 查询路径的延迟
+
+运行: python benchmarks/bench_db_pool.py [请求次数]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import ConnectionPool
+
+USER_QUERY = 'SELECT is_admin FROM users WHERE username = ?'
+POST_QUERY = '''
+    SELECT p.id, p.title, p.content, p.published, p.created_at, p.updated_at,
+           p.author_id, u.username as author_name
+    FROM posts p
+    LEFT JOIN users u ON p.author_id = u.id
+    WHERE p.id = ? AND p.published = 1
+'''
+
+
+def setup_database(path: str, posts: int = 1000):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL, hashed_password TEXT NOT NULL,
+            is_active INTEGER DEFAULT 1, is_admin INTEGER DEFAULT 0);
+        CREATE TABLE posts (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+            content TEXT NOT NULL, published INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, author_id INTEGER NOT NULL);
+    ''')
+    conn.execute("INSERT INTO users (username, email, hashed_password, is_admin) VALUES ('admin', 'a@example.com', 'x', 1)")
+    conn.executemany(
+        'INSERT INTO posts (title, content, author_id) VALUES (?, ?, 1)',
+        [(f'Post {i}', 'lorem ipsum ' * 200) for i in range(posts)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def per_call_connections(path: str, post_id: int):
+    # 原有行为：令牌查询与文章查询各自新建一个连接
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute(USER_QUERY, ('admin',)).fetchone()
+    conn.close()
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute(POST_QUERY, (post_id,)).fetchone()
+    conn.close()
+
+
+def pooled(pool: ConnectionPool, post_id: int):
+    with pool.connection() as conn:
+        conn.execute(USER_QUERY, ('admin',)).fetchone()
+        conn.execute(POST_QUERY, (post_id,)).fetchone()
+
+
+def measure(fn, iterations: int):
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i % 1000 + 1)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        setup_database(path)
+        pool = ConnectionPool(path, size=5)
+
+        results = {
+            'connect per call': measure(lambda pid: per_call_connections(path, pid), iterations),
+            'connection pool': measure(lambda pid: pooled(pool, pid), iterations),
+        }
+        pool.close()
+
+    print(f'{iterations} requests')
+    for name, (p50, p99) in results.items():
+        print(f'{name:<18} p50={p50:8.1f}us  p99={p99:8.1f}us')
+    print('pool stats:', pool.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""NDJSON 导出（app.export.stream_posts）的内存占用与吞吐量
+
+分别在 SMALL 和 LARGE 篇文章（正文约 2KB）的数据库上完整消费导出流，用 tracemalloc
+统计 Python 堆的峰值。流式导出的峰值只取决于 EXPORT_BATCH_SIZE，与文章总数无关；
+作为对照，一次性 fetchall 后整体序列化的峰值随文章数线性增长。
+LARGE 的流式峰值超过 SMALL 的 1.5 倍时以状态码 1 退出。
+运行: python benchmarks/bench_export.py [LARGE 文章数]
+"""
+import asyncio
+import gzip
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import async_crud  # noqa: E402
+from app.db import AsyncConnectionPool  # noqa: E402
+from app.export import stream_posts  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+from app.serialization import dumps  # noqa: E402
+
+SMALL = 5000
+MAX_GROWTH = 1.5
+CONTENT = "SQLite 导出测试，lorem ipsum dolor sit amet. " * 45
+
+
+def setup_database(path: str, count: int):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migrate(conn)
+    conn.execute("INSERT INTO users (username, email, hashed_password) VALUES ('admin', 'admin@example.com', 'x')")
+    conn.executemany(
+        "INSERT INTO posts (title, content, content_html, excerpt, word_count, created_at, updated_at, author_id) "
+        "VALUES (?, ?, ?, ?, 300, datetime('2020-01-01', ? || ' minutes'), datetime('2020-01-01', ? || ' minutes'), 1)",
+        ((f"Post {i}", CONTENT, f"<p>{CONTENT}</p>", CONTENT[:100], i, i) for i in range(count)),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def consume_stream(pool: AsyncConnectionPool, compress: bool) -> int:
+    size = 0
+    async for chunk in stream_posts(pool, compress=compress):
+        size += len(chunk)
+    return size
+
+
+async def consume_fetchall(pool: AsyncConnectionPool) -> int:
+    # 对照：读出全部行后一次性拼接整个响应体
+    sql, params = async_crud.export_query()
+    async with pool.connection() as conn:
+        rows = await conn.execute_fetchall(sql, params)
+    body = b"".join(dumps(dict(row)) + b"\n" for row in rows)
+    return len(body)
+
+
+async def measure(pool: AsyncConnectionPool, consume) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await consume(pool)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+async def run(path: str, count: int) -> int:
+    pool = AsyncConnectionPool(path, size=1)
+    try:
+        # 预热：建立连接，避免连接创建计入第一项
+        await consume_stream(pool, False)
+        results = {}
+        for name, consume in (
+            ("stream", lambda p: consume_stream(p, False)),
+            ("stream + gzip", lambda p: consume_stream(p, True)),
+            ("fetchall", consume_fetchall),
+        ):
+            size, elapsed, peak = await measure(pool, consume)
+            results[name] = peak
+            print(
+                f"  {name:<14} {size / 1024 / 1024:7.1f} MB 输出  {elapsed:6.2f}s  "
+                f"{count / elapsed:8.0f} 篇/s  峰值 {peak / 1024 / 1024:7.2f} MB"
+            )
+        return results["stream"]
+    finally:
+        await pool.close()
+
+
+def main():
+    large = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    peaks = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (SMALL, large):
+            path = os.path.join(tmp, f"export-{count}.db")
+            setup_database(path, count)
+            print(f"{count} 篇文章:")
+            peaks[count] = asyncio.run(run(path, count))
+
+        # 压缩输出可以被完整解压，行数与文章数一致
+        async def gzip_lines():
+            pool = AsyncConnectionPool(path, size=1)
+            try:
+                body = b"".join([chunk async for chunk in stream_posts(pool, compress=True)])
+            finally:
+                await pool.close()
+            return len(gzip.decompress(body).splitlines())
+
+        lines = asyncio.run(gzip_lines())
+
+    growth = peaks[large] / peaks[SMALL]
+    print(f"流式峰值 {large} 篇 / {SMALL} 篇 = {growth:.2f}x，gzip 解压后 {lines} 行")
+    if growth > MAX_GROWTH or lines != large:
+        print("失败：流式导出的内存随文章数增长，或 gzip 输出不完整")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
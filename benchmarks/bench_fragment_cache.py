@@ -0,0 +1,79 @@
+"""模板片段缓存（app.fragment_cache）的渲染开销和命中率
+
+1. 渲染 blog/post.html：关闭片段缓存、{% cache %} 命中两种情况下每次渲染的耗时
+2. 按 Zipf 分布随机访问 POSTS 篇文章页，不同 FRAGMENT_CACHE_SIZE 下的命中率和内存中的片段总大小；
+   其间每 WRITE_EVERY 次访问修改一篇文章，触发失效
+
+运行: python benchmarks/bench_fragment_cache.py [文章数] [访问次数]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app import fragment_cache as fragments  # noqa: E402
+from app.fragment_cache import FragmentCache  # noqa: E402
+from app.prerender import POST_TEMPLATE, page_environment  # noqa: E402
+from app.rendering import render_post_content  # noqa: E402
+from app.response_cache import invalidate_post  # noqa: E402
+
+CONTENT = "## 片段缓存\n\n" + "模板片段 *fragment* with `code` and [links](https://example.com). " * 200
+WRITE_EVERY = 200
+
+
+def make_post(post_id: int, html: str) -> dict:
+    return {
+        "id": post_id, "title": f"Post {post_id}", "content_html": html,
+        "created_at": "2024-05-01 12:00:00", "updated_at": "2024-05-01 12:00:00",
+    }
+
+
+def bench_render(html: str, renders: int = 2000):
+    template = page_environment().get_template(POST_TEMPLATE)
+    post = make_post(1, html)
+    for name, size in (("关闭片段缓存", 0), ("片段缓存命中", 512)):
+        fragments.fragment_cache = FragmentCache(size, 300.0)
+        template.render(request=None, post_id=1, post=post)
+        started = time.perf_counter()
+        for _ in range(renders):
+            template.render(request=None, post_id=1, post=post)
+        elapsed = (time.perf_counter() - started) / renders
+        print(f"  {name:<10} {elapsed * 1e6:7.1f} µs/次")
+
+
+def bench_hit_rate(html: str, posts: int, visits: int):
+    template = page_environment().get_template(POST_TEMPLATE)
+    weights = [1 / rank for rank in range(1, posts + 1)]
+    ids = random.Random(42).choices(range(1, posts + 1), weights=weights, k=visits)
+    for size in (64, 256, 1024):
+        cache = fragments.fragment_cache = FragmentCache(size, 300.0)
+        # 失效事件经由 response_cache 转发给注册时的实例
+        fragments.response_cache._listeners[:] = [cache.invalidate]
+        for count, post_id in enumerate(ids, start=1):
+            template.render(request=None, post_id=post_id, post=make_post(post_id, html))
+            if count % WRITE_EVERY == 0:
+                invalidate_post(random.choice(ids))
+        stats = cache.stats()
+        resident = sum(len(value) for value, _ in cache._entries._data.values())
+        print(
+            f"  FRAGMENT_CACHE_SIZE={size:<5} 命中率 {stats['hit_rate']:6.1%}  "
+            f"淘汰 {stats['evictions']:6d}  片段共 {resident / 1024 / 1024:6.1f} MB"
+        )
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    visits = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    html = render_post_content(CONTENT).content_html
+    print(f"渲染文章页（正文 {len(html) / 1024:.0f} KB）:")
+    bench_render(html)
+    print(f"{posts} 篇文章按 Zipf 分布访问 {visits} 次，每 {WRITE_EVERY} 次修改一篇:")
+    bench_hit_rate(html, posts, visits)
+
+
+if __name__ == "__main__":
+    main()
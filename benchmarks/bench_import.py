@@ -0,0 +1,123 @@
+"""批量导入（app.importer）与逐篇 INSERT + COMMIT 的吞吐量对比
+
+每种方式在一个已有 BASE 篇文章、建好索引和 FTS5 全文索引的新数据库上导入同一份 NDJSON：
+- 逐篇提交：原 create_post 的写法，每篇一次 INSERT 和一次 COMMIT
+- 批量（保留索引）：每 IMPORT_BATCH_SIZE 篇一次 executemany 和 COMMIT，服务运行中的 API 导入
+- 批量（延迟索引）：导入期间删除二级索引和 FTS 插入触发器，结束后重建，命令行导入的默认方式
+- 批量 + 多进程渲染：CPU 多于一个时，再用 ProcessPoolExecutor 并行渲染（命令行 --workers）
+Markdown 渲染对每种方式相同，另行单独计时，"不含渲染" 一列为扣除渲染时间后的写入速度。
+运行: python benchmarks/bench_import.py [导入文章数]
+"""
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import importer  # noqa: E402
+from app.db import apply_pragmas, connection_pragmas  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+from app.rendering import render_post_content  # noqa: E402
+from app.search import FTS_TABLE, ensure_search_index  # noqa: E402
+
+BASE = 2000
+PARAGRAPH = "批量导入测试，SQLite executemany in large transactions. " * 8
+
+
+def make_ndjson(count: int) -> bytes:
+    lines = []
+    for i in range(count):
+        content = f"## 第 {i} 篇\n\n{PARAGRAPH}\n\n- 列表项 {i}\n- `code`\n\n{PARAGRAPH}"
+        lines.append(json.dumps({
+            "title": f"Imported {i}",
+            "content": content,
+            "published": i % 10 != 0,
+            "created_at": f"2019-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00",
+        }, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def setup_database(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    apply_pragmas(conn, connection_pragmas())
+    migrate(conn)
+    ensure_search_index(conn)
+    conn.execute("INSERT INTO users (username, email, hashed_password) VALUES ('admin', 'admin@example.com', 'x')")
+    conn.executemany(
+        "INSERT INTO posts (title, content, content_html, excerpt, word_count, created_at, author_id) "
+        "VALUES (?, ?, ?, '', 100, datetime('2020-01-01', ? || ' minutes'), 1)",
+        [(f"Existing {i}", PARAGRAPH, f"<p>{PARAGRAPH}</p>", i) for i in range(BASE)],
+    )
+    conn.commit()
+    return conn
+
+
+def per_post(conn: sqlite3.Connection, data: bytes) -> int:
+    count = 0
+    for _, record in importer.iter_archive(io.BytesIO(data), "ndjson"):
+        rendered = render_post_content(record.content)
+        conn.execute(
+            "INSERT INTO posts (title, content, content_html, excerpt, word_count, published, author_id, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)",
+            (record.title, record.content, *rendered, 1 if record.published else 0, record.created_at, record.created_at),
+        )
+        conn.commit()
+        count += 1
+    return count
+
+
+def batched(defer_indexes: bool, workers: int = 1):
+    def run(conn: sqlite3.Connection, data: bytes) -> int:
+        records = importer.iter_archive(io.BytesIO(data), "ndjson")
+        if workers == 1:
+            return importer.import_posts(conn, records, 1, defer_indexes=defer_indexes).imported
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return importer.import_posts(conn, records, 1, defer_indexes=defer_indexes, executor=executor).imported
+    return run
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = make_ndjson(count)
+
+    started = time.perf_counter()
+    for _, record in importer.iter_archive(io.BytesIO(data), "ndjson"):
+        render_post_content(record.content)
+    render_seconds = time.perf_counter() - started
+    print(f"导入 {count} 篇（已有 {BASE} 篇），其中 Markdown 渲染 {render_seconds:.2f}s")
+
+    variants = [
+        ("逐篇提交", per_post),
+        ("批量（保留索引）", batched(False)),
+        ("批量（延迟索引）", batched(True)),
+    ]
+    cpus = os.cpu_count() or 1
+    if cpus > 1:
+        variants.append((f"批量 + {cpus} 进程渲染", batched(True, cpus)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, run in variants:
+            conn = setup_database(os.path.join(tmp, f"{len(os.listdir(tmp))}.db"))
+            started = time.perf_counter()
+            imported = run(conn, data)
+            seconds = time.perf_counter() - started
+            # 全文索引与 posts 一致：能搜到导入的文章，integrity-check 通过
+            hits = conn.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH '\"Imported\"'").fetchone()[0]
+            conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('integrity-check')")
+            indexes = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = 'posts'").fetchone()[0]
+            conn.close()
+            print(
+                f"  {name:<10} {seconds:6.2f}s  {imported / seconds:7.0f} 篇/秒  "
+                f"不含渲染 {imported / max(seconds - render_seconds, 1e-6):8.0f} 篇/秒  "
+                f"全文命中 {hits}  posts 索引 {indexes}"
+            )
+
+
+if __name__ == "__main__":
+    main()
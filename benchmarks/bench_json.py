@@ -0,0 +1,92 @@
+"""文章列表响应的 JSON 序列化耗时：FastAPI 默认路径、标准库 JSONResponse 与 ORJSONResponse
+
+文章由 render_post_content 渲染，正文约 6KB 的中英文混排 Markdown（含代码块），
+与 async_crud.get_post 返回的 dict 字段相同。
+运行: python benchmarks/bench_json.py [每页文章数]
+"""
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app import schemas  # noqa: E402
+from app.rendering import render_post_content  # noqa: E402
+
+ROUNDS = 7
+
+PARAGRAPH = (
+    "FastAPI 与 SQLite 组合适合中小型博客，写入频率低、读取频率高。"
+    "This paragraph mixes **English** and 中文, with `inline code` and a [link](https://example.com).\n\n"
+)
+CODE = "```python\nasync def handler(request):\n    return {\"ok\": True, \"items\": list(range(10))}\n```\n\n"
+
+
+def make_posts(count: int, summary: bool) -> List[dict]:
+    content = ("## 小节标题\n\n" + PARAGRAPH * 6 + CODE) * 3
+    html, excerpt, word_count = render_post_content(content)
+    posts = []
+    for i in range(count):
+        post = {
+            "id": i + 1,
+            "title": f"第 {i + 1} 篇文章：SQLite 性能调优笔记",
+            "published": True,
+            "created_at": "2024-05-01 12:00:00",
+            "updated_at": "2024-05-02 08:30:15.123",
+            "author_id": 1,
+            "author_name": "admin",
+            "excerpt": excerpt,
+            "word_count": word_count,
+        }
+        if not summary:
+            post["content"] = content
+            post["content_html"] = html
+        posts.append(post)
+    return posts
+
+
+def best_us(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    post_list = TypeAdapter(List[schemas.Post])
+    summary_list = TypeAdapter(List[schemas.PostSummary])
+
+    for view, summary, adapter in (("full", False, post_list), ("summary", True, summary_list)):
+        posts = make_posts(count, summary)
+        size = len(ORJSONResponse(content=posts).body)
+        variants = {
+            "jsonable_encoder + json": lambda: JSONResponse(content=jsonable_encoder(posts)).body,
+            "JSONResponse (json)": lambda: JSONResponse(content=posts).body,
+            "ORJSONResponse": lambda: ORJSONResponse(content=posts).body,
+            "response_model + json": lambda: JSONResponse(
+                content=adapter.dump_python(adapter.validate_python(posts), mode="json")
+            ).body,
+            "response_model + orjson": lambda: ORJSONResponse(
+                content=adapter.dump_python(adapter.validate_python(posts), mode="json")
+            ).body,
+        }
+        repeat = 20 if not summary else 100
+        print(f"view={view}: {count} 篇, 响应 {size / 1024:.0f} KB")
+        baseline = None
+        for name, fn in variants.items():
+            us = best_us(fn, repeat)
+            baseline = baseline or us
+            print(f"  {name:<26} {us / 1000:8.3f} ms  ({baseline / us:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
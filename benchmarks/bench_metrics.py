@@ -0,0 +1,77 @@
+"""MetricsMiddleware 的单请求开销，超过预算时以非零状态退出
+
+中间件包在一个只返回固定响应的 ASGI 应用外面，直接在事件循环中调用，
+两种情况交替测量多轮取最小值，差值即为插桩本身的开销。
+运行: python benchmarks/bench_metrics.py [每轮请求数]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.metrics import Metrics, MetricsMiddleware, record_query  # noqa: E402
+
+# 每个请求的插桩预算（微秒）
+BUDGET_US = 5.0
+ROUNDS = 7
+
+
+class FakeRoute:
+    path = "/api/posts/{post_id}"
+
+
+ROUTE = FakeRoute()
+SCOPE = {"type": "http", "method": "GET", "path": "/api/posts/1"}
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send):
+    """模拟路由匹配（写入 scope["route"]）、两条查询和响应"""
+    scope["route"] = ROUTE
+    record_query(0.0001)
+    record_query(0.0001)
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def per_request_us(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def measure(requests: int):
+    instrumented = MetricsMiddleware(endpoint, registry=Metrics())
+    plain_best = instrumented_best = float("inf")
+    for _ in range(ROUNDS):
+        plain_best = min(plain_best, await per_request_us(endpoint, requests))
+        instrumented_best = min(instrumented_best, await per_request_us(instrumented, requests))
+    return plain_best, instrumented_best
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    plain, instrumented = asyncio.run(measure(requests))
+    overhead = instrumented - plain
+    print(f"无中间件           {plain:6.2f} us/请求")
+    print(f"MetricsMiddleware  {instrumented:6.2f} us/请求")
+    print(f"插桩开销           {overhead:6.2f} us/请求 (预算 {BUDGET_US} us)")
+    if overhead > BUDGET_US:
+        print("超出插桩开销预算")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""首页和 /blog 服务端渲染文章列表的开销
+
+以前页面只返回框架，浏览器执行脚本后再请求 /api/posts?view=summary，首屏内容需要两次串行的往返；
+现在一次请求返回完整页面。这里在当前进程中直接调用 ASGI 应用（含全部中间件），
+CONCURRENCY 个协程交替请求 / 和 /blog，分别比较：
+  - 仅 /api/posts 的 JSON 列表：以前页面框架之外浏览器还要再发的请求
+  - 服务端渲染，无缓存：每次查询数据库并渲染列表片段
+  - 服务端渲染 + 片段缓存：列表 HTML 命中片段缓存，只渲染页面外层
+  - 再关闭 TEMPLATE_AUTO_RELOAD：取用模板时不再检查模板文件的修改时间
+
+运行: python benchmarks/bench_pages.py [文章数] [请求数]
+"""
+import asyncio
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app.rendering import render_post_content  # noqa: E402
+
+CONCURRENCY = 16
+CONTENT = "## 文章列表\n\n" + "服务端渲染 *server-side* with `code` and [links](https://example.com). " * 40
+
+
+def setup_database(path: str, posts: int):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-c", "import main; main.init_db()"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    html, excerpt, word_count = render_post_content(CONTENT)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (username, email, hashed_password, is_admin) VALUES ('admin', 'a@example.com', 'x', 1)")
+    conn.executemany(
+        "INSERT INTO posts (title, content, content_html, excerpt, word_count, author_id, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, 1, datetime('now', ?), datetime('now'))",
+        [(f"Post {i}", CONTENT, html, excerpt, word_count, f"-{i} minutes") for i in range(posts)],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def serve(paths: list, requests: int) -> tuple:
+    import main as app_main
+
+    async def request(target: str) -> int:
+        path, _, query = target.partition("?")
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+            "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+        }
+        status = 0
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app_main.app(scope, receive, send)
+        return status
+
+    latencies = []
+    targets = [paths[i % len(paths)] for i in range(requests)]
+
+    async def client(offset: int):
+        for target in targets[offset::CONCURRENCY]:
+            started = time.perf_counter()
+            assert await request(target) == 200
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client(i) for i in range(CONCURRENCY)))
+    latencies.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(CONCURRENCY)))
+    return requests / (time.perf_counter() - started), statistics.median(latencies)
+
+
+def main():
+    if sys.argv[1:2] == ["--serve"]:
+        rate, p50 = asyncio.run(serve(sys.argv[3].split(","), int(sys.argv[2])))
+        print(rate, p50)
+        return
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    pages = "/,/blog"
+    api = "/api/posts?limit=3&view=summary,/api/posts?limit=20&view=summary"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        setup_database(db_path, posts)
+        print(f"{posts} 篇文章，{CONCURRENCY} 个并发客户端共 {requests} 次请求:")
+        for name, targets, extra in (
+            ("JSON 列表（旧页面的第二次请求）", api, {"RESPONSE_CACHE_BACKEND": "none"}),
+            ("服务端渲染，无缓存", pages, {"RESPONSE_CACHE_BACKEND": "none"}),
+            ("服务端渲染 + 片段缓存", pages, {"RESPONSE_CACHE_BACKEND": "memory"}),
+            ("片段缓存 + 关闭 auto_reload", pages, {"RESPONSE_CACHE_BACKEND": "memory", "TEMPLATE_AUTO_RELOAD": "false"}),
+        ):
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", ACCESS_LOG_ENABLED="false", **extra)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--serve", str(requests), targets],
+                cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+            ).stdout.split()
+            rate, p50 = float(output[-2]), float(output[-1])
+            print(f"  {name:<22} {rate:7.0f} req/s  p50={p50 * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
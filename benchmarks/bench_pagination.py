@@ -0,0 +1,76 @@
+"""OFFSET 分页与 (created_at, id) 游标分页在不同页深度下的耗时对比
+
+运行: python benchmarks/bench_pagination.py [文章数]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+PAGE_SIZE = 20
+OFFSET_QUERY = '''
+    SELECT p.id, p.title, p.created_at, u.username
+    FROM posts p LEFT JOIN users u ON p.author_id = u.id
+    WHERE p.published = 1
+    ORDER BY p.created_at DESC, p.id DESC
+    LIMIT ? OFFSET ?
+'''
+KEYSET_QUERY = '''
+    SELECT p.id, p.title, p.created_at, u.username
+    FROM posts p LEFT JOIN users u ON p.author_id = u.id
+    WHERE p.published = 1 AND (p.created_at, p.id) < (?, ?)
+    ORDER BY p.created_at DESC, p.id DESC
+    LIMIT ?
+'''
+
+
+def setup_database(path: str, posts: int):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT);
+        CREATE TABLE posts (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, content TEXT,
+            published INTEGER DEFAULT 1, created_at TIMESTAMP, updated_at TIMESTAMP, author_id INTEGER);
+        CREATE INDEX idx_posts_created_id ON posts (created_at DESC, id DESC);
+        CREATE INDEX idx_posts_published_created_id ON posts (published, created_at DESC, id DESC);
+        INSERT INTO users (username) VALUES ('admin');
+    ''')
+    conn.executemany(
+        "INSERT INTO posts (title, content, created_at, author_id) VALUES (?, ?, datetime('2020-01-01', ? || ' minutes'), 1)",
+        [(f"Post {i}", "lorem ipsum " * 50, i) for i in range(posts)],
+    )
+    conn.commit()
+    return conn
+
+
+def timed(conn, sql, params, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = setup_database(os.path.join(tmp, "bench.db"), posts)
+        print(f"{posts} 篇文章, 每页 {PAGE_SIZE} 篇")
+        print(f"{'页深度':>10} {'OFFSET(ms)':>12} {'游标(ms)':>10}")
+        for depth in (0, 1_000, 10_000, 50_000, posts - PAGE_SIZE - 1):
+            if depth >= posts:
+                continue
+            # 游标取自上一页最后一行，与 /api/posts 返回的 X-Next-Cursor 等价
+            anchor = conn.execute(
+                "SELECT created_at, id FROM posts WHERE published = 1 ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+                (max(depth - 1, 0),),
+            ).fetchone()
+            offset_ms = timed(conn, OFFSET_QUERY, (PAGE_SIZE, depth))
+            keyset_ms = timed(conn, KEYSET_QUERY, (*anchor, PAGE_SIZE))
+            print(f"{depth:>10} {offset_ms:>12.3f} {keyset_ms:>10.3f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""预渲染（app.prerender）的生成耗时，以及 /blog/{id} 动态渲染与返回预渲染文件的吞吐量
+
+1. 生成：全量渲染、CPU 多于一个时的多进程全量渲染、无变化的增量运行、修改 1% 文章后的增量运行
+2. 服务：CONCURRENCY 个协程直接调用 ASGI 应用随机请求文章页，分别为动态渲染（关闭响应缓存）、
+   动态渲染 + 内存响应缓存、PRERENDER_DIR 中的静态文件；不经过网络，只比较应用内的开销。
+   服务器不支持 ASGI pathsend 扩展时（如 uvicorn）文件在线程中分块读取；"预渲染 pathsend"
+   模拟支持该扩展的服务器，只计应用的开销，文件由服务器用 sendfile 发送
+
+运行: python benchmarks/bench_prerender.py [文章数] [请求数]
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app.prerender import prerender  # noqa: E402
+from app.rendering import render_post_content  # noqa: E402
+
+CONCURRENCY = 16
+CONTENT = "## 预渲染\n\n" + "静态页面 *pre-render* with `code` and [links](https://example.com). " * 40
+
+
+def setup_database(path: str, posts: int):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-c", "import main; main.init_db()"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    html, excerpt, word_count = render_post_content(CONTENT)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (username, email, hashed_password, is_admin) VALUES ('admin', 'a@example.com', 'x', 1)")
+    conn.executemany(
+        "INSERT INTO posts (title, content, content_html, excerpt, word_count, author_id, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, 1, datetime('now'), datetime('now'))",
+        [(f"Post {i}", CONTENT, html, excerpt, word_count) for i in range(posts)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def bench_pipeline(db_path: str, output_dir: str, posts: int):
+    conn = sqlite3.connect(db_path)
+    runs = [("全量", 1, True)]
+    cpus = os.cpu_count() or 1
+    if cpus > 1:
+        runs.append((f"全量 {cpus} 进程", cpus, True))
+    runs.append(("增量（无变化）", 1, False))
+    for name, workers, full in runs:
+        result = prerender(conn, output_dir, workers=workers, full=full)
+        print(f"  {name:<14} 渲染 {result.rendered:5d} 篇  {result.seconds:6.2f}s")
+
+    touched = max(posts // 100, 1)
+    conn.execute("UPDATE posts SET updated_at = datetime('now', '+1 minute') WHERE id <= ?", (touched,))
+    conn.commit()
+    result = prerender(conn, output_dir)
+    print(f"  {'增量（修改 1%）':<14} 渲染 {result.rendered:5d} 篇  {result.seconds:6.2f}s")
+    conn.close()
+
+
+async def serve(posts: int, requests: int, pathsend: bool) -> tuple:
+    """在当前进程中直接调用 ASGI 应用（含全部中间件），不经过网络和 HTTP 客户端"""
+    import main as app_main
+
+    async def request(path: str) -> int:
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+        }
+        if pathsend:
+            # 服务器负责发送文件，应用只传出路径
+            scope["extensions"] = {"http.response.pathsend": {}}
+        status = 0
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app_main.app(scope, receive, send)
+        return status
+
+    latencies = []
+    ids = [random.randint(1, posts) for _ in range(requests)]
+
+    async def client(offset: int):
+        for post_id in ids[offset::CONCURRENCY]:
+            started = time.perf_counter()
+            assert await request(f"/blog/{post_id}") == 200
+            latencies.append(time.perf_counter() - started)
+
+    # 预热：建立连接池，响应缓存模式下填满缓存
+    await asyncio.gather(*(client(i) for i in range(CONCURRENCY)))
+    latencies.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(CONCURRENCY)))
+    return requests / (time.perf_counter() - started), statistics.median(latencies)
+
+
+def bench_serving(db_path: str, output_dir: str, posts: int, requests: int):
+    # 每种配置在独立的子进程中导入 main，Settings 从环境变量读取
+    for name, extra in (
+        ("动态渲染", {"RESPONSE_CACHE_BACKEND": "none"}),
+        ("动态 + 响应缓存", {"RESPONSE_CACHE_BACKEND": "memory", "RESPONSE_CACHE_SIZE": str(posts)}),
+        ("预渲染文件", {"RESPONSE_CACHE_BACKEND": "none", "PRERENDER_DIR": output_dir}),
+        ("预渲染 pathsend", {"RESPONSE_CACHE_BACKEND": "none", "PRERENDER_DIR": output_dir, "BENCH_PATHSEND": "1"}),
+    ):
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", ACCESS_LOG_ENABLED="false", **extra)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--serve", str(posts), str(requests)],
+            cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+        ).stdout.split()
+        rate, p50 = float(output[-2]), float(output[-1])
+        print(f"  {name:<14} {rate:7.0f} req/s  p50={p50 * 1000:.2f}ms")
+
+
+def main():
+    if sys.argv[1:2] == ["--serve"]:
+        rate, p50 = asyncio.run(serve(int(sys.argv[2]), int(sys.argv[3]), bool(os.environ.get("BENCH_PATHSEND"))))
+        print(rate, p50)
+        return
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        output_dir = os.path.join(tmp, "prerendered")
+        setup_database(db_path, posts)
+        print(f"生成 {posts} 篇文章的预渲染页面:")
+        bench_pipeline(db_path, output_dir, posts)
+        print(f"{CONCURRENCY} 个并发客户端请求 /blog/{{id}} 共 {requests} 次:")
+        bench_serving(db_path, output_dir, posts, requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""数据访问层（async_crud + AsyncConnectionPool）与原生 sqlite3 路径的对比
+
+- 每次新建连接：main.py 最初的写法，每个查询 sqlite3.connect 后手工转成 dict
+- 原生连接池：同步 sqlite3 + app.db.ConnectionPool，查询在事件循环线程中执行
+- aiosqlite 逐步调用：execute、fetch、关闭游标各一次线程往返（此前 async_crud 的写法）
+- 数据访问层：async_crud 经 execute_fetchall 每条查询一次往返，含指标和查询分析的记录
+
+每种方式执行两类请求：文章详情（按用户名查当前用户 + 按 id 取文章）和首页摘要列表（20 篇），
+先顺序执行统计单请求延迟，再以 CONCURRENCY 个并发请求统计吞吐量。
+运行: python benchmarks/bench_repository.py [请求次数]
+"""
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import async_crud  # noqa: E402
+from app.db import AsyncConnectionPool, ConnectionPool, connection_pragmas  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+
+POSTS = 2000
+USERS = 20
+CONCURRENCY = 32
+USER_SQL = f'SELECT {async_crud.USER_COLUMNS} FROM users WHERE username = ?'
+POST_SQL = f'''
+    SELECT {async_crud.POST_COLUMNS}, p.content_html, p.excerpt, p.word_count
+    FROM posts p
+    LEFT JOIN users u ON p.author_id = u.id
+    WHERE p.id = ? AND p.published = 1
+'''
+LIST_SQL, LIST_PARAMS = async_crud.posts_query(20, summary=True)
+
+
+def setup_database(path: str):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, 'x')",
+        [(f"user{i}", f"user{i}@example.com") for i in range(USERS)],
+    )
+    conn.executemany(
+        "INSERT INTO posts (title, content, content_html, excerpt, word_count, created_at, author_id) "
+        "VALUES (?, ?, ?, ?, 200, datetime('2020-01-01', ? || ' minutes'), ?)",
+        [
+            (f"Post {i}", "lorem ipsum " * 200, "<p>" + "lorem ipsum " * 200 + "</p>", "lorem ipsum " * 15, i, i % USERS + 1)
+            for i in range(POSTS)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+# 每次新建连接
+def raw_connect(path: str, sql: str, params, one: bool):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(sql, params)
+        if one:
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def make_raw_connect(path: str):
+    async def detail(i):
+        raw_connect(path, USER_SQL, (f"user{i % USERS}",), True)
+        raw_connect(path, POST_SQL, (i % POSTS + 1,), True)
+
+    async def listing(i):
+        raw_connect(path, LIST_SQL, LIST_PARAMS, False)
+
+    return detail, listing
+
+
+# 原生连接池
+def make_raw_pool(pool: ConnectionPool):
+    async def detail(i):
+        with pool.connection() as conn:
+            user = conn.execute(USER_SQL, (f"user{i % USERS}",)).fetchone()
+            dict(user)
+            post = conn.execute(POST_SQL, (i % POSTS + 1,)).fetchone()
+            dict(post)
+
+    async def listing(i):
+        with pool.connection() as conn:
+            [dict(row) for row in conn.execute(LIST_SQL, LIST_PARAMS).fetchall()]
+
+    return detail, listing
+
+
+# aiosqlite 逐步调用
+async def stepwise_fetch_one(conn, sql, params):
+    async with conn.execute(sql, params) as cursor:
+        row = await cursor.fetchone()
+    return dict(row) if row else None
+
+
+async def stepwise_fetch_all(conn, sql, params):
+    async with conn.execute(sql, params) as cursor:
+        rows = await cursor.fetchall()
+    return [dict(row) for row in rows]
+
+
+def make_stepwise(pool: AsyncConnectionPool):
+    async def detail(i):
+        async with pool.connection() as conn:
+            await stepwise_fetch_one(conn, USER_SQL, (f"user{i % USERS}",))
+            await stepwise_fetch_one(conn, POST_SQL, (i % POSTS + 1,))
+
+    async def listing(i):
+        async with pool.connection() as conn:
+            await stepwise_fetch_all(conn, LIST_SQL, LIST_PARAMS)
+
+    return detail, listing
+
+
+# 数据访问层
+def make_repository(pool: AsyncConnectionPool):
+    async def detail(i):
+        async with pool.connection() as conn:
+            await async_crud.get_user_by_username(conn, f"user{i % USERS}")
+            await async_crud.get_post(conn, i % POSTS + 1)
+
+    async def listing(i):
+        async with pool.connection() as conn:
+            await async_crud.get_posts(conn, limit=20, summary=True)
+
+    return detail, listing
+
+
+async def sequential(fn, requests: int):
+    samples = []
+    for i in range(requests):
+        started = time.perf_counter()
+        await fn(i)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+async def concurrent(fn, requests: int) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i):
+        async with semaphore:
+            await fn(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def run(path: str, requests: int):
+    sync_pool = ConnectionPool(path, size=5, pragmas=connection_pragmas(query_only=True))
+    stepwise_pool = AsyncConnectionPool(path, size=5, pragmas=connection_pragmas(query_only=True))
+    repository_pool = AsyncConnectionPool(path, size=5, pragmas=connection_pragmas(query_only=True))
+    variants = {
+        "每次新建连接": make_raw_connect(path),
+        "原生连接池": make_raw_pool(sync_pool),
+        "aiosqlite 逐步调用": make_stepwise(stepwise_pool),
+        "数据访问层": make_repository(repository_pool),
+    }
+    results = {}
+    for name, (detail, listing) in variants.items():
+        # 预热：建立连接、填充语句缓存和页缓存
+        for i in range(50):
+            await detail(i)
+            await listing(i)
+        results[name] = (
+            await sequential(detail, requests),
+            await concurrent(detail, requests),
+            await sequential(listing, requests),
+            await concurrent(listing, requests),
+        )
+    await stepwise_pool.close()
+    await repository_pool.close()
+    sync_pool.close()
+    return results
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        setup_database(path)
+        results = asyncio.run(run(path, requests))
+
+    print(f"{POSTS} 篇文章, 每种请求 {requests} 次, 并发 {CONCURRENCY}")
+    print(f"{'':<20} {'详情 p50/p99 (us)':>20} {'详情 req/s':>10} {'列表 p50/p99 (us)':>20} {'列表 req/s':>10}")
+    for name, ((d50, d99), d_rps, (l50, l99), l_rps) in results.items():
+        print(f"{name:<20} {d50:>9.1f}/{d99:<10.1f} {d_rps:>10.0f} {l50:>9.1f}/{l99:<10.1f} {l_rps:>10.0f}")
+    print("原生连接池的查询在事件循环线程中同步执行，期间无法处理其他请求；其余方式不阻塞事件循环。")
+
+
+if __name__ == "__main__":
+    main()
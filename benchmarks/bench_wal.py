@@ -0,0 +1,124 @@
+"""读写混合负载下，回滚日志（DELETE）与 WAL 模式的读延迟对比
+
+一个写线程不断提交批量更新，多个读线程执行文章列表查询，统计读延迟分布和锁错误。
+PRAGMA 与应用相同，来自 app.db.connection_pragmas。
+运行: python benchmarks/bench_wal.py [秒数] [读线程数]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import apply_pragmas, connection_pragmas  # noqa: E402
+
+POSTS = 20_000
+WRITE_BATCH = 200
+LIST_QUERY = '''
+    SELECT p.id, p.title, p.excerpt, p.created_at, u.username
+    FROM posts p LEFT JOIN users u ON p.author_id = u.id
+    WHERE p.published = 1
+    ORDER BY p.created_at DESC, p.id DESC LIMIT 20
+'''
+
+
+def setup_database(path: str, journal_mode: str):
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.executescript('''
+        CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT);
+        CREATE TABLE posts (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, content TEXT, excerpt TEXT,
+            published INTEGER DEFAULT 1, created_at TIMESTAMP, updated_at TIMESTAMP, author_id INTEGER);
+        CREATE INDEX idx_posts_published_created_id ON posts (published, created_at DESC, id DESC);
+        INSERT INTO users (username) VALUES ('admin');
+    ''')
+    conn.executemany(
+        "INSERT INTO posts (title, content, excerpt, created_at, author_id) "
+        "VALUES (?, ?, ?, datetime('2020-01-01', ? || ' minutes'), 1)",
+        [(f"Post {i}", "lorem ipsum " * 300, "lorem ipsum " * 15, i) for i in range(POSTS)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def writer(path: str, stop: threading.Event, result: dict):
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(conn, connection_pragmas())
+    commits = errors = 0
+    i = 0
+    while not stop.is_set():
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # 与编辑文章类似：改正文并刷新 updated_at，每个事务改一批文章使提交有一定的写入量
+            conn.execute(
+                "UPDATE posts SET content = ?, updated_at = datetime('now') WHERE id BETWEEN ? AND ?",
+                (f"edited {i} " + "lorem ipsum " * 300, i % POSTS, i % POSTS + WRITE_BATCH),
+            )
+            conn.execute("COMMIT")
+            commits += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        i += WRITE_BATCH
+    conn.close()
+    result["commits"] = commits
+    result["write_errors"] = errors
+
+
+def reader(path: str, stop: threading.Event, latencies: list, errors: list):
+    conn = sqlite3.connect(path)
+    apply_pragmas(conn, connection_pragmas(query_only=True))
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            conn.execute(LIST_QUERY).fetchall()
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors.append(time.perf_counter() - started)
+    conn.close()
+
+
+def run(journal_mode: str, seconds: float, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        setup_database(path, journal_mode)
+        stop = threading.Event()
+        result, latencies, errors = {}, [], []
+        threads = [threading.Thread(target=writer, args=(path, stop, result))]
+        threads += [threading.Thread(target=reader, args=(path, stop, latencies, errors)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    latencies.sort()
+    result["reads"] = len(latencies)
+    result["read_errors"] = len(errors)
+    result["p50_ms"] = statistics.median(latencies) * 1000 if latencies else 0.0
+    result["p99_ms"] = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0
+    result["max_ms"] = latencies[-1] * 1000 if latencies else 0.0
+    return result
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{POSTS} 篇文章, 1 个写线程 (每事务 {WRITE_BATCH} 行), {readers} 个读线程, {seconds:.0f}s")
+    print(f"{'模式':<8} {'读次数':>8} {'读错误':>6} {'p50(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9} {'写提交':>6}")
+    for mode in ("DELETE", "WAL"):
+        r = run(mode, seconds, readers)
+        print(
+            f"{mode:<8} {r['reads']:>8} {r['read_errors']:>6} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+            f"{r['max_ms']:>9.2f} {r['commits']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
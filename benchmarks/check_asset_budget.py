@@ -0,0 +1,77 @@
+"""公开页面的静态资源传输量预算检查
+
+构建一次静态资源（app.assets，写入临时目录），用与预渲染相同的模板环境渲染公开页面，
+统计页面引用的样式表和脚本（<link rel="stylesheet">、<script src>）按最小的预压缩版本计算的字节数。
+任一公开页面超过 PUBLIC_PAGE_BUDGET，或引用了 /static 以外的样式表和脚本时以状态码 1 退出；
+管理页面只打印，不参与检查。
+运行: python benchmarks/check_asset_budget.py
+"""
+import os
+import re
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app import assets  # noqa: E402
+from app.prerender import page_environment  # noqa: E402
+from app.rendering import render_post_content  # noqa: E402
+
+PUBLIC_PAGE_BUDGET = 30 * 1024
+ASSET_RE = re.compile(r'<link rel="stylesheet" href="([^"]+)"|<script src="([^"]+)"')
+
+CODE_POST = "## 示例\n\n```python\nprint('hello')\n```\n"
+TEXT_POST = "## 示例\n\n只有文字的文章。"
+
+
+def post_context(content: str) -> dict:
+    html, excerpt, word_count = render_post_content(content)
+    post = {
+        "id": 1, "title": "示例", "content": content, "content_html": html, "excerpt": excerpt,
+        "word_count": word_count, "created_at": "2024-05-01 12:00:00", "updated_at": "2024-05-01 12:00:00",
+    }
+    return {"post_id": 1, "post": post}
+
+
+# (页面, 模板, 上下文, 是否公开)
+PAGES = [
+    ("/", "index.html", {}, True),
+    ("/blog", "blog/post_list.html", {}, True),
+    ("/blog/{id}（纯文字）", "blog/post.html", post_context(TEXT_POST), True),
+    ("/blog/{id}（含代码）", "blog/post.html", post_context(CODE_POST), True),
+    ("/login", "login.html", {}, True),
+    ("/admin", "admin/dashboard.html", {}, False),
+    ("/admin/posts/new", "admin/post_editor.html", {}, False),
+]
+
+
+def transferred_bytes(build_dir: str, url: str) -> int:
+    path = os.path.join(build_dir, url[len("/static/"):])
+    sizes = [os.path.getsize(path)]
+    sizes += [os.path.getsize(path + suffix) for _, suffix in assets.ENCODINGS if os.path.exists(path + suffix)]
+    return min(sizes)
+
+
+def check() -> bool:
+    ok = True
+    with tempfile.TemporaryDirectory() as build_dir:
+        assets.build_assets("static", build_dir)
+        environment = page_environment()
+        for page, template, context, public in PAGES:
+            html = environment.get_template(template).render(request=None, **context)
+            urls = [style or script for style, script in ASSET_RE.findall(html)]
+            external = [url for url in urls if not url.startswith("/static/")]
+            total = sum(transferred_bytes(build_dir, url) for url in urls if url.startswith("/static/"))
+            over = public and (total > PUBLIC_PAGE_BUDGET or external)
+            status = "超出预算" if over else ("通过" if public else "不检查")
+            print(f"{status:<6} {page:<22} {total / 1024:6.1f} KB / {PUBLIC_PAGE_BUDGET / 1024:.0f} KB  {len(urls)} 个文件")
+            for url in external:
+                print(f"       外部资源无法计入预算: {url}")
+            ok = ok and not over
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
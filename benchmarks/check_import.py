@@ -0,0 +1,106 @@
+"""批量导入（app.importer）的回归检查：格式或类型错误的记录只被跳过，不影响同一文件中的其他文章，
+任一检查失败时以非零状态退出
+
+NDJSON 中混有非对象行、非字符串的 title/content/author、无法识别的布尔值和时间，
+以及 author 指向已存在用户的记录；分别按命令行（直接写入）和服务端（write_batch）的方式导入。
+运行: python benchmarks/check_import.py
+"""
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import importer  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+from app.search import ensure_search_index  # noqa: E402
+
+# (记录, 是否应导入)
+RECORDS = [
+    ({"title": "Good 1", "content": "# body"}, True),
+    ({"title": 1, "content": "body"}, False),
+    ({"title": "Bad content", "content": 123}, False),
+    ({"title": ["x"], "content": "body"}, False),
+    ({"title": "Bad author", "content": "body", "author": ["admin"]}, False),
+    ({"title": "Bad author name", "content": "body", "author_name": {"name": "admin"}}, False),
+    ({"title": "Bad flag", "content": "body", "published": "maybe"}, False),
+    ({"title": "Bad date", "content": "body", "created_at": "yesterday"}, False),
+    ({"title": "", "content": "body"}, False),
+    ({"title": "Good 2", "content": "body", "author": "writer", "published": False}, True),
+    ({"title": "Good 3", "content": "body", "author": "nobody"}, True),
+]
+
+
+def make_ndjson() -> bytes:
+    lines = [json.dumps(record) for record, _ in RECORDS]
+    lines.insert(3, "[1, 2]")
+    lines.insert(5, "not json")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def setup_database(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    ensure_search_index(conn)
+    conn.executemany(
+        "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, 'x')",
+        [("admin", "admin@example.com"), ("writer", "writer@example.com")],
+    )
+    conn.commit()
+    return conn
+
+
+def check(conn: sqlite3.Connection, write_batch=None) -> list:
+    problems = []
+    expected = [record["title"] for record, imported in RECORDS if imported]
+    records = importer.iter_archive(io.BytesIO(make_ndjson()), "ndjson")
+    try:
+        result = importer.import_posts(conn, records, 1, batch_size=2, write_batch=write_batch)
+    except Exception as e:
+        return [f"导入中断: {type(e).__name__}: {e}"]
+
+    skipped = len(RECORDS) - len(expected) + 2
+    if result.imported != len(expected) or result.skipped != skipped:
+        problems.append(f"导入 {result.imported} 篇、跳过 {result.skipped} 篇，应为 {len(expected)} 和 {skipped}")
+    rows = conn.execute(
+        "SELECT p.title, p.published, u.username FROM posts p JOIN users u ON u.id = p.author_id ORDER BY p.id"
+    ).fetchall()
+    if [title for title, _, _ in rows] != expected:
+        problems.append(f"导入的文章为 {[title for title, _, _ in rows]}，应为 {expected}")
+    authors = {title: (published, username) for title, published, username in rows}
+    if authors.get("Good 2") != (0, "writer"):
+        problems.append(f"Good 2 应为 writer 的未发布文章，实际 {authors.get('Good 2')}")
+    if authors.get("Good 3") != (1, "admin"):
+        problems.append(f"作者不存在时应使用默认作者，实际 {authors.get('Good 3')}")
+    for error in result.errors:
+        print(f"        跳过 {error}")
+    return problems
+
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, direct in (("命令行导入", True), ("write_batch 导入", False)):
+            conn = setup_database(os.path.join(tmp, f"{int(direct)}.db"))
+
+            def write_batch(rows):
+                with conn:
+                    conn.executemany(importer.INSERT_SQL, rows)
+
+            try:
+                problems = check(conn, None if direct else write_batch)
+            finally:
+                conn.close()
+            print(f"{'失败' if problems else '通过'}  {name}")
+            for problem in problems:
+                print(f"      ! {problem}")
+            failed = failed or bool(problems)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""预渲染（app.prerender）的回归检查：已发布文章超过一页时生成的页面是否完整，任一检查失败时以非零状态退出
+
+数据库由 app.migrations 建立；文章数默认为 BLOG_PAGE_SIZE 的 2.5 倍，/blog 必须带“更早的文章”链接，
+游标指向该页最后一篇。之后的增量运行不应重新渲染任何文章。
+运行: python benchmarks/check_prerender.py [文章数]
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from urllib.parse import unquote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app import search  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+from app.pages import HOME_POST_COUNT  # noqa: E402
+from app.pagination import decode_post_cursor  # noqa: E402
+from app.prerender import page_path, prerender  # noqa: E402
+from config import settings  # noqa: E402
+
+CURSOR_RE = re.compile(r'href="/blog\?cursor=([^"]+)"')
+CARD_RE = re.compile(r'<article class="post-card">')
+
+
+def setup_database(path: str, posts: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    search.ensure_search_index(conn)
+    conn.execute("INSERT INTO users (username, email, hashed_password) VALUES ('admin', 'a@example.com', 'x')")
+    # 每十篇中一篇未发布
+    conn.executemany(
+        "INSERT INTO posts (title, content, content_html, excerpt, published, created_at, updated_at, author_id) "
+        "VALUES (?, 'body', '<p>body</p>', 'body', ?, datetime('2020-01-01', ? || ' minutes'), "
+        "datetime('2020-01-01', ? || ' minutes'), 1)",
+        [(f"Post {i}", int(i % 10 != 0), i, i) for i in range(posts)],
+    )
+    conn.commit()
+    return conn
+
+
+def read(output_dir: str, url_path: str) -> str:
+    with open(page_path(output_dir, url_path), encoding="utf-8") as f:
+        return f.read()
+
+
+def check(conn: sqlite3.Connection, output_dir: str) -> list:
+    problems = []
+    result = prerender(conn, output_dir)
+    published = [row[0] for row in conn.execute(
+        "SELECT id FROM posts WHERE published = 1 ORDER BY created_at DESC, id DESC"
+    )]
+    if result.rendered != len(published):
+        problems.append(f"全量运行渲染 {result.rendered} 篇，应为 {len(published)} 篇")
+    missing = [post_id for post_id in published if not os.path.exists(page_path(output_dir, f"/blog/{post_id}"))]
+    if missing:
+        problems.append(f"缺少文章页: {missing[:10]}")
+
+    home = read(output_dir, "/")
+    if len(CARD_RE.findall(home)) != min(HOME_POST_COUNT, len(published)):
+        problems.append(f"首页文章数 {len(CARD_RE.findall(home))}，应为 {min(HOME_POST_COUNT, len(published))}")
+
+    blog = read(output_dir, "/blog")
+    page_size = settings.BLOG_PAGE_SIZE
+    if len(CARD_RE.findall(blog)) != min(page_size, len(published)):
+        problems.append(f"/blog 文章数 {len(CARD_RE.findall(blog))}，应为 {min(page_size, len(published))}")
+    cursors = CURSOR_RE.findall(blog)
+    if len(published) > page_size:
+        if not cursors:
+            problems.append("/blog 缺少“更早的文章”链接")
+        else:
+            _, last_id = decode_post_cursor(unquote(cursors[0]))
+            if last_id != published[page_size - 1]:
+                problems.append(f"/blog 的游标指向文章 {last_id}，应为 {published[page_size - 1]}")
+    elif cursors:
+        problems.append("只有一页时 /blog 不应有翻页链接")
+
+    again = prerender(conn, output_dir)
+    if again.rendered:
+        problems.append(f"无变化的增量运行渲染了 {again.rendered} 篇")
+    return problems
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else settings.BLOG_PAGE_SIZE * 5 // 2
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = setup_database(os.path.join(tmp, "prerender.db"), posts)
+        try:
+            problems = check(conn, os.path.join(tmp, "prerendered"))
+        finally:
+            conn.close()
+    print(f"{'失败' if problems else '通过'}  {posts} 篇文章的预渲染")
+    for problem in problems:
+        print(f"      ! {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""热点查询的 EXPLAIN QUERY PLAN 回归检查，任一查询退化为全表扫描或临时排序时以非零状态退出
+
+数据库由 app.migrations 建立，文章列表和导出的 SQL 取自 async_crud.posts_query/export_query，
+其余语句与 async_crud 中的一致。
+运行: python benchmarks/check_query_plans.py [文章数]
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import search  # noqa: E402
+from app.async_crud import USER_COLUMNS, export_query, posts_query  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+
+# 不带 USING INDEX 的 SCAN 即全表扫描；FTS5 虚拟表的 SCAN 由其自身索引完成，不在此列
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def hot_queries():
+    """(名称, SQL, 参数, 计划中必须出现的索引, 是否允许临时排序)"""
+    cursor = ("2020-03-01 00:00:00", 5000)
+    return [
+        ("首页列表", *posts_query(20), "idx_posts_published_created_id", False),
+        ("首页摘要列表", *posts_query(20, summary=True), "idx_posts_published_created_id", False),
+        ("列表翻页", *posts_query(20, before=cursor), "idx_posts_published_created_id", False),
+        ("管理员列表", *posts_query(20, published_only=False), "idx_posts_created_id", False),
+        ("管理员列表翻页", *posts_query(20, published_only=False, before=cursor), "idx_posts_created_id", False),
+        ("全量导出", *export_query(), "idx_posts_updated_id", False),
+        ("增量导出", *export_query("2020-03-01 00:00:00"), "idx_posts_updated_id", False),
+        (
+            "作者的文章",
+            "SELECT id, title, created_at FROM posts WHERE author_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (2, 20), "idx_posts_author_created_id", False,
+        ),
+        (
+            "文章详情",
+            "SELECT p.id, p.title, p.content_html, u.username FROM posts p "
+            "LEFT JOIN users u ON p.author_id = u.id WHERE p.id = ? AND p.published = 1",
+            (1,), None, False,
+        ),
+        ("文章版本", "SELECT id, updated_at, published FROM posts WHERE id = ? AND published = 1", (1,), None, False),
+        ("按用户名查用户", f"SELECT {USER_COLUMNS} FROM users WHERE username = ?", ("user1",), None, False),
+        (
+            "用户名或邮箱占用",
+            "SELECT username = ? FROM users WHERE (username = ? OR email = ?) AND id != ? LIMIT 1",
+            ("user1", "user1", "user1@example.com", -1), None, False,
+        ),
+        ("用户列表", f"SELECT {USER_COLUMNS} FROM users WHERE id > ? ORDER BY id LIMIT ?", (0, 20), None, False),
+        (
+            # 按 bm25 排序只能在匹配结果上临时排序；检查 posts 和 users 按主键读取
+            "全文搜索",
+            f"SELECT * FROM (SELECT p.id, p.title, {search.search_columns()} FROM {search.FTS_TABLE} "
+            f"JOIN posts p ON p.id = {search.FTS_TABLE}.rowid LEFT JOIN users u ON p.author_id = u.id "
+            f"WHERE {search.FTS_TABLE} MATCH ? AND p.published = 1) ORDER BY score, id LIMIT ?",
+            ('"lorem"', 20), None, True,
+        ),
+    ]
+
+
+def setup_database(path: str, posts: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    search.ensure_search_index(conn)
+    conn.executemany(
+        "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, 'x')",
+        [(f"user{i}", f"user{i}@example.com") for i in range(50)],
+    )
+    conn.executemany(
+        "INSERT INTO posts (title, content, excerpt, published, created_at, updated_at, author_id) "
+        "VALUES (?, ?, ?, ?, datetime('2020-01-01', ? || ' minutes'), datetime('2020-01-01', ? || ' minutes'), ?)",
+        [(f"Post {i}", "lorem ipsum " * 20, "lorem ipsum", int(i % 10 != 0), i, i, i % 50 + 1) for i in range(posts)],
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+
+def check(conn: sqlite3.Connection, sql: str, params, index, allow_temp_sort: bool):
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    problems = []
+    for line in plan:
+        match = FULL_SCAN_RE.match(line)
+        if match and match.group(1) != search.FTS_TABLE:
+            problems.append(f"全表扫描: {line}")
+        if TEMP_SORT in line and not allow_temp_sort:
+            problems.append(f"临时排序: {line}")
+    if index is not None and not any(index in line for line in plan):
+        problems.append(f"未使用 {index}")
+    return plan, problems
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = setup_database(os.path.join(tmp, "plans.db"), posts)
+        for name, sql, params, index, allow_temp_sort in hot_queries():
+            plan, problems = check(conn, sql, params, index, allow_temp_sort)
+            print(f"{'失败' if problems else '通过'}  {name}")
+            for line in plan:
+                print(f"        {line}")
+            for problem in problems:
+                print(f"      ! {problem}")
+            failed = failed or bool(problems)
+        conn.close()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
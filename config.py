@@ -1,4 +1,5 @@
 import os
+from typing import List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -6,6 +7,68 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    DB_POOL_SIZE: int = 5
+    DB_POOL_TIMEOUT: float = 5.0
+    # 等待唯一写连接的超时（秒）
+    DB_WRITE_TIMEOUT: float = 10.0
+    # SQLite 存储配置：journal_mode 在启动时设置一次，其余 PRAGMA 对每个连接生效
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -8000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: float = 60.0
+    # posts_fts 的 FTS5 分词器；trigram 支持中文子串搜索，修改后启动时重建索引
+    SEARCH_TOKENIZER: str = "trigram"
+    # 匿名访问已发布文章时 Cache-Control 的 max-age（秒）
+    HTTP_CACHE_MAX_AGE: int = 60
+    # 匿名请求的响应缓存：memory（进程内）、sqlite（同机多 worker 共享）或 none
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_SIZE: int = 512
+    # 响应缓存中响应体的总字节数上限，超出时先淘汰最久未使用（sqlite 为最早写入）的条目
+    RESPONSE_CACHE_MAX_BYTES: int = 33554432
+    RESPONSE_CACHE_TTL: float = 300.0
+    RESPONSE_CACHE_PATH: str = "./response_cache.db"
+    # 列表接口（/api/posts、/api/users、/api/search）每页最多返回的条数，更大的 limit 按此处理
+    MAX_PAGE_SIZE: int = 100
+    # API 响应的 JSON 序列化：json（标准库）或 orjson（需要安装 orjson，列表和全文响应快数倍）
+    JSON_RESPONSE_CLASS: str = "json"
+    # /api/posts/export 每次从游标读取的行数，决定导出过程中的内存占用
+    EXPORT_BATCH_SIZE: int = 500
+    # 同时进行的导出数上限；导出使用单独的只读连接，不占用 DB_POOL_SIZE 中的连接
+    EXPORT_MAX_CONCURRENT: int = 2
+    # 批量导入每个事务写入的文章数，以及 /api/posts/import 上传文件的大小上限（字节）
+    IMPORT_BATCH_SIZE: int = 2000
+    IMPORT_MAX_BYTES: int = 268435456
+    # /api/posts:batch 与 /api/users:batch 每次请求的操作数上限
+    BATCH_MAX_OPERATIONS: int = 1000
+    # python -m app.prerender 生成的静态页面目录；非空时 /、/blog 和 /blog/{id} 优先返回其中的文件
+    PRERENDER_DIR: str = ""
+    # python -m app.assets 生成带内容摘要的静态资源和压缩版本的目录
+    ASSET_BUILD_DIR: str = "./static_build"
+    # /blog 每页显示的文章数
+    BLOG_PAGE_SIZE: int = 20
+    # 每次取用模板时检查文件是否修改；生产环境关闭后，编译好的模板一直留在内存中，不再 stat 模板文件
+    TEMPLATE_AUTO_RELOAD: bool = True
+    # 模板片段缓存（{% cache %} 和文章列表）的条目数上限（LRU，0 表示关闭）和过期时间（秒）
+    FRAGMENT_CACHE_SIZE: int = 512
+    FRAGMENT_CACHE_TTL: float = 300.0
+    # 日志：级别、格式（text 或 json）；访问日志可关闭、抽样，并排除静态文件路径
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_EXCLUDE_PREFIXES: List[str] = ["/static/"]
+    METRICS_ENABLED: bool = True
+    # SQL 查询分析：慢查询阈值（毫秒）、单次请求内同一语句执行多少次视为 N+1、保留的记录条数
+    QUERY_PROFILER_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 100.0
+    N_PLUS_ONE_THRESHOLD: int = 5
+    QUERY_PROFILER_HISTORY: int = 200
     
     class Config:
         env_file = ".env"
@@ -1,47 +1,54 @@
+import asyncio
 import sys
-from sqlalchemy.orm import Session
-from app.models import SessionLocal
-from app import crud, schemas
 
-def create_admin_user(username: str, email: str, password: str):
-    db = SessionLocal()
+from app import services
+from app.db import aio_pool, aio_write_pool, db_pool
+from app.migrations import migrate
+from app.passwords import password_hasher
+
+async def _create_admin_user(username: str, email: str, password: str) -> bool:
     try:
-        # 检查用户是否已存在
-        existing_user = crud.get_user_by_username(db, username)
-        if existing_user:
-            print(f"用户 {username} 已存在")
-            return False
-            
         # 创建用户
-        user_in = schemas.UserCreate(
-            username=username,
-            email=email,
-            password=password
-        )
-        user = crud.create_user(db, user_in)
-        
+        try:
+            user = await services.create_user(username, email, password)
+        except services.UserConflict as e:
+            if e.field == "username":
+                print(f"用户 {username} 已存在")
+            else:
+                print(f"邮箱 {email} 已被使用")
+            return False
+
         # 设置为管理员
-        user.is_admin = True
-        db.commit()
-        
+        await services.update_user(user["id"], {"is_admin": True})
+
         print(f"管理员用户 {username} 创建成功!")
         return True
-        
+    finally:
+        await aio_pool.close()
+        await aio_write_pool.close()
+
+def create_admin_user(username: str, email: str, password: str):
+    try:
+        # 新数据库先建表
+        with db_pool.connection() as conn:
+            migrate(conn)
+        return asyncio.run(_create_admin_user(username, email, password))
     except Exception as e:
         print(f"创建管理员时出错: {e}")
         return False
     finally:
-        db.close()
+        db_pool.close()
+        password_hasher.shutdown()
 
 if __name__ == "__main__":
     if len(sys.argv) < 4:
         print("使用方法: python create_admin.py 用户名 邮箱 密码")
         sys.exit(1)
-        
+
     username = sys.argv[1]
     email = sys.argv[2]
     password = sys.argv[3]
-    
+
     success = create_admin_user(username, email, password)
     if not success:
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
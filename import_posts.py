@@ -0,0 +1,96 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app import importer
+from app.db import apply_pragmas, connection_pragmas, sqlite_path
+from app.migrations import migrate
+from app.prerender import discard_post
+from app.response_cache import invalidate_post
+from app.search import ensure_search_index
+from config import settings
+
+def _collect_files(paths):
+    """展开目录（按路径排序），文件按命令行顺序导入"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = [
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+                if importer.filename_kind(name)
+            ]
+            files.extend(sorted(found))
+        else:
+            files.append(path)
+    return files
+
+def _records(files):
+    for path in files:
+        with open(path, "rb") as file:
+            yield from importer.iter_archive(file, importer.archive_kind(path), path)
+
+def import_files(author: str, paths, batch_size: int, defer_indexes: bool, workers: int = 1) -> bool:
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    conn = sqlite3.connect(sqlite_path(settings.DATABASE_URL))
+    try:
+        apply_pragmas(conn, connection_pragmas())
+        # 新数据库先建表和全文索引
+        migrate(conn)
+        ensure_search_index(conn)
+
+        row = conn.execute("SELECT id FROM users WHERE username = ?", (author,)).fetchone()
+        if row is None:
+            print(f"用户 {author} 不存在")
+            return False
+
+        files = _collect_files(paths)
+        started = time.perf_counter()
+
+        def progress(imported: int, skipped: int):
+            rate = imported / max(time.perf_counter() - started, 1e-6)
+            print(f"\r已导入 {imported} 篇，跳过 {skipped} 篇，{rate:.0f} 篇/秒", end="", flush=True)
+
+        result = importer.import_posts(
+            conn, _records(files), row[0],
+            batch_size=batch_size, defer_indexes=defer_indexes, progress=progress, executor=executor,
+        )
+        print()
+        for error in result.errors:
+            print(f"  跳过 {error}")
+        print(f"共导入 {result.imported} 篇文章，跳过 {result.skipped} 篇，耗时 {result.seconds:.1f}s")
+        if result.imported:
+            # 只有 RESPONSE_CACHE_BACKEND=sqlite 时标签版本与运行中的服务共享，此调用才使其缓存失效；
+            # memory 后端的缓存在各 worker 进程内，已缓存的列表要等 RESPONSE_CACHE_TTL 过期
+            invalidate_post()
+            discard_post()
+            if settings.RESPONSE_CACHE_BACKEND != "sqlite":
+                print(f"运行中的服务已缓存的文章列表最多 {settings.RESPONSE_CACHE_TTL:.0f} 秒后更新")
+        return True
+    except (importer.InvalidArchive, OSError) as e:
+        print(f"\n导入失败: {e}")
+        return False
+    finally:
+        conn.close()
+        if executor is not None:
+            executor.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量导入文章（NDJSON、带 front matter 的 Markdown 或 zip）")
+    parser.add_argument("author", help="默认作者的用户名；文章中的 author 为已存在的用户名时优先使用")
+    parser.add_argument("paths", nargs="+", help="导入文件或目录")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE, help="每个事务写入的文章数")
+    parser.add_argument(
+        "--keep-indexes", action="store_true",
+        help="导入期间保留索引和全文索引触发器；服务运行中导入时使用",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="并行渲染 Markdown 的进程数")
+    args = parser.parse_args()
+
+    success = import_files(args.author, args.paths, args.batch_size, defer_indexes=not args.keep_indexes, workers=args.workers)
+    if not success:
+        sys.exit(1)
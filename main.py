@@ -1,32 +1,60 @@
 from fastapi import FastAPI, Request, Form, HTTPException, Depends
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import sqlite3
 import os
 import json
+import tempfile
 import logging
-from datetime import datetime, timedelta
-from passlib.hash import bcrypt
-from jose import JWTError, jwt
-from typing import Dict, Any, Optional
-import traceback
-
-# 配置日志
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()]
+from typing import Optional
+
+from config import settings
+from app import async_crud, services
+from app.access_log import AccessLogMiddleware, setup_logging
+from app.assets import AssetFiles, build_id, install_template_globals
+from app.async_crud import POST_VIEWS
+from app.batch import POST_FIELDS, USER_FIELDS, InvalidBatch, parse_operations, summary as batch_summary
+from app.auth import InvalidToken, authenticate_user, bearer_token, create_access_token, decode_access_token, load_user
+from app.cache import user_cache
+from app.db import aio_pool, aio_write_pool, configure_journal_mode, db_pool, export_pool
+from app.export import NDJSON_MEDIA_TYPE, InvalidSince, accepts_gzip, parse_since, stream_posts
+from app.fragment_cache import fragment_cache, install_fragment_cache
+from app.http_cache import cache_headers, cached_not_modified, file_digest, not_modified, parse_timestamp, post_etag
+from app.importer import InvalidArchive, archive_kind
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
+from app.migrations import migrate
+from app.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursor,
+    decode_post_cursor,
+    decode_search_cursor,
+    decode_user_cursor,
+    page_limit,
+    post_cursor,
+    search_cursor,
+    user_cursor,
 )
-logger = logging.getLogger("blog-app")
+from app.passwords import PasswordHasherBusy, password_hasher
+from app.pages import HOME_POST_COUNT, post_list
+from app.prerender import prerendered_response
+from app.profiler import ProfilerMiddleware, profiler
+from app.rendering import render_post_content
+from app.response_cache import (
+    AUTHORS_TAG,
+    POSTS_TAG,
+    post_tag,
+    response_cache,
+)
+from app.search import InvalidSearchQuery, build_match_query, ensure_search_index, rebuild_search_index
+from app.serialization import DefaultJSONResponse
+from app.services import UserConflict
 
-# 配置
-SECRET_KEY = "your-secret-key-change-in-production"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# 配置日志：写 stderr 在后台线程中完成，级别和格式见 Settings
+setup_logging()
+logger = logging.getLogger("blog-app")
 
-app = FastAPI(title="FastAPI Markdown Blog")
+app = FastAPI(title="FastAPI Markdown Blog", default_response_class=DefaultJSONResponse)
 
 # 允许跨域请求
 app.add_middleware(
@@ -35,54 +63,82 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # 允许所有方法
     allow_headers=["*"],  # 允许所有头部
+    expose_headers=[NEXT_CURSOR_HEADER],  # 允许前端读取分页游标
 )
 
+# 访问日志
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    exclude_prefixes=settings.ACCESS_LOG_EXCLUDE_PREFIXES,
+)
+
+# 按路由统计请求数、耗时和数据库查询，见 /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @metrics.register_collector
+    def _runtime_gauges():
+        pool = aio_pool.stats()
+        return {
+            "blog_db_pool_in_use": pool["in_use"],
+            "blog_db_pool_idle": pool["idle"],
+            "blog_db_pool_wait_seconds_total": pool["wait_time_total"],
+            "blog_db_write_wait_seconds_total": aio_write_pool.stats()["wait_time_total"],
+            "blog_password_hash_pending": password_hasher.stats()["pending"],
+            "blog_user_cache_hit_rate": user_cache.stats()["hit_rate"],
+            "blog_response_cache_hit_rate": response_cache.stats().get("hit_rate", 0.0),
+            "blog_fragment_cache_hit_rate": fragment_cache.stats().get("hit_rate", 0.0),
+            "blog_fragment_cache_size": fragment_cache.stats().get("size", 0),
+        }
+
+    metrics.register_histogram(
+        "blog_password_hash_seconds", "Time spent in bcrypt hash and verify.", password_hasher.hash_time
+    )
+    metrics.register_histogram(
+        "blog_password_hash_queue_wait_seconds", "Time hash jobs waited for a hasher worker.", password_hasher.queue_wait
+    )
+
+# SQL 查询分析：记录每个请求发出的查询，检查 N+1
+if settings.QUERY_PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
 # 挂载静态文件
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", AssetFiles(directory="static"), name="static")
 
 # 设置模板
 templates = Jinja2Templates(directory="templates")
-
-def get_db_connection():
-    """创建数据库连接"""
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+# 编译后的模板缓存在环境中；关闭 auto_reload 后不再检查模板文件的修改时间
+templates.env.auto_reload = settings.TEMPLATE_AUTO_RELOAD
+install_template_globals(templates.env)
+install_fragment_cache(templates.env)
+# 文章页 ETag 包含模板摘要，模板更新后浏览器缓存随之失效
+POST_PAGE_VARIANT = "html:" + file_digest("templates/base.html", "templates/blog/post.html") + build_id()
 
 def init_db():
-    """初始化数据库，如果表不存在则创建"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 创建用户表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        hashed_password TEXT NOT NULL,
-        is_active INTEGER DEFAULT 1,
-        is_admin INTEGER DEFAULT 0
-    )
-    ''')
-    
-    # 创建文章表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS posts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        content TEXT NOT NULL,
-        published INTEGER DEFAULT 1,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        author_id INTEGER NOT NULL,
-        FOREIGN KEY (author_id) REFERENCES users (id)
+    """初始化数据库：执行未应用的迁移（app.migrations），补充渲染结果和搜索索引"""
+    with db_pool.connection() as conn:
+        journal_mode = configure_journal_mode(conn)
+        for migration in migrate(conn):
+            logger.info("已执行数据库迁移 %d: %s", migration.version, migration.description)
+        _render_missing_html(conn)
+        # 首次创建或更换分词器后，为已有文章建立全文索引
+        if ensure_search_index(conn):
+            count = rebuild_search_index(conn)
+            logger.info("已为 %d 篇文章建立搜索索引", count)
+    logger.info("数据库初始化完成, journal_mode=%s", journal_mode)
+
+def _render_missing_html(conn: sqlite3.Connection):
+    """为尚未渲染过的旧文章补充 content_html、摘要和字数"""
+    rows = conn.execute('SELECT id, content FROM posts WHERE content_html IS NULL OR excerpt IS NULL').fetchall()
+    if not rows:
+        return
+    conn.executemany(
+        'UPDATE posts SET content_html = ?, excerpt = ?, word_count = ? WHERE id = ?',
+        [(*render_post_content(row['content']), row['id']) for row in rows]
     )
-    ''')
-    
     conn.commit()
-    conn.close()
-    logger.info("数据库初始化完成")
+    logger.info("已为 %d 篇文章生成 HTML", len(rows))
 
 # 在启动时初始化数据库
 @app.on_event("startup")
@@ -90,111 +146,158 @@ async def startup_event():
     init_db()
     logger.info("应用启动，数据库已初始化")
 
-def verify_password(plain_password, hashed_password):
-    """验证密码"""
-    try:
-        return bcrypt.verify(plain_password, hashed_password)
-    except Exception as e:
-        logger.error(f"密码验证错误: {e}")
-        return False
+@app.on_event("shutdown")
+async def shutdown_event():
+    await aio_pool.close()
+    await aio_write_pool.close()
+    await export_pool.close()
+    db_pool.close()
+    password_hasher.shutdown()
 
-def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """创建访问令牌"""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+def hasher_busy_response() -> JSONResponse:
+    """密码哈希队列已满时返回 429"""
+    return JSONResponse(
+        content={"detail": "请求过多，请稍后重试"},
+        status_code=429,
+        headers={"Retry-After": "1"},
+    )
 
 async def get_current_user(request: Request):
     """获取当前登录用户"""
     try:
-        authorization = request.headers.get("Authorization")
-        if not authorization or not authorization.startswith("Bearer "):
+        token = bearer_token(request.headers.get("Authorization"))
+        if token is None:
             return JSONResponse(content={"detail": "未认证"}, status_code=401)
         
-        token = authorization.replace("Bearer ", "")
-        
         try:
             # 验证令牌
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username = payload.get("sub")
-            if username is None:
-                return JSONResponse(content={"detail": "无效的凭证"}, status_code=401)
-        except JWTError as e:
-            logger.error(f"JWT解析错误: {e}")
+            username = decode_access_token(token)
+        except InvalidToken as e:
+            logger.error("JWT解析错误: %s", e)
             return JSONResponse(content={"detail": "无效的凭证"}, status_code=401)
         
         # 获取用户
-        conn = get_db_connection()
-        user = conn.execute(
-            'SELECT id, username, email, is_active, is_admin FROM users WHERE username = ?', 
-            (username,)
-        ).fetchone()
-        conn.close()
+        user = await load_user(username)
         
         if not user:
             return JSONResponse(content={"detail": "用户不存在"}, status_code=404)
         
-        user_dict = dict(user)
-        user_dict['is_active'] = bool(user_dict['is_active'])
-        user_dict['is_admin'] = bool(user_dict['is_admin'])
-        
-        return user_dict
+        return dict(user)
     
     except Exception as e:
         logger.exception("获取当前用户时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
-# 请求日志记录中间件
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.debug(f"收到请求: {request.method} {request.url}")
+async def _is_admin_request(request: Request, conn) -> bool:
+    """判断请求是否来自管理员，令牌无效时视为普通访问者"""
+    token = bearer_token(request.headers.get("Authorization"))
+    if token is None:
+        return False
     try:
-        response = await call_next(request)
-        logger.debug(f"请求处理完成: {request.method} {request.url} - {response.status_code}")
-        return response
-    except Exception as e:
-        logger.exception(f"请求处理异常: {request.method} {request.url}")
-        raise
+        user = await load_user(decode_access_token(token), conn)
+    except InvalidToken:
+        # 忽略令牌错误，将用户视为普通访问者
+        return False
+    return bool(user and user['is_admin'])
 
 # 全局异常处理
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.exception(f"全局异常: {exc}")
+    logger.exception("全局异常: %s", exc)
     return JSONResponse(
         status_code=500,
         content={"error": "服务器内部错误", "detail": str(exc)},
     )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus 文本格式的指标"""
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(content={"detail": "Not Found"}, status_code=404)
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/debug/queries")
+async def debug_queries(request: Request, limit: int = 20):
+    """按总耗时排序的 SQL 语句统计、最近的慢查询和疑似 N+1 请求，仅管理员可见"""
+    current_user = await get_current_user(request)
+    if isinstance(current_user, JSONResponse):
+        return current_user
+    if not current_user.get('is_admin', False):
+        return JSONResponse(content={"detail": "权限不足"}, status_code=403)
+    return profiler.snapshot(limit=limit)
+
+@app.delete("/api/debug/queries")
+async def reset_debug_queries(request: Request):
+    current_user = await get_current_user(request)
+    if isinstance(current_user, JSONResponse):
+        return current_user
+    if not current_user.get('is_admin', False):
+        return JSONResponse(content={"detail": "权限不足"}, status_code=403)
+    profiler.reset()
+    return {"detail": "查询统计已清空"}
+
 # 前端页面路由
 @app.get("/")
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    prerendered = prerendered_response(request)
+    if prerendered is not None:
+        return prerendered
+    latest_posts = await post_list(templates.env, HOME_POST_COUNT, heading="h3", paginate=False)
+    return templates.TemplateResponse("index.html", {"request": request, "latest_posts": latest_posts})
 
 @app.get("/login")
 async def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 @app.get("/blog")
-async def blog_posts(request: Request):
-    return templates.TemplateResponse("blog/post_list.html", {"request": request})
+async def blog_posts(request: Request, cursor: Optional[str] = None):
+    # 预渲染的只有第一页
+    if not cursor:
+        prerendered = prerendered_response(request)
+        if prerendered is not None:
+            return prerendered
+    try:
+        posts = await post_list(templates.env, settings.BLOG_PAGE_SIZE, cursor)
+    except InvalidCursor:
+        return RedirectResponse("/blog", status_code=302)
+    return templates.TemplateResponse("blog/post_list.html", {"request": request, "posts": posts})
 
 @app.get("/blog/{post_id}")
 async def blog_post(request: Request, post_id: int):
-    # 获取文章数据
-    conn = get_db_connection()
-    post = conn.execute('SELECT * FROM posts WHERE id = ?', (post_id,)).fetchone()
-    conn.close()
+    # 已预渲染的文章直接返回文件
+    prerendered = prerendered_response(request)
+    if prerendered is not None:
+        return prerendered
+    
+    # 页面对所有访问者相同，命中缓存时不访问数据库
+    cache_key, cached = response_cache.lookup(request, (post_tag(post_id), AUTHORS_TAG))
+    if cached is not None:
+        if cached_not_modified(request, cached.headers):
+            return Response(status_code=304, headers=cached.headers)
+        return cached.to_response()
+    
+    # 获取文章数据，未发布的文章按不存在处理
+    async with aio_pool.connection() as conn:
+        version = await async_crud.get_post_version(conn, post_id)
+        if version is None:
+            return templates.TemplateResponse("blog/post.html", {"request": request, "post_id": post_id, "error": "Post not found"})
+        
+        # 页面内容对所有访问者相同，未修改时直接返回 304，不再读取全文和渲染模板
+        modified = parse_timestamp(version['updated_at'])
+        headers = cache_headers(post_etag(post_id, version['updated_at'], POST_PAGE_VARIANT), modified, public=True)
+        if not_modified(request, headers['ETag'], modified):
+            return Response(status_code=304, headers=headers)
+        
+        post = await async_crud.get_post(conn, post_id)
     
     if not post:
         return templates.TemplateResponse("blog/post.html", {"request": request, "post_id": post_id, "error": "Post not found"})
     
     # 将post对象传递给模板
-    return templates.TemplateResponse("blog/post.html", {"request": request, "post_id": post_id, "post": post})
+    return response_cache.store(
+        cache_key,
+        templates.TemplateResponse("blog/post.html", {"request": request, "post_id": post_id, "post": post}, headers=headers),
+    )
 
 @app.get("/admin")
 async def admin_dashboard(request: Request):
@@ -219,33 +322,23 @@ async def login(request: Request):
         if not username or not password:
             return JSONResponse(content={"detail": "用户名和密码不能为空"}, status_code=400)
         
-        # 验证用户
-        conn = get_db_connection()
-        user = conn.execute(
-            'SELECT id, username, email, hashed_password, is_active, is_admin FROM users WHERE username = ?', 
-            (username,)
-        ).fetchone()
-        conn.close()
+        # 验证用户名和密码
+        user = await authenticate_user(username, password)
         
         if not user:
             return JSONResponse(content={"detail": "用户名或密码不正确"}, status_code=401)
         
-        # 验证密码
-        if not verify_password(password, user['hashed_password']):
-            return JSONResponse(content={"detail": "用户名或密码不正确"}, status_code=401)
-        
         # 检查用户是否激活
         if not user['is_active']:
             return JSONResponse(content={"detail": "账户未激活"}, status_code=400)
         
         # 生成令牌
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": username}, expires_delta=access_token_expires
-        )
+        access_token = create_access_token(data={"sub": username})
         
         return {"access_token": access_token, "token_type": "bearer"}
     
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception as e:
         logger.exception("登录时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -261,30 +354,15 @@ async def register(request: Request):
         if not username or not email or not password:
             return JSONResponse(content={"detail": "用户名、邮箱和密码不能为空"}, status_code=400)
         
-        # 检查用户名和邮箱是否已存在
-        conn = get_db_connection()
-        existing_user = conn.execute(
-            'SELECT id FROM users WHERE username = ? OR email = ?', 
-            (username, email)
-        ).fetchone()
-        
-        if existing_user:
-            conn.close()
+        try:
+            user = await services.create_user(username, email, password)
+        except UserConflict:
             return JSONResponse(content={"detail": "用户名或邮箱已被注册"}, status_code=400)
         
-        # 创建新用户
-        hashed_password = bcrypt.hash(password)
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)',
-            (username, email, hashed_password)
-        )
-        conn.commit()
-        user_id = cursor.lastrowid
-        conn.close()
-        
-        return {"id": user_id, "username": username, "email": email}
+        return {"id": user['id'], "username": user['username'], "email": user['email']}
     
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception as e:
         logger.exception("注册时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -294,7 +372,7 @@ async def get_current_user_info(request: Request):
     return await get_current_user(request)
 
 @app.get("/api/users")
-async def get_users(request: Request):
+async def get_users(request: Request, limit: int = 100, cursor: Optional[str] = None):
     try:
         # 验证管理员权限
         current_user = await get_current_user(request)
@@ -305,139 +383,197 @@ async def get_users(request: Request):
             return JSONResponse(content={"detail": "权限不足"}, status_code=403)
         
         # 获取所有用户
-        conn = get_db_connection()
-        users = conn.execute('SELECT id, username, email, is_active, is_admin FROM users').fetchall()
-        conn.close()
-        
-        user_list = []
-        for user in users:
-            user_dict = dict(user)
-            user_dict['is_active'] = bool(user_dict['is_active'])
-            user_dict['is_admin'] = bool(user_dict['is_admin'])
-            user_list.append(user_dict)
-            
-        return user_list
+        limit = page_limit(limit)
+        after_id = decode_user_cursor(cursor) if cursor else None
+        async with aio_pool.connection() as conn:
+            users = await async_crud.get_users(conn, limit=limit, after_id=after_id)
+        
+        headers = {}
+        next_cursor = user_cursor(users, limit)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return DefaultJSONResponse(content=users, headers=headers)
+    except InvalidCursor as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=400)
     except Exception as e:
         logger.exception("获取用户列表时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 @app.get("/api/posts")
-async def get_posts(request: Request, limit: int = 100):
+async def get_posts(
+    request: Request,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    view: str = "full",
+):
+    # view=summary 时返回摘要和字数，不返回全文，用于首页和文章列表
+    if view not in POST_VIEWS:
+        return JSONResponse(content={"detail": f"view 只能是 {' 或 '.join(POST_VIEWS)}"}, status_code=400)
     try:
-        # 获取当前用户（如果已登录）
-        token = request.headers.get("Authorization")
-        is_admin = False
-        
-        if token and token.startswith("Bearer "):
-            try:
-                token = token.replace("Bearer ", "")
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                username = payload.get("sub")
-                
-                if username:
-                    conn = get_db_connection()
-                    user = conn.execute(
-                        'SELECT is_admin FROM users WHERE username = ?', 
-                        (username,)
-                    ).fetchone()
-                    conn.close()
-                    
-                    if user and user['is_admin']:
-                        is_admin = True
-            except:
-                # 忽略令牌错误，将用户视为普通访问者
-                pass
-        
-        # 获取文章列表
-        conn = get_db_connection()
-        if is_admin:
-            # 管理员可以看到所有文章
-            query = '''
-                SELECT p.id, p.title, p.content, p.published, p.created_at, p.updated_at, 
-                       p.author_id, u.username as author_name
-                FROM posts p
-                LEFT JOIN users u ON p.author_id = u.id
-                ORDER BY p.created_at DESC
-                LIMIT ?
-            '''
-            posts = conn.execute(query, (limit,)).fetchall()
-        else:
-            # 普通用户只能看到已发布的文章
-            query = '''
-                SELECT p.id, p.title, p.content, p.published, p.created_at, p.updated_at, 
-                       p.author_id, u.username as author_name
-                FROM posts p
-                LEFT JOIN users u ON p.author_id = u.id
-                WHERE p.published = 1
-                ORDER BY p.created_at DESC
-                LIMIT ?
-            '''
-            posts = conn.execute(query, (limit,)).fetchall()
-        
-        conn.close()
-        
-        post_list = []
-        for post in posts:
-            post_dict = dict(post)
-            post_dict['published'] = bool(post_dict['published'])
-            post_list.append(post_dict)
+        limit = page_limit(limit)
+        before = decode_post_cursor(cursor) if cursor else None
+
+        # 匿名访问者看到的列表相同，按查询参数缓存（未知参数不计入）；任何文章变化都会使其失效
+        cache_key, cached = response_cache.lookup(
+            request, (POSTS_TAG, AUTHORS_TAG), {"limit": limit, "cursor": cursor, "view": view}
+        )
+        if cached is not None:
+            return cached.to_response()
+
+        async with aio_pool.connection() as conn:
+            # 获取当前用户（如果已登录），与文章查询共用同一个连接
+            is_admin = await _is_admin_request(request, conn)
             
-        return post_list
+            # 管理员可以看到所有文章，普通用户只能看到已发布的文章
+            posts = await async_crud.get_posts(
+                conn, limit=limit, published_only=not is_admin, before=before, summary=view == "summary"
+            )
+        
+        headers = {}
+        next_cursor = post_cursor(posts, limit)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return response_cache.store(cache_key, DefaultJSONResponse(content=posts, headers=headers))
+    except InvalidCursor as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=400)
     except Exception as e:
         logger.exception("获取文章列表时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
+@app.get("/api/search")
+async def search_posts(
+    request: Request,
+    q: str = "",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+):
+    """全文搜索文章，按相关度排序，title_highlight 和 snippet 中用 <mark> 标出命中位置"""
+    try:
+        match = build_match_query(q)
+        limit = page_limit(limit)
+        after = decode_search_cursor(cursor) if cursor else None
+
+        async with aio_pool.connection() as conn:
+            # 管理员可以搜到未发布的文章
+            is_admin = await _is_admin_request(request, conn)
+            results = await async_crud.search_posts(
+                conn, match, limit=limit, published_only=not is_admin, after=after
+            )
+
+        headers = {}
+        next_cursor = search_cursor(results, limit)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return DefaultJSONResponse(content=results, headers=headers)
+    except (InvalidSearchQuery, InvalidCursor) as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=400)
+    except Exception as e:
+        logger.exception("搜索文章时出错")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+@app.get("/api/posts/export")
+async def export_posts(request: Request, since: Optional[str] = None):
+    """管理员导出全部文章（含未发布），NDJSON 每行一篇，按 (updated_at, id) 正序
+
+    边读边写，内存占用只与 EXPORT_BATCH_SIZE 有关；since 只导出 updated_at 不早于该时间的文章，
+    取上次导出最后一行的 updated_at 即可增量导出。客户端接受 gzip 时边生成边压缩。
+    """
+    current_user = await get_current_user(request)
+    if isinstance(current_user, JSONResponse):
+        return current_user
+    if not current_user.get('is_admin', False):
+        return JSONResponse(content={"detail": "权限不足"}, status_code=403)
+    
+    try:
+        since = parse_since(since) if since else None
+    except InvalidSince as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=400)
+    
+    # 导出连接都在使用时直接拒绝，而不是在响应开始后等待连接超时
+    if export_pool.stats()["in_use"] >= export_pool.size:
+        return JSONResponse(
+            content={"detail": "导出任务过多，请稍后重试"},
+            status_code=429,
+            headers={"Retry-After": "10"},
+        )
+    
+    compress = accepts_gzip(request.headers.get("Accept-Encoding"))
+    headers = {"Content-Disposition": 'attachment; filename="posts.ndjson"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        stream_posts(export_pool, since=since, compress=compress),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+@app.post("/api/posts/import")
+async def import_posts(request: Request, filename: Optional[str] = None):
+    """管理员批量导入文章，请求体为 NDJSON、Markdown（front matter）或包含它们的 zip
+
+    格式按 filename 参数的后缀或 Content-Type 判断。请求体先写入临时文件（超过 1MB 落盘），
+    导入在线程池中按 IMPORT_BATCH_SIZE 分批提交；格式错误的文章跳过，返回导入数和前几条错误。
+    """
+    current_user = await get_current_user(request)
+    if isinstance(current_user, JSONResponse):
+        return current_user
+    if not current_user.get('is_admin', False):
+        return JSONResponse(content={"detail": "权限不足"}, status_code=403)
+    
+    try:
+        kind = archive_kind(filename, request.headers.get("Content-Type"))
+    except InvalidArchive as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=400)
+    
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as upload:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_BYTES:
+                return JSONResponse(content={"detail": "导入文件过大"}, status_code=413)
+            upload.write(chunk)
+        upload.seek(0)
+        
+        try:
+            result = await services.import_posts(upload, kind, current_user['id'])
+        except InvalidArchive as e:
+            return JSONResponse(content={"detail": str(e)}, status_code=400)
+    
+    logger.info("用户 %s 导入文章 %d 篇，跳过 %d 篇，耗时 %.1fs", current_user['username'], result.imported, result.skipped, result.seconds)
+    return DefaultJSONResponse(content=result._asdict())
+
 @app.get("/api/posts/{post_id}")
 async def get_post(request: Request, post_id: int):
     try:
-        # 获取当前用户（如果已登录）
-        token = request.headers.get("Authorization")
-        is_admin = False
-        
-        if token and token.startswith("Bearer "):
-            try:
-                token = token.replace("Bearer ", "")
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                username = payload.get("sub")
-                
-                if username:
-                    conn = get_db_connection()
-                    user = conn.execute(
-                        'SELECT is_admin FROM users WHERE username = ?', 
-                        (username,)
-                    ).fetchone()
-                    conn.close()
-                    
-                    if user and user['is_admin']:
-                        is_admin = True
-            except:
-                # 忽略令牌错误，将用户视为普通访问者
-                pass
-        
-        # 获取文章
-        conn = get_db_connection()
-        query = '''
-            SELECT p.id, p.title, p.content, p.published, p.created_at, p.updated_at, 
-                   p.author_id, u.username as author_name
-            FROM posts p
-            LEFT JOIN users u ON p.author_id = u.id
-            WHERE p.id = ?
-        '''
-        
-        if not is_admin:
+        cache_key, cached = response_cache.lookup(request, (post_tag(post_id), AUTHORS_TAG))
+        if cached is not None:
+            if cached_not_modified(request, cached.headers):
+                return Response(status_code=304, headers=cached.headers)
+            return cached.to_response()
+        
+        async with aio_pool.connection() as conn:
+            # 获取当前用户（如果已登录），与文章查询共用同一个连接
+            is_admin = await _is_admin_request(request, conn)
+            
             # 非管理员只能看到已发布文章
-            query += ' AND p.published = 1'
+            version = await async_crud.get_post_version(conn, post_id, published_only=not is_admin)
+            if version is None:
+                return JSONResponse(content={"detail": "文章不存在"}, status_code=404)
+            
+            # 只有匿名访问已发布文章时允许共享缓存，带令牌的请求每次回源验证
+            modified = parse_timestamp(version['updated_at'])
+            public = version['published'] and "Authorization" not in request.headers
+            headers = cache_headers(post_etag(post_id, version['updated_at'], "json"), modified, public)
+            headers["Vary"] = "Authorization"
+            if not_modified(request, headers['ETag'], modified):
+                return Response(status_code=304, headers=headers)
             
-        post = conn.execute(query, (post_id,)).fetchone()
-        conn.close()
+            post = await async_crud.get_post(conn, post_id, published_only=not is_admin)
         
         if post is None:
             return JSONResponse(content={"detail": "文章不存在"}, status_code=404)
         
-        post_dict = dict(post)
-        post_dict['published'] = bool(post_dict['published'])
-        
-        return post_dict
+        return response_cache.store(cache_key, DefaultJSONResponse(content=post, headers=headers))
     except Exception as e:
         logger.exception("获取文章详情时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -445,8 +581,6 @@ async def get_post(request: Request, post_id: int):
 @app.post("/api/posts")
 async def create_post(request: Request):
     try:
-        logger.info("接收到创建文章请求")
-        
         # 验证用户权限
         current_user = await get_current_user(request)
         if isinstance(current_user, JSONResponse):
@@ -458,9 +592,10 @@ async def create_post(request: Request):
         # 获取文章数据
         try:
             data = await request.json()
-            logger.debug(f"接收到的文章数据: {data}")
         except json.JSONDecodeError:
             return JSONResponse(content={"detail": "无效的JSON格式"}, status_code=400)
+        if not isinstance(data, dict):
+            return JSONResponse(content={"detail": "请求体必须是JSON对象"}, status_code=400)
         
         title = data.get('title')
         content = data.get('content')
@@ -468,34 +603,26 @@ async def create_post(request: Request):
         
         if not title or not content:
             return JSONResponse(content={"detail": "标题和内容不能为空"}, status_code=400)
+        if not isinstance(title, str) or not isinstance(content, str):
+            return JSONResponse(content={"detail": "标题和内容必须是字符串"}, status_code=400)
         
-        # 插入文章
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO posts (title, content, published, author_id, created_at, updated_at) VALUES (?, ?, ?, ?, datetime("now"), datetime("now"))',
-            (title, content, 1 if published else 0, current_user['id'])
-        )
-        post_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        post = await services.create_post(title, content, published, current_user['id'])
         
-        logger.info(f"文章创建成功, ID: {post_id}")
+        logger.info("文章创建成功, ID: %d", post['id'])
         
         # 返回成功响应
         return {
-            "id": post_id,
-            "title": title,
-            "content": content,
-            "published": published,
-            "author_id": current_user['id'],
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
+            "id": post['id'],
+            "title": post['title'],
+            "content": post['content'],
+            "published": post['published'],
+            "author_id": post['author_id'],
+            "created_at": post['created_at'],
+            "updated_at": post['updated_at']
         }
     
     except Exception as e:
         logger.exception("创建文章时出错")
-        traceback.print_exc()  # 打印详细错误到控制台
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 @app.put("/api/posts/{post_id}")
@@ -510,34 +637,31 @@ async def update_post(request: Request, post_id: int):
             return JSONResponse(content={"detail": "权限不足"}, status_code=403)
         
         # 获取文章数据
-        data = await request.json()
-        
-        # 获取现有文章
-        conn = get_db_connection()
-        post = conn.execute('SELECT * FROM posts WHERE id = ?', (post_id,)).fetchone()
-        
+        try:
+            data = await request.json()
+        except json.JSONDecodeError:
+            return JSONResponse(content={"detail": "无效的JSON格式"}, status_code=400)
+        if not isinstance(data, dict):
+            return JSONResponse(content={"detail": "请求体必须是JSON对象"}, status_code=400)
+        
+        for field in ('title', 'content'):
+            if data.get(field) is not None and not isinstance(data[field], str):
+                return JSONResponse(content={"detail": "标题和内容必须是字符串"}, status_code=400)
+        
+        post = await services.update_post(post_id, {
+            'title': data.get('title'),
+            'content': data.get('content'),
+            'published': data.get('published'),
+        })
         if not post:
-            conn.close()
             return JSONResponse(content={"detail": "文章不存在"}, status_code=404)
         
-        # 更新字段
-        title = data.get('title', post['title'])
-        content = data.get('content', post['content'])
-        published = data.get('published', post['published'])
-        
-        conn.execute(
-            'UPDATE posts SET title = ?, content = ?, published = ?, updated_at = datetime("now") WHERE id = ?',
-            (title, content, 1 if published else 0, post_id)
-        )
-        conn.commit()
-        conn.close()
-        
         return {
-            "id": post_id,
-            "title": title,
-            "content": content,
-            "published": published,
-            "updated_at": datetime.utcnow().isoformat()
+            "id": post['id'],
+            "title": post['title'],
+            "content": post['content'],
+            "published": post['published'],
+            "updated_at": post['updated_at']
         }
     
     except Exception as e:
@@ -555,25 +679,41 @@ async def delete_post(request: Request, post_id: int):
         if not current_user.get('is_admin', False):
             return JSONResponse(content={"detail": "权限不足"}, status_code=403)
         
-        # 检查文章是否存在
-        conn = get_db_connection()
-        post = conn.execute('SELECT id FROM posts WHERE id = ?', (post_id,)).fetchone()
-        
-        if not post:
-            conn.close()
+        # 删除文章，不存在时返回 404
+        if not await services.delete_post(post_id):
             return JSONResponse(content={"detail": "文章不存在"}, status_code=404)
         
-        # 删除文章
-        conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
-        conn.commit()
-        conn.close()
-        
         return JSONResponse(content={"detail": "文章已删除"}, status_code=200)
     
     except Exception as e:
         logger.exception("删除文章时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
+@app.post("/api/posts:batch")
+async def batch_posts(request: Request):
+    """批量修改或删除文章，整批只鉴权一次并在一个事务中执行，返回逐项结果（格式见 app.batch）"""
+    try:
+        # 验证用户权限
+        current_user = await get_current_user(request)
+        if isinstance(current_user, JSONResponse):
+            return current_user
+        
+        if not current_user.get('is_admin', False):
+            return JSONResponse(content={"detail": "权限不足"}, status_code=403)
+        
+        try:
+            operations = parse_operations(await request.json(), POST_FIELDS)
+        except json.JSONDecodeError:
+            return JSONResponse(content={"detail": "无效的JSON格式"}, status_code=400)
+        except InvalidBatch as e:
+            return JSONResponse(content={"detail": str(e)}, status_code=400)
+        
+        return batch_summary(await services.batch_posts(operations))
+    
+    except Exception as e:
+        logger.exception("批量修改文章时出错")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
 @app.put("/api/users/{user_id}")
 async def update_user(request: Request, user_id: int):
     try:
@@ -587,75 +727,21 @@ async def update_user(request: Request, user_id: int):
         
         # 获取更新数据
         data = await request.json()
-        username = data.get('username')
-        email = data.get('email')
-        is_active = data.get('is_active')
-        is_admin = data.get('is_admin')
-        password = data.get('password')
-        
-        # 获取现有用户
-        conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        
-        if not user:
-            conn.close()
-            return JSONResponse(content={"detail": "用户不存在"}, status_code=404)
-        
-        # 更新用户信息
-        updates = []
-        params = []
-        
-        if username is not None:
-            # 检查用户名是否已存在
-            existing = conn.execute('SELECT id FROM users WHERE username = ? AND id != ?', (username, user_id)).fetchone()
-            if existing:
-                conn.close()
-                return JSONResponse(content={"detail": "用户名已被使用"}, status_code=400)
-            
-            updates.append("username = ?")
-            params.append(username)
-        
-        if email is not None:
-            # 检查邮箱是否已存在
-            existing = conn.execute('SELECT id FROM users WHERE email = ? AND id != ?', (email, user_id)).fetchone()
-            if existing:
-                conn.close()
-                return JSONResponse(content={"detail": "邮箱已被使用"}, status_code=400)
-            
-            updates.append("email = ?")
-            params.append(email)
-        
-        if is_active is not None:
-            updates.append("is_active = ?")
-            params.append(1 if is_active else 0)
-        
-        if is_admin is not None:
-            updates.append("is_admin = ?")
-            params.append(1 if is_admin else 0)
-        
-        if password is not None:
-            updates.append("hashed_password = ?")
-            params.append(bcrypt.hash(password))
+        changes = {field: data.get(field) for field in ('username', 'email', 'is_active', 'is_admin', 'password')}
         
-        if updates:
-            query = f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
-            params.append(user_id)
-            conn.execute(query, params)
-            conn.commit()
-        
-        # 获取更新后的用户信息
-        updated_user = conn.execute('SELECT id, username, email, is_active, is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        conn.close()
+        try:
+            updated_user = await services.update_user(user_id, changes)
+        except UserConflict as e:
+            detail = "用户名已被使用" if e.field == "username" else "邮箱已被使用"
+            return JSONResponse(content={"detail": detail}, status_code=400)
         
         if not updated_user:
-            return JSONResponse(content={"detail": "用户更新失败"}, status_code=500)
-        
-        updated_user_dict = dict(updated_user)
-        updated_user_dict['is_active'] = bool(updated_user_dict['is_active'])
-        updated_user_dict['is_admin'] = bool(updated_user_dict['is_admin'])
+            return JSONResponse(content={"detail": "用户不存在"}, status_code=404)
         
-        return updated_user_dict
+        return updated_user
     
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception as e:
         logger.exception("更新用户时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -675,26 +761,45 @@ async def delete_user(request: Request, user_id: int):
         if current_user['id'] == user_id:
             return JSONResponse(content={"detail": "不能删除自己的账户"}, status_code=400)
         
-        # 检查用户是否存在
-        conn = get_db_connection()
-        user = conn.execute('SELECT id FROM users WHERE id = ?', (user_id,)).fetchone()
-        
-        if not user:
-            conn.close()
+        # 删除用户，不存在时返回 404
+        if not await services.delete_user(user_id):
             return JSONResponse(content={"detail": "用户不存在"}, status_code=404)
         
-        # 删除用户
-        conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
-        conn.commit()
-        conn.close()
-        
         return JSONResponse(content={"detail": "用户已删除"}, status_code=200)
     
     except Exception as e:
         logger.exception("删除用户时出错")
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
+@app.post("/api/users:batch")
+async def batch_users(request: Request):
+    """批量修改或删除用户，整批只鉴权一次并在一个事务中执行，返回逐项结果（格式见 app.batch）"""
+    try:
+        # 验证管理员权限
+        current_user = await get_current_user(request)
+        if isinstance(current_user, JSONResponse):
+            return current_user
+        
+        if not current_user.get('is_admin', False):
+            return JSONResponse(content={"detail": "权限不足"}, status_code=403)
+        
+        try:
+            operations = parse_operations(await request.json(), USER_FIELDS)
+        except json.JSONDecodeError:
+            return JSONResponse(content={"detail": "无效的JSON格式"}, status_code=400)
+        except InvalidBatch as e:
+            return JSONResponse(content={"detail": str(e)}, status_code=400)
+        
+        return batch_summary(await services.batch_users(operations, current_user['id']))
+    
+    except PasswordHasherBusy:
+        return hasher_busy_response()
+    except Exception as e:
+        logger.exception("批量修改用户时出错")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
 # 运行应用
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="debug")
\ No newline at end of file
+    # 访问日志由 AccessLogMiddleware 记录，关闭 uvicorn 自带的访问日志
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level=settings.LOG_LEVEL.lower(), access_log=False)
\ No newline at end of file
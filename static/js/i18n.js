@@ -17,6 +17,7 @@ const translations = {
         'error_loading_posts': '加载文章出错。请稍后再试。',
         'read_more': '阅读更多',
         'posted_on': '发布于',
+        'older_posts': '更早的文章',
         
         // 博客详情页
         'loading_post': '加载文章中...',
@@ -48,6 +49,7 @@ const translations = {
         'error_loading_posts': 'Error loading posts. Please try again later.',
         'read_more': 'Read More',
         'posted_on': 'Posted on',
+        'older_posts': 'Older Posts',
         
         // Blog detail page
         'loading_post': 'Loading post...',